@@ -0,0 +1,27 @@
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.snapshot import DuckDBSnapshot
+from mamaduck.connectors.csv import CSVToDuckDB
+from mamaduck.connectors.parquet import ParquetToDuckDB
+from mamaduck.connectors.psql import PostgreSQLToDuckDB
+from mamaduck.connectors.sqlite import SQLiteToDuckDB
+from mamaduck.sink.to_csv import DuckDBToCSV
+from mamaduck.sink.to_parquet import DuckDBToParquet
+from mamaduck.sink.to_psql import DuckDBToPostgreSQL
+from mamaduck.sink.to_sqlite import DuckDBToSQLite
+from mamaduck.sink.fanout import DuckDBFanout
+from mamaduck.query import FederatedQuery
+
+__all__ = [
+    "DuckDBManager",
+    "DuckDBSnapshot",
+    "CSVToDuckDB",
+    "ParquetToDuckDB",
+    "PostgreSQLToDuckDB",
+    "SQLiteToDuckDB",
+    "DuckDBToCSV",
+    "DuckDBToParquet",
+    "DuckDBToPostgreSQL",
+    "DuckDBToSQLite",
+    "DuckDBFanout",
+    "FederatedQuery",
+]
@@ -1,30 +1,296 @@
+import contextlib
 import duckdb
+import gzip
+import hashlib
 import os
 import argparse
+import tempfile
+import threading
 from colorama import Fore, Style, init
 
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for zstd-compressed stdin and pipes.
+    zstandard = None
+
 from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.planner import LoadPlanner
+from mamaduck.database.enums import EnumConverter
+from mamaduck.database.transforms import load_transform, transform_query
+from mamaduck.database.maintenance import maintain_after_load
 
 # Initialize colorama for colored CLI output
 init(autoreset=True)
 
 class CSVToDuckDB(DuckDBManager):
-    
-    def load_csv_to_table(self, file_name, table_name, schema=None):
-        """Load CSV into DuckDB table."""
+    # '-' on the command line means "read the CSV from standard input".
+    STDIN_MARKER = "-"
+    STDIN_PATH = "/dev/stdin"
+    # Incremental loads record what they ingested here, inside the DuckDB file itself.
+    LOAD_REGISTRY = "load_registry"
+    LEGACY_LOAD_REGISTRY = "mamaduck_load_registry"
+    # Read size while hashing a file's ingested prefix.
+    FINGERPRINT_BLOCK = 1 << 20
+    CODECS = {".gz": "gzip", ".zst": "zstd"}
+
+    @classmethod
+    def build_csv_source(cls, file_name, compression=None):
+        """Build the read_csv_auto() call for a file, compressed file, named pipe or stdin."""
+        # DuckDB decompresses '.gz'/'.zst' files while streaming them, detecting the
+        # codec from the extension (or taking it from ``compression``). Compressed
+        # stdin and pipes go through csv_source() instead.
+        path = cls.STDIN_PATH if file_name == cls.STDIN_MARKER else file_name
+        if compression and compression != "auto":
+            return f"read_csv_auto('{path}', compression = '{compression}')"
+        return f"read_csv_auto('{path}')"
+
+    @classmethod
+    def stream_codec(cls, file_name, compression=None):
+        """
+        Codec to decompress in Python, or None when DuckDB can read the source itself.
+
+        DuckDB seeks while decompressing, so it only decompresses regular files.
+        Compressed stdin and named pipes are decompressed here and handed to DuckDB
+        through a pipe instead.
+        """
+        if file_name != cls.STDIN_MARKER and os.path.isfile(file_name):
+            return None
+        if compression in ("gzip", "zstd"):
+            return compression
+        if compression in (None, "auto"):
+            return cls.CODECS.get(os.path.splitext(file_name)[1])
+        return None
+
+    @staticmethod
+    def pump_decompressed(path, codec, write_fd, errors):
+        """Decompress ``path`` into the pipe DuckDB is reading; runs on its own thread."""
+        with open(write_fd, "wb") as out:
+            try:
+                with open(path, "rb") as raw:
+                    if codec == "gzip":
+                        reader = gzip.GzipFile(fileobj=raw)
+                    else:
+                        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+                    while chunk := reader.read(1 << 20):
+                        out.write(chunk)
+            except BrokenPipeError:
+                pass  # DuckDB stopped reading; its own error is the one reported.
+            except Exception as e:
+                errors.append(e)
+
+    @contextlib.contextmanager
+    def csv_source(self, file_name, compression=None):
+        """
+        Yield the read_csv_auto() call to load from. A compressed stream is decompressed
+        in Python, and the statements run inside the block commit only if the whole stream
+        decompressed cleanly.
+        """
+        codec = self.stream_codec(file_name, compression)
+        if not codec:
+            yield self.build_csv_source(file_name, compression)
+            return
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("Reading zstd-compressed stdin or pipes needs the 'zstandard' package (pip install mamaduck[zstd]).")
+
+        path = self.STDIN_PATH if file_name == self.STDIN_MARKER else file_name
+        read_fd, write_fd = os.pipe()
+        errors = []
+        pump = threading.Thread(target=self.pump_decompressed, args=(path, codec, write_fd, errors), daemon=True)
+        pump.start()
+        self.duckdb_conn.execute("BEGIN TRANSACTION;")
         try:
-            if schema:
-                print(f"{Fore.CYAN}📥 Loading CSV '{file_name}' into '{schema}.{table_name}'...")
-                self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
-                self.duckdb_conn.execute(f"CREATE TABLE {schema}.{table_name} AS SELECT * FROM read_csv_auto('{file_name}');")
-            else:
-                print(f"{Fore.CYAN}📥 Loading CSV '{file_name}' into '{table_name}'...")
-                self.duckdb_conn.execute(f"CREATE TABLE {table_name} AS SELECT * FROM read_csv_auto('{file_name}');")
-            print(f"{Fore.GREEN}✅ CSV successfully loaded into '{table_name}'.")
+            yield f"read_csv_auto('/dev/fd/{read_fd}')"
+        except Exception:
+            self.duckdb_conn.execute("ROLLBACK;")
+            raise
+        finally:
+            os.close(read_fd)
+            pump.join()
+        if errors:
+            # A corrupt or truncated stream ends early; don't keep the partial load.
+            self.duckdb_conn.execute("ROLLBACK;")
+            raise errors[0]
+        self.duckdb_conn.execute("COMMIT;")
+
+    def load_csv_to_table(self, file_name, table_name, schema=None, compression=None, replace=False, cluster_by=None, transform=None):
+        """Load CSV into DuckDB table, reshaping columns with ``transform`` while reading."""
+        try:
+            label = "stdin" if file_name == self.STDIN_MARKER else file_name
+            create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE"
+            order_by = self.cluster_clause(cluster_by)
+            with self.csv_source(file_name, compression) as source, self.stage("load"):
+                if schema:
+                    self.log(f"{Fore.CYAN}📥 Loading CSV '{label}' into '{schema}.{table_name}'...")
+                    self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+                    self.duckdb_conn.execute(f"{create} {schema}.{table_name} AS {transform_query(transform, source)}{order_by};")
+                else:
+                    self.log(f"{Fore.CYAN}📥 Loading CSV '{label}' into '{table_name}'...")
+                    self.duckdb_conn.execute(f"{create} {table_name} AS {transform_query(transform, source)}{order_by};")
+            self.log(f"{Fore.GREEN}✅ CSV successfully loaded into '{table_name}'.")
+            return self.table_relation(table_name, schema)
         except Exception as e:
-            print(f"{Fore.RED}❌ Error: {e}")
+            self.log(f"{Fore.RED}❌ Error: {e}")
             raise
 
+    def ensure_load_registry(self):
+        """Create the table that remembers which CSV bytes have already been loaded."""
+        return self.ensure_bookkeeping_table(self.LOAD_REGISTRY, """
+            file_path VARCHAR,
+            table_name VARCHAR,
+            file_size BIGINT,
+            file_mtime_ns BIGINT,
+            content_hash VARCHAR,
+            ingested_bytes BIGINT,
+            loaded_at TIMESTAMP DEFAULT current_timestamp,
+            PRIMARY KEY (file_path, table_name)
+        """, legacy_name=self.LEGACY_LOAD_REGISTRY)
+
+    @classmethod
+    def fingerprint_file(cls, file_name, length, start=0, digest=None):
+        """
+        SHA-256 digest of a file's first `length` bytes. Every byte is hashed, so any edit
+        to the ingested part is caught; pass the digest of the first `start` bytes to
+        extend it instead of re-reading them.
+        """
+        digest = digest or hashlib.sha256()
+        with open(file_name, "rb") as f:
+            f.seek(start)
+            remaining = length - start
+            while remaining > 0:
+                block = f.read(min(remaining, cls.FINGERPRINT_BLOCK))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest
+
+    def record_load(self, file_name, table, stat, ingested_bytes, content_hash=None):
+        """Upsert a file's registry entry after a successful load."""
+        content_hash = content_hash or self.fingerprint_file(file_name, ingested_bytes).hexdigest()
+        self.duckdb_conn.execute(
+            f"INSERT OR REPLACE INTO {self.bookkeeping_table(self.LOAD_REGISTRY)} "
+            "(file_path, table_name, file_size, file_mtime_ns, content_hash, ingested_bytes, loaded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, current_timestamp);",
+            [file_name, table, stat.st_size, stat.st_mtime_ns, content_hash, ingested_bytes],
+        )
+
+    def append_csv_tail(self, file_name, table, offset, end, cluster_by=None, transform=None):
+        """Append the rows stored between byte `offset` and `end` of a CSV to an existing table."""
+        columns = self.duckdb_conn.execute(f"PRAGMA table_info('{table}')").fetchall()
+        # ENUM columns are read as text and checked for unknown values before the insert.
+        column_types = ", ".join(
+            f"'{column[1]}': '{'VARCHAR' if column[2].startswith('ENUM(') else column[2]}'" for column in columns
+        )
+        # Only the new tail (plus the header line) is staged, never the whole file.
+        with self.stage("scan"), open(file_name, "rb") as f, tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as staged:
+            staged.write(f.readline())
+            f.seek(offset)
+            staged.write(f.read(end - offset))
+        try:
+            if transform:
+                # The table holds transformed columns, so the raw tail is sniffed and reshaped instead.
+                source = transform_query(transform, f"read_csv('{staged.name}', header = true)")
+            else:
+                source = f"SELECT * FROM read_csv('{staged.name}', header = true, columns = {{{column_types}}})"
+            if any(column[2].startswith("ENUM(") for column in columns):
+                with self.stage("transform"):
+                    EnumConverter(duckdb_conn=self.duckdb_conn, quiet=self.quiet, log_stream=self.log_stream).widen_for_new_values(table, source)
+            with self.stage("insert"):
+                self.duckdb_conn.execute(f"INSERT INTO {table} BY NAME {source}{self.cluster_clause(cluster_by)};")
+        finally:
+            os.remove(staged.name)
+
+    def load_csv_incremental(self, file_name, table_name, schema=None, compression=None, cluster_by=None, transform=None):
+        """
+        Load a CSV only if it changed since the last load, appending just the new tail
+        when the file has grown. Returns 'skipped', 'appended' or 'loaded'.
+        """
+        table = f"{schema}.{table_name}" if schema else table_name
+        if file_name == self.STDIN_MARKER:
+            self.load_csv_to_table(file_name, table_name, schema, compression, replace=True, cluster_by=cluster_by, transform=transform)
+            return "loaded"
+
+        registry = self.ensure_load_registry()
+        file_name = os.path.abspath(file_name)
+        stat = os.stat(file_name)
+        entry = self.duckdb_conn.execute(
+            f"SELECT file_size, file_mtime_ns, content_hash, ingested_bytes FROM {registry} "
+            "WHERE file_path = ? AND table_name = ?;",
+            [file_name, table],
+        ).fetchone()
+
+        if entry:
+            file_size, file_mtime_ns, content_hash, ingested_bytes = entry
+            if stat.st_size == file_size and stat.st_mtime_ns == file_mtime_ns:
+                self.log(f"{Fore.YELLOW}⏭ '{file_name}' is unchanged since the last load; skipping.")
+                return "skipped"
+
+            with self.stage("scan"):
+                prefix = self.fingerprint_file(file_name, ingested_bytes) if stat.st_size >= ingested_bytes else None
+            prefix_unchanged = prefix is not None and prefix.hexdigest() == content_hash
+            if prefix_unchanged and stat.st_size == ingested_bytes:
+                self.log(f"{Fore.YELLOW}⏭ '{file_name}' was touched but its content is unchanged; skipping.")
+                self.record_load(file_name, table, stat, ingested_bytes, content_hash)
+                return "skipped"
+
+            appendable = (
+                prefix_unchanged
+                and not (compression and compression not in ("auto", "none"))
+                and not file_name.endswith((".gz", ".zst"))
+                and self.ends_with_newline(file_name, ingested_bytes)
+            )
+            if appendable:
+                # Stop at the last complete line; a partially written row is picked up next time.
+                end = self.last_line_end(file_name, ingested_bytes, stat.st_size)
+                if end == ingested_bytes:
+                    self.log(f"{Fore.YELLOW}⏭ '{file_name}' has no complete new rows yet; skipping.")
+                    return "skipped"
+                self.log(f"{Fore.CYAN}📥 Appending {end - ingested_bytes} new bytes of '{file_name}' to '{table}'...")
+                # The rows and the new offset commit together, so a crash can't append the tail twice.
+                self.duckdb_conn.execute("BEGIN TRANSACTION;")
+                try:
+                    # The tail is sorted too, so appended row groups stay clustered.
+                    self.append_csv_tail(file_name, table, ingested_bytes, end, cluster_by, transform)
+                    with self.stage("scan"):
+                        content_hash = self.fingerprint_file(file_name, end, ingested_bytes, prefix.copy()).hexdigest()
+                    self.record_load(file_name, table, stat, end, content_hash)
+                    self.duckdb_conn.execute("COMMIT;")
+                except Exception as e:
+                    self.duckdb_conn.execute("ROLLBACK;")
+                    self.log(f"{Fore.RED}❌ Error: {e}")
+                    raise
+                self.log(f"{Fore.GREEN}✅ Appended new rows to '{table}'.")
+                return "appended"
+
+        self.load_csv_to_table(file_name, table_name, schema, compression, replace=True, cluster_by=cluster_by, transform=transform)
+        if os.stat(file_name).st_size == stat.st_size:
+            self.record_load(file_name, table, stat, stat.st_size)
+        else:
+            # The file grew while it was being read, so the ingested offset is unknown;
+            # forget it and let the next run reload in full rather than duplicate rows.
+            self.duckdb_conn.execute(
+                f"DELETE FROM {registry} WHERE file_path = ? AND table_name = ?;", [file_name, table]
+            )
+        return "loaded"
+
+    @staticmethod
+    def ends_with_newline(file_name, length):
+        """Check that the first `length` bytes of a file end on a line boundary."""
+        if length == 0:
+            return False
+        with open(file_name, "rb") as f:
+            f.seek(length - 1)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def last_line_end(file_name, start, end):
+        """Return the offset just past the last newline between `start` and `end`."""
+        with open(file_name, "rb") as f:
+            f.seek(start)
+            chunk = f.read(end - start)
+        newline = chunk.rfind(b"\n")
+        return start + newline + 1 if newline >= 0 else start
+
 
 def start_interactive_mode():
     """Interactive CSV to DuckDB tool."""
@@ -62,8 +328,8 @@ def start_interactive_mode():
         return
 
     # CSV file name
-    file_name = input(f"{Fore.CYAN}📄 Enter CSV file name (with path if needed): ").strip()
-    if not os.path.exists(file_name):
+    file_name = input(f"{Fore.CYAN}📄 Enter CSV file name (with path if needed, '-' for stdin): ").strip()
+    if file_name != CSVToDuckDB.STDIN_MARKER and not os.path.exists(file_name):
         print(f"{Fore.RED}❌ File '{file_name}' does not exist.")
         return
 
@@ -87,6 +353,12 @@ def process_cli_arguments(args):
         return
     
 
+    try:
+        transform = load_transform(args.transform)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}❌ Error: invalid --transform: {e}")
+        return
+
     db_tool = CSVToDuckDB(args.db)
     db_tool.connect_to_duckdb()
 
@@ -95,7 +367,20 @@ def process_cli_arguments(args):
     # Load CSV into DuckDB table
     if args.csv and args.table:
         try:
-            db_tool.load_csv_to_table(args.csv, args.table, args.schema)
+            if args.incremental:
+                outcome = db_tool.load_csv_incremental(args.csv, args.table, args.schema, args.compression, args.cluster_by, transform)
+                if args.enums and outcome == "loaded":
+                    EnumConverter(duckdb_conn=db_tool.duckdb_conn).convert_table(args.table, args.schema)
+            else:
+                # Measured throughput feeds later --dry-run estimates.
+                LoadPlanner(duckdb_conn=db_tool.duckdb_conn, quiet=True).timed_load(
+                    "csv", args.table,
+                    lambda: db_tool.load_csv_to_table(args.csv, args.table, args.schema, args.compression, cluster_by=args.cluster_by, transform=transform),
+                )
+                if args.enums:
+                    EnumConverter(duckdb_conn=db_tool.duckdb_conn).convert_table(args.table, args.schema)
+            if args.maintain:
+                maintain_after_load(db_tool)
         except Exception:
             return
 
@@ -107,9 +392,16 @@ def main():
     
     # Command-line arguments
     parser.add_argument('--db', type=str, help="Path to DuckDB DB file (leave blank for in-memory).")
-    parser.add_argument('--csv', type=str, help="CSV file path to load into DuckDB.")
+    parser.add_argument('--csv', type=str, help="CSV file path to load into DuckDB ('.gz'/'.zst' files and named pipes are streamed; '-' reads stdin).")
+    parser.add_argument('--compression', type=str, choices=['auto', 'gzip', 'zstd', 'none'], default='auto', help="Input compression (default: detected from the file extension; set it when reading compressed stdin or pipes).")
     parser.add_argument('--table', type=str, help="DuckDB table name to create.")
     parser.add_argument('--schema', type=str, help="Schema name (optional).")
+    parser.add_argument('--cluster-by', type=str, help="Comma-separated column(s) to sort rows by while loading, so range filters on them can skip row groups.")
+    parser.add_argument('--transform', type=str, help="Rename/cast/derive/drop columns while loading: a JSON mapping file, or an inline SQL select list.")
+    parser.add_argument('--incremental', action='store_true', help="Skip unchanged files and append only the new tail of files that grew.")
+    parser.add_argument('--enums', action='store_true', help="Convert low-cardinality text columns to ENUM types after loading.")
+    parser.add_argument('--maintain', action='store_true', help="Afterwards, checkpoint the DuckDB file and compact it if dropped data left it fragmented.")
+    parser.add_argument('--dry-run', action='store_true', help="Estimate rows, size and duration from the file size without loading anything.")
     parser.add_argument('--cli', action='store_true', help="Trigger interactive shell mode.")
     
     args = parser.parse_args()
@@ -119,6 +411,20 @@ def main():
         start_interactive_mode()
         return
 
+    if args.dry_run:
+        if not args.csv or args.csv == CSVToDuckDB.STDIN_MARKER:
+            print(f"{Fore.RED}❌ Error: --dry-run needs a CSV file path.")
+            return
+        planner = LoadPlanner(args.db)
+        try:
+            planner.connect_for_dry_run()
+            planner.print_plan(planner.plan("csv", planner.csv_file_stats([args.csv])))
+        except Exception as e:
+            print(f"{Fore.RED}❌ Dry run failed: {e}")
+        finally:
+            planner.close_duckdb_conn()
+        return
+
     # Process CLI arguments
     process_cli_arguments(args)
 
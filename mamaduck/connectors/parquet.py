@@ -0,0 +1,118 @@
+import argparse
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.transforms import load_transform, transform_query
+from mamaduck.database.maintenance import maintain_after_load
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class ParquetToDuckDB(DuckDBManager):
+
+    @staticmethod
+    def build_parquet_query(file_pattern, columns=None, where=None, transform=None):
+        """Build a read_parquet query; projection and filters are pushed down to the scan."""
+        select_list = ", ".join(columns) if columns else "*"
+        query = f"SELECT {select_list} FROM read_parquet('{file_pattern}', union_by_name = true)"
+        if where:
+            query += f" WHERE {where}"
+        if transform:
+            # DuckDB flattens the subquery, so the reshaping still happens in the scan's pass.
+            query = transform_query(transform, f"({query})")
+        return query
+
+    def load_parquet_to_table(self, file_pattern, table_name, schema=None, columns=None, where=None, cluster_by=None, transform=None):
+        """Load one or more Parquet files (glob patterns allowed) into a DuckDB table."""
+        try:
+            table = f"{schema}.{table_name}" if schema else table_name
+            self.log(f"{Fore.CYAN}📥 Loading Parquet '{file_pattern}' into '{table}'...")
+            if schema:
+                self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+            query = self.build_parquet_query(file_pattern, columns, where, transform)
+            with self.stage("load"):
+                self.duckdb_conn.execute(f"CREATE TABLE {table} AS {query}{self.cluster_clause(cluster_by)};")
+            self.log(f"{Fore.GREEN}✅ Parquet successfully loaded into '{table_name}'.")
+            return self.table_relation(table_name, schema)
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Error: {e}")
+            raise
+
+
+def start_interactive_mode():
+    """Interactive Parquet to DuckDB tool."""
+    print(f"{Fore.CYAN}🦆 MamaDuck")
+
+    # Choose database type (in-memory or file)
+    db_choice = input(f"{Fore.CYAN}💡 Use in-memory or persistent file DB? (memory/file): ").strip().lower()
+    if db_choice == 'file':
+        db_path = input(f"{Fore.CYAN}🔑 Enter DuckDB file name (existing/new): ").strip()
+    elif db_choice == 'memory':
+        db_path = None
+    else:
+        print(f"{Fore.RED}❌ Invalid choice. Choose 'memory' or 'file'.")
+        return
+
+    db_tool = ParquetToDuckDB(db_path)
+    db_tool.connect_to_duckdb()
+
+    schema = input(f"{Fore.CYAN}📝 Enter schema name (optional): ").strip() or None
+    file_pattern = input(f"{Fore.CYAN}📄 Enter Parquet file path or glob (e.g. 'data/*.parquet'): ").strip()
+    table_name = input(f"{Fore.CYAN}🔑 Enter DuckDB table name: ").strip()
+    columns = input(f"{Fore.CYAN}📋 Columns to load, comma-separated (blank for all): ").strip()
+    where = input(f"{Fore.CYAN}🔎 Row filter, SQL expression (blank for none): ").strip() or None
+
+    try:
+        db_tool.load_parquet_to_table(file_pattern, table_name, schema, columns.split(",") if columns else None, where)
+    except Exception:
+        return
+
+    print(f"{Fore.GREEN}✅ Migration completed successfully.")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Parquet to DuckDB Tool")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file (leave blank for in-memory).")
+    parser.add_argument('--parquet', type=str, help="Parquet file path or glob pattern to load into DuckDB.")
+    parser.add_argument('--table', type=str, help="DuckDB table name to create.")
+    parser.add_argument('--schema', type=str, help="Schema name (optional).")
+    parser.add_argument('--columns', type=str, help="Comma-separated list of columns to load (default: all columns).")
+    parser.add_argument('--where', type=str, help="SQL filter pushed down to the Parquet scan (optional).")
+    parser.add_argument('--cluster-by', type=str, help="Comma-separated column(s) to sort rows by while loading, so range filters on them can skip row groups.")
+    parser.add_argument('--transform', type=str, help="Rename/cast/derive/drop columns while loading: a JSON mapping file, or an inline SQL select list.")
+    parser.add_argument('--maintain', action='store_true', help="Afterwards, checkpoint the DuckDB file and compact it if dropped data left it fragmented.")
+    parser.add_argument('--cli', action='store_true', help="Trigger interactive shell mode.")
+
+    args = parser.parse_args()
+
+    if args.cli:
+        start_interactive_mode()
+        return
+
+    if not args.db or not args.parquet or not args.table:
+        print(f"{Fore.RED}❌ Error: '--db', '--parquet', and '--table' are required for non-interactive mode.")
+        return
+
+    try:
+        transform = load_transform(args.transform)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}❌ Error: invalid --transform: {e}")
+        return
+
+    db_tool = ParquetToDuckDB(args.db)
+    db_tool.connect_to_duckdb()
+
+    try:
+        columns = args.columns.split(",") if args.columns else None
+        db_tool.load_parquet_to_table(args.parquet, args.table, args.schema, columns, args.where, args.cluster_by, transform)
+        if args.maintain:
+            maintain_after_load(db_tool)
+    except Exception:
+        return
+    finally:
+        db_tool.close_duckdb_conn()
+
+    print(f"{Fore.GREEN}✅ Migration completed successfully.")
+
+if __name__ == "__main__":
+    main()
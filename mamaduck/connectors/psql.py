@@ -4,22 +4,28 @@ import argparse
 import os
 
 from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.planner import LoadPlanner
+from mamaduck.database.enums import EnumConverter
+from mamaduck.database.runs import RunCoordinator
+from mamaduck.database.sampling import SubsetSampler
+from mamaduck.database.maintenance import maintain_after_load
+from mamaduck.database.transforms import load_transform, transform_query
 
 # Initialize colorama for colored CLI output
 init(autoreset=True)
 
 class PostgreSQLToDuckDB(DuckDBManager):
-    def __init__(self, db_path=None, psql_conn_string=None):
-        super().__init__(db_path)
+    def __init__(self, db_path=None, psql_conn_string=None, **kwargs):
+        super().__init__(db_path, **kwargs)
         self.psql_conn_string = psql_conn_string
 
     def attach_postgresql(self):
         try:
             attach_query = f"ATTACH '{self.psql_conn_string}' AS postgres_db (TYPE POSTGRES);"
             self.duckdb_conn.execute(attach_query)
-            print(f"{Fore.GREEN}Attached PostgreSQL database to DuckDB.")
+            self.log(f"{Fore.GREEN}Attached PostgreSQL database to DuckDB.")
         except Exception as e:
-            print(f"{Fore.RED}Failed to attach PostgreSQL database: {e}")
+            self.log(f"{Fore.RED}Failed to attach PostgreSQL database: {e}")
             raise
 
     def list_postgresql_tables(self):
@@ -28,19 +34,23 @@ class PostgreSQLToDuckDB(DuckDBManager):
             tables = self.duckdb_conn.execute(query).fetchall()
             return [row[0] for row in tables]
         except Exception as e:
-            print(f"{Fore.RED}Failed to list tables in PostgreSQL: {e}")
+            self.log(f"{Fore.RED}Failed to list tables in PostgreSQL: {e}")
             raise
 
-    def migrate_table(self, psql_table, duckdb_table, schema=None):
+    def migrate_table(self, psql_table, duckdb_table, schema=None, replace=False, cluster_by=None, transform=None):
+        """Copy a PostgreSQL table, reshaping columns with ``transform`` in the same pass."""
         try:
             table_name = f"{schema}.{duckdb_table}" if schema else duckdb_table
-            self.duckdb_conn.execute(f"""
-                CREATE TABLE {table_name} AS 
-                SELECT * FROM postgres_db.{psql_table};
-            """)
-            print(f"{Fore.GREEN}Table '{psql_table}' successfully migrated to DuckDB as '{duckdb_table}'.")
+            create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE"
+            with self.stage("load"):
+                self.duckdb_conn.execute(f"""
+                    {create} {table_name} AS 
+                    {transform_query(transform, f'postgres_db.{psql_table}')}{self.cluster_clause(cluster_by)};
+                """)
+            self.log(f"{Fore.GREEN}Table '{psql_table}' successfully migrated to DuckDB as '{duckdb_table}'.")
+            return self.table_relation(duckdb_table, schema)
         except Exception as e:
-            print(f"{Fore.RED}Failed to migrate table: {e}")
+            self.log(f"{Fore.RED}Failed to migrate table: {e}")
             raise
 
 def get_postgresql_connection_string():
@@ -140,10 +150,33 @@ def process_cli_arguments():
     parser.add_argument('--psql_conn_string', type=str, help="PostgreSQL connection string.")
     parser.add_argument('--schema', type=str, help="Schema name to use for migration.")
     parser.add_argument('--tables', type=str, nargs='*', help="Comma-separated list of table names to migrate (default: all tables).")
+    parser.add_argument('--cluster-by', type=str, help="Comma-separated column(s) to sort rows by while loading, so range filters on them can skip row groups.")
+    parser.add_argument('--transform', type=str, help="Rename/cast/derive/drop columns while loading: a JSON mapping file, or an inline SQL select list (applied to every table).")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per table or chunk, with exponential backoff (default: 3).")
+    parser.add_argument('--run-id', type=str, help="Name of this run; re-running with the same id skips tables and chunks that already finished.")
+    parser.add_argument('--chunk-column', type=str, help="Integer key column used to load each table in independently retried chunks.")
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="Approximate rows per chunk with --chunk-column (default: 1000000).")
+    parser.add_argument('--sample', type=str, help="Copy a consistent subset instead of full tables: a percentage ('10%%') or row count ('5000') of each root table, plus the rows related through foreign keys.")
+    parser.add_argument('--sample-seed', type=int, help="Seed for --sample, so the same subset can be drawn again.")
+    parser.add_argument('--enums', action='store_true', help="Convert low-cardinality text columns to ENUM types after loading.")
+    parser.add_argument('--maintain', action='store_true', help="Afterwards, checkpoint the DuckDB file and compact it if dropped data left it fragmented.")
+    parser.add_argument('--dry-run', action='store_true', help="Estimate rows, size and duration from PostgreSQL statistics without loading anything.")
     parser.add_argument('--cli', action='store_true', help="Trigger the interactive shell mode.")
     
     return parser.parse_args()
 
+def dry_run(args):
+    """Print a load plan from PostgreSQL catalog statistics and previous runs."""
+    planner = LoadPlanner(args.db)
+    try:
+        planner.connect_for_dry_run()
+        PostgreSQLToDuckDB(psql_conn_string=args.psql_conn_string, duckdb_conn=planner.duckdb_conn, quiet=True).attach_postgresql()
+        planner.print_plan(planner.plan("psql", planner.postgres_table_stats(args.tables)))
+    except Exception as e:
+        print(f"{Fore.RED}❌ Dry run failed: {e}")
+    finally:
+        planner.close_duckdb_conn()
+
 def main():
     args = process_cli_arguments()
 
@@ -151,11 +184,34 @@ def main():
         start_interactive_mode()
         return
 
+    if args.dry_run:
+        if not args.psql_conn_string:
+            print(f"{Fore.RED}❌ Error: '--psql_conn_string' is required.")
+            return
+        dry_run(args)
+        return
+
     # Validate required arguments for non-interactive mode
     if not args.db or not args.psql_conn_string or not args.tables:
         print(f"{Fore.RED}❌ Error: '--db', '--psql_conn_string', and '--tables' arguments are required.")
         return
 
+    try:
+        transform = load_transform(args.transform)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}❌ Error: invalid --transform: {e}")
+        return
+    if args.sample:
+        try:
+            SubsetSampler.parse_sample(args.sample)
+        except ValueError as e:
+            print(f"{Fore.RED}❌ Error: {e}")
+            return
+        if transform:
+            # Foreign keys are matched on source column names, so samples are copied as-is.
+            print(f"{Fore.RED}❌ Error: '--sample' cannot be combined with '--transform'.")
+            return
+
     psql_conn_string = args.psql_conn_string
     db_tool = PostgreSQLToDuckDB(args.db, psql_conn_string)
     db_tool.connect_to_duckdb()
@@ -175,17 +231,59 @@ def main():
     if schema:
         db_tool.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
 
-    if args.tables:
-        for table in args.tables:
-            if table in tables:
-                db_tool.migrate_table(table, table, schema)
-            else:
-                print(f"{Fore.RED}❌ Table '{table}' not found in PostgreSQL.")
-    else:
-        for table in tables:
-            db_tool.migrate_table(table, table, schema)
+    if args.sample:
+        selected = [table for table in args.tables if table in tables]
+        sampler = SubsetSampler(duckdb_conn=db_tool.duckdb_conn, sample=args.sample, seed=args.sample_seed)
+        try:
+            sampler.sample_subset(
+                {table: f"postgres_db.{table}" for table in selected},
+                sampler.postgres_foreign_keys(), schema, sampler.postgres_root_sources(selected),
+                key_lookup=sampler.postgres_lookup,
+            )
+        except Exception as e:
+            print(f"{Fore.RED}❌ Sampling failed: {e}")
+        return
 
-    print(f"{Fore.GREEN}✅ Migration successfully! 🦆")
+    # Measured throughput feeds later --dry-run estimates.
+    history = LoadPlanner(duckdb_conn=db_tool.duckdb_conn, quiet=True)
+    converter = EnumConverter(duckdb_conn=db_tool.duckdb_conn) if args.enums else None
+    # Each table (or chunk) is retried on its own, so one failure never aborts the run.
+    coordinator = RunCoordinator(duckdb_conn=db_tool.duckdb_conn, run_id=args.run_id, retries=args.retries)
+    skipped = 0
+    for table in args.tables or tables:
+        if table not in tables:
+            print(f"{Fore.RED}❌ Table '{table}' not found in PostgreSQL.")
+            continue
+        if args.chunk_column:
+            target = f"{schema}.{table}" if schema else table
+            # A transformed source is a subquery, so --chunk-column names an output column.
+            source = f"({transform_query(transform, f'postgres_db.{table}')})" if transform else f"postgres_db.{table}"
+
+            def finish(table=table, target=target):
+                # Runs once every chunk is in, so the sort and ENUM detection see the whole table.
+                if args.cluster_by:
+                    with db_tool.stage("transform"):
+                        db_tool.duckdb_conn.execute(f"CREATE OR REPLACE TABLE {target} AS SELECT * FROM {target}{db_tool.cluster_clause(args.cluster_by)};")
+                if converter:
+                    converter.convert_table(table, schema)
+            outcomes = coordinator.run_chunked_table(table, source, target, args.chunk_column, args.chunk_rows, finish)
+            skipped += list(outcomes.values()).count("skipped")
+            continue
+
+        # The copy is one CREATE TABLE AS, so a failed attempt leaves no table behind and a
+        # retry never has to replace one. ENUM conversion is its own unit for the same reason.
+        outcome = coordinator.run_unit(table, lambda table=table: history.timed_load("psql", table, lambda: db_tool.migrate_table(
+            table, table, schema, cluster_by=args.cluster_by, transform=transform
+        )))
+        skipped += outcome == "skipped"
+        if converter and outcome != "failed":
+            skipped += coordinator.run_unit(f"{table}:enums", lambda table=table: converter.convert_table(table, schema)) == "skipped"
+
+    summary = coordinator.print_summary(skipped)
+    if args.maintain:
+        maintain_after_load(db_tool)
+    if not summary["failed"]:
+        print(f"{Fore.GREEN}✅ Migration successfully! 🦆")
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,19 @@
 import duckdb
 from colorama import Fore, init
 import argparse
+import glob
+import hashlib
 import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.planner import LoadPlanner
+from mamaduck.database.enums import EnumConverter
+from mamaduck.database.runs import RunCoordinator
+from mamaduck.database.sampling import SubsetSampler
+from mamaduck.database.maintenance import maintain_after_load
+from mamaduck.database.transforms import load_transform, transform_query
 
 # Initialize colorama for colored CLI output
 init(autoreset=True)
@@ -13,9 +24,9 @@ class SQLiteToDuckDB(DuckDBManager):
         try:
             self.duckdb_conn.execute("INSTALL sqlite;")
             self.duckdb_conn.execute("LOAD sqlite;")
-            print(f"{Fore.GREEN}SQLite extension successfully loaded into DuckDB.")
+            self.log(f"{Fore.GREEN}SQLite extension successfully loaded into DuckDB.")
         except Exception as e:
-            print(f"{Fore.RED}Failed to load SQLite extension: {e}")
+            self.log(f"{Fore.RED}Failed to load SQLite extension: {e}")
             raise
 
     def list_sqlite_tables(self, sqlite_path):
@@ -29,22 +40,242 @@ class SQLiteToDuckDB(DuckDBManager):
             tables = self.duckdb_conn.execute(query).fetchall()
             return [row[0] for row in tables]
         except Exception as e:
-            print(f"{Fore.RED}Failed to list tables in SQLite: {e}")
+            self.log(f"{Fore.RED}Failed to list tables in SQLite: {e}")
             raise
 
-    def migrate_table(self, sqlite_path, sqlite_table, duckdb_table, schema=None):
-        """Migrate a table from SQLite to DuckDB."""
+    def migrate_table(self, sqlite_path, sqlite_table, duckdb_table, schema=None, replace=False, cluster_by=None, transform=None):
+        """Migrate a table from SQLite to DuckDB, reshaping columns with ``transform`` in the same pass."""
         try:
             table_name = f"{schema}.{duckdb_table}" if schema else duckdb_table
-            self.duckdb_conn.execute(f"""
-                CREATE TABLE {table_name} AS 
-                SELECT * FROM sqlite_scan('{sqlite_path}', '{sqlite_table}');
-            """)
-            print(f"{Fore.GREEN}Table '{sqlite_table}' successfully migrated to DuckDB as '{duckdb_table}'.")
+            create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE"
+            with self.stage("load"):
+                self.duckdb_conn.execute(f"""
+                    {create} {table_name} AS 
+                    {transform_query(transform, f"sqlite_scan('{sqlite_path}', '{sqlite_table}')")}{self.cluster_clause(cluster_by)};
+                """)
+            self.log(f"{Fore.GREEN}Table '{sqlite_table}' successfully migrated to DuckDB as '{duckdb_table}'.")
+            return self.table_relation(duckdb_table, schema)
         except Exception as e:
-            print(f"{Fore.RED}Failed to migrate table: {e}")
+            self.log(f"{Fore.RED}Failed to migrate table: {e}")
             raise
 
+class SQLiteConsolidator(SQLiteToDuckDB):
+    """
+    Append the same-named tables of many SQLite files into one DuckDB table each,
+    tagging every row with the file it came from.
+
+    File schemas are read with the standard library's sqlite3, in parallel. Files with
+    identical ``sqlite_master`` definitions share one cached schema, so column lookups
+    run once per distinct schema rather than once per file. Same-schema files are
+    loaded ``batch_files`` at a time as one UNION ALL insert per table, on parallel
+    cursors. A column that only some schemas have is added to the target when it first
+    appears. Files already recorded in a target's source column are skipped, so a
+    re-run only picks up new files. A file that cannot be read or inserted is recorded
+    in ``failures`` and the rest are still loaded; each insert is one statement, so a
+    failed file never leaves partial rows behind.
+    """
+
+    SOURCE_COLUMN = "source_file"
+    SQLITE_MAGIC = b"SQLite format 3\x00"
+
+    def __init__(self, db_path=None, workers=4, batch_files=64, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.workers = max(1, workers)
+        self.batch_files = max(1, batch_files)
+        # sqlite_master fingerprint -> {table: [(column, DuckDB type)]}
+        self.schema_cache = {}
+        self.cache_hits = 0
+        # DuckDB target -> (its lower-cased column names, files it already holds)
+        self.targets = {}
+        # file -> error, for files that could not be consolidated
+        self.failures = {}
+
+    @classmethod
+    def expand_sources(cls, pattern):
+        """SQLite files in a directory or matching a glob, sorted; other files are ignored."""
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        files = []
+        for path in sorted(candidates):
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    if f.read(len(cls.SQLITE_MAGIC)) == cls.SQLITE_MAGIC:
+                        files.append(path)
+        return files
+
+    @staticmethod
+    def read_master(sqlite_path):
+        """Fingerprint of a file's table definitions, and ``{table: CREATE statement}``."""
+        conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;"
+            ).fetchall()
+        finally:
+            conn.close()
+        return hashlib.sha256(repr(rows).encode()).hexdigest(), dict(rows)
+
+    @staticmethod
+    def duckdb_type(declared):
+        """DuckDB type for a SQLite declared type, following SQLite's type affinity rules."""
+        declared = (declared or "").upper()
+        if "INT" in declared:
+            return "BIGINT"
+        if any(name in declared for name in ("CHAR", "CLOB", "TEXT")):
+            return "VARCHAR"
+        if "BLOB" in declared:
+            return "BLOB"
+        if any(name in declared for name in ("REAL", "FLOA", "DOUB", "NUM", "DEC")):
+            return "DOUBLE"
+        if declared.startswith(("DATETIME", "TIMESTAMP")):
+            return "TIMESTAMP"
+        if declared.startswith("DATE"):
+            return "DATE"
+        return "VARCHAR"
+
+    @staticmethod
+    def literal(value):
+        return "'" + value.replace("'", "''") + "'"
+
+    def file_schema(self, fingerprint, sqlite_path, tables):
+        """Columns of every table in a file, looked up once per distinct schema."""
+        if fingerprint in self.schema_cache:
+            self.cache_hits += 1
+            return self.schema_cache[fingerprint]
+        conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        try:
+            schema = {
+                table: [(row[1], self.duckdb_type(row[2])) for row in conn.execute(f'PRAGMA table_info("{table}");')]
+                for table in tables
+            }
+        finally:
+            conn.close()
+        self.schema_cache[fingerprint] = schema
+        return schema
+
+    def ensure_target(self, target, columns):
+        """Create ``target`` or add the columns it lacks; returns the files it already holds."""
+        if target not in self.targets:
+            schema, _, table = target.rpartition(".")
+            # DuckDB identifiers are case-insensitive, so columns are compared lower-cased.
+            existing = {row[0].lower() for row in self.duckdb_conn.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_catalog = current_database() AND table_schema = coalesce(nullif(?, ''), current_schema()) AND table_name = ?;",
+                [schema, table],
+            ).fetchall()}
+            if not existing:
+                definitions = ", ".join(f'"{name}" {data_type}' for name, data_type in columns)
+                self.duckdb_conn.execute(f"CREATE TABLE {target} ({definitions}, {self.SOURCE_COLUMN} VARCHAR);")
+                existing = {name.lower() for name, _ in columns} | {self.SOURCE_COLUMN}
+                loaded = set()
+            elif self.SOURCE_COLUMN not in existing:
+                # A table loaded some other way: its rows keep a NULL source and nothing is skipped.
+                self.duckdb_conn.execute(f"ALTER TABLE {target} ADD COLUMN {self.SOURCE_COLUMN} VARCHAR;")
+                existing.add(self.SOURCE_COLUMN)
+                loaded = set()
+            else:
+                loaded = {row[0] for row in self.duckdb_conn.execute(f"SELECT DISTINCT {self.SOURCE_COLUMN} FROM {target};").fetchall()}
+            self.targets[target] = (existing, loaded)
+        existing, loaded = self.targets[target]
+        for name, data_type in columns:
+            if name.lower() not in existing:
+                self.duckdb_conn.execute(f'ALTER TABLE {target} ADD COLUMN "{name}" {data_type};')
+                existing.add(name.lower())
+                self.log(f"{Fore.YELLOW}➕ Added column '{name}' to '{target}' for a newer file schema.")
+        return loaded
+
+    def insert_batch(self, target, table, files):
+        """Append one table from several same-schema files with a single UNION ALL insert."""
+        union = " UNION ALL ".join(
+            f"SELECT *, {self.literal(path)} AS {self.SOURCE_COLUMN} FROM sqlite_scan({self.literal(path)}, {self.literal(table)})"
+            for path in files
+        )
+        cursor = self.duckdb_conn.cursor()
+        try:
+            with self.stage("insert"):
+                return cursor.execute(f"INSERT INTO {target} BY NAME {union};").fetchone()[0]
+        finally:
+            cursor.close()
+
+    def consolidate(self, pattern, tables=None, schema=None):
+        """Append every SQLite file in a directory or glob; returns {table: rows appended}."""
+        started = time.perf_counter()
+        files = self.expand_sources(pattern)
+        if not files:
+            raise FileNotFoundError(f"No SQLite files found for '{pattern}'.")
+        self.log(f"{Fore.CYAN}🔎 Reading the schemas of {len(files):,} SQLite file(s)...")
+        with self.stage("scan"), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.read_master, path): path for path in files}
+            masters = {}
+            for future in as_completed(futures):
+                try:
+                    masters[futures[future]] = future.result()
+                except Exception as e:
+                    self.failures[futures[future]] = str(e)
+
+        # {table: {fingerprint: [files]}}, so every insert reads files of one shape.
+        groups = {}
+        for path in files:
+            if path not in masters:
+                continue
+            fingerprint, definitions = masters[path]
+            try:
+                file_tables = self.file_schema(fingerprint, path, definitions)
+            except Exception as e:
+                self.failures[path] = str(e)
+                continue
+            for table in file_tables:
+                if not tables or table in tables:
+                    groups.setdefault(table, {}).setdefault(fingerprint, []).append(path)
+
+        if schema:
+            self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+        batches, skipped = [], 0
+        for table, by_schema in groups.items():
+            target = f"{schema}.{table}" if schema else table
+            for fingerprint, paths in by_schema.items():
+                try:
+                    loaded = self.ensure_target(target, self.schema_cache[fingerprint][table])
+                except Exception as e:
+                    self.failures.update({path: str(e) for path in paths})
+                    continue
+                pending = [path for path in paths if path not in loaded]
+                skipped += len(paths) - len(pending)
+                batches += [(target, table, pending[i:i + self.batch_files]) for i in range(0, len(pending), self.batch_files)]
+        if skipped:
+            self.log(f"{Fore.YELLOW}⏭ Skipping {skipped:,} table file(s) loaded by an earlier run.")
+
+        rows = {table: 0 for table in groups}
+        retry = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.insert_batch, *batch): batch for batch in batches}
+            for future in as_completed(futures):
+                target, table, paths = futures[future]
+                try:
+                    rows[table] += future.result()
+                except Exception as e:
+                    if len(paths) == 1:
+                        self.failures[paths[0]] = str(e)
+                    else:
+                        retry += [(target, table, [path]) for path in paths]
+        # A failed batch insert wrote nothing; load its files one by one to isolate the bad ones.
+        for target, table, paths in retry:
+            try:
+                rows[table] += self.insert_batch(target, table, paths)
+            except Exception as e:
+                self.failures[paths[0]] = str(e)
+
+        self.log(
+            f"{Fore.GREEN}✅ Consolidated {len(files) - len(self.failures):,} file(s) into {len(rows)} table(s), {sum(rows.values()):,} rows, "
+            f"in {time.perf_counter() - started:.1f}s; {len(self.schema_cache)} distinct schema(s), "
+            f"{self.cache_hits:,} schema cache hit(s)."
+        )
+        for path, error in sorted(self.failures.items()):
+            self.log(f"{Fore.RED}   ❌ {path}: {error}")
+        return rows
+
 def start_interactive_mode():
     """Function to handle interactive shell mode."""
     print(f"{Fore.CYAN}🦆 MamaDuck")
@@ -113,6 +344,22 @@ def start_interactive_mode():
 
 def process_cli_arguments(args):       
     sqlite_path = args.sqlite
+    try:
+        transform = load_transform(args.transform)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}❌ Error: invalid --transform: {e}")
+        return
+    if args.sample:
+        try:
+            SubsetSampler.parse_sample(args.sample)
+        except ValueError as e:
+            print(f"{Fore.RED}❌ Error: {e}")
+            return
+        if transform:
+            # Foreign keys are matched on source column names, so samples are copied as-is.
+            print(f"{Fore.RED}❌ Error: '--sample' cannot be combined with '--transform'.")
+            return
+
     db_tool = SQLiteToDuckDB(args.db)
     db_tool.connect_to_duckdb()
 
@@ -134,26 +381,110 @@ def process_cli_arguments(args):
     if schema:
         db_tool.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
 
-    # Migrate specified tables
-    if args.tables:
-        for table in args.tables:
-            if table in tables:
-                db_tool.migrate_table(sqlite_path, table, table, schema)
-            else:
-                print(f"{Fore.RED}❌ Table '{table}' not found in SQLite database.")
-    else:
-        for table in tables:
-            db_tool.migrate_table(sqlite_path, table, table, schema)
+    if args.sample:
+        selected = [table for table in args.tables if table in tables]
+        sampler = SubsetSampler(duckdb_conn=db_tool.duckdb_conn, sample=args.sample, seed=args.sample_seed)
+        try:
+            sampler.sample_subset(
+                {table: f"sqlite_scan('{sqlite_path}', '{table}')" for table in selected},
+                sampler.sqlite_foreign_keys(sqlite_path), schema,
+            )
+        except Exception as e:
+            print(f"{Fore.RED}❌ Sampling failed: {e}")
+        return
 
-    print(f"{Fore.GREEN}✅ Migration completed successfully.")
+    # Migrate specified tables; measured throughput feeds later --dry-run estimates.
+    history = LoadPlanner(duckdb_conn=db_tool.duckdb_conn, quiet=True)
+    converter = EnumConverter(duckdb_conn=db_tool.duckdb_conn) if args.enums else None
+    # Each table (or chunk) is retried on its own, so one failure never aborts the run.
+    coordinator = RunCoordinator(duckdb_conn=db_tool.duckdb_conn, run_id=args.run_id, retries=args.retries)
+    skipped = 0
+    for table in args.tables or tables:
+        if table not in tables:
+            print(f"{Fore.RED}❌ Table '{table}' not found in SQLite database.")
+            continue
+        if args.chunk_column:
+            target = f"{schema}.{table}" if schema else table
+            source = f"sqlite_scan('{sqlite_path}', '{table}')"
+            if transform:
+                # A transformed source is a subquery, so --chunk-column names an output column.
+                source = f"({transform_query(transform, source)})"
+
+            def finish(table=table, target=target):
+                # Runs once every chunk is in, so the sort and ENUM detection see the whole table.
+                if args.cluster_by:
+                    with db_tool.stage("transform"):
+                        db_tool.duckdb_conn.execute(f"CREATE OR REPLACE TABLE {target} AS SELECT * FROM {target}{db_tool.cluster_clause(args.cluster_by)};")
+                if converter:
+                    converter.convert_table(table, schema)
+            outcomes = coordinator.run_chunked_table(table, source, target, args.chunk_column, args.chunk_rows, finish)
+            skipped += list(outcomes.values()).count("skipped")
+            continue
+
+        # The copy is one CREATE TABLE AS, so a failed attempt leaves no table behind and a
+        # retry never has to replace one. ENUM conversion is its own unit for the same reason.
+        outcome = coordinator.run_unit(table, lambda table=table: history.timed_load("sqlite", table, lambda: db_tool.migrate_table(
+            sqlite_path, table, table, schema, cluster_by=args.cluster_by, transform=transform
+        )))
+        skipped += outcome == "skipped"
+        if converter and outcome != "failed":
+            skipped += coordinator.run_unit(f"{table}:enums", lambda table=table: converter.convert_table(table, schema)) == "skipped"
+
+    summary = coordinator.print_summary(skipped)
+    if args.maintain:
+        maintain_after_load(db_tool)
+    if not summary["failed"]:
+        print(f"{Fore.GREEN}✅ Migration completed successfully.")
+
+def consolidate_cli_arguments(args):
+    if not args.db:
+        print(f"{Fore.RED}❌ Error: --db is required.")
+        return
+    if args.sample or args.chunk_column or args.transform:
+        print(f"{Fore.RED}❌ Error: '--sqlite-files' cannot be combined with --sample, --chunk-column or --transform.")
+        return
+
+    db_tool = SQLiteConsolidator(args.db, workers=args.workers, batch_files=args.batch_files)
+    try:
+        db_tool.connect_to_duckdb()
+        db_tool.load_sqlite_extension()
+        db_tool.consolidate(args.sqlite_files, args.tables, args.schema)
+    except Exception as e:
+        print(f"{Fore.RED}❌ Consolidation failed: {e}")
+        db_tool.close_duckdb_conn()
+        return
+    failures = db_tool.failures
+    if args.maintain:
+        # Hands the file over and closes this tool's connection.
+        maintain_after_load(db_tool)
+    else:
+        db_tool.close_duckdb_conn()
+    if failures:
+        print(f"{Fore.YELLOW}⚠️ {len(failures):,} file(s) could not be consolidated; fix them and re-run to load just those.")
+    else:
+        print(f"{Fore.GREEN}✅ Migration completed successfully.")
 
 def main():
     """Function to process non-interactive CLI arguments."""
     parser = argparse.ArgumentParser(description="SQLite to DuckDB Migration Tool")
     parser.add_argument('--db', type=str, help="Path to the DuckDB database file (leave blank for in-memory).")
     parser.add_argument('--sqlite', type=str, help="Path to the SQLite database file.")
+    parser.add_argument('--sqlite-files', type=str, help="Directory or glob of SQLite files to consolidate: same-named tables are appended into one DuckDB table with a 'source_file' column.")
+    parser.add_argument('--workers', type=int, default=4, help="With --sqlite-files, parallel schema readers and insert cursors (default: 4).")
+    parser.add_argument('--batch-files', type=int, default=64, help="With --sqlite-files, same-schema files appended per insert (default: 64).")
     parser.add_argument('--schema', type=str, help="Schema name to use for migration.")
     parser.add_argument('--tables', type=str, nargs='*', help="Comma-separated list of table names to migrate (default: all tables).")
+    parser.add_argument('--cluster-by', type=str, help="Comma-separated column(s) to sort rows by while loading, so range filters on them can skip row groups.")
+    parser.add_argument('--transform', type=str, help="Rename/cast/derive/drop columns while loading: a JSON mapping file, or an inline SQL select list (applied to every table).")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per table or chunk, with exponential backoff (default: 3).")
+    parser.add_argument('--run-id', type=str, help="Name of this run; re-running with the same id skips tables and chunks that already finished.")
+    parser.add_argument('--chunk-column', type=str, help="Integer key column used to load each table in independently retried chunks.")
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000, help="Approximate rows per chunk with --chunk-column (default: 1000000).")
+    parser.add_argument('--sample', type=str, help="Copy a consistent subset instead of full tables: a percentage ('10%%') or row count ('5000') of each root table, plus the rows related through foreign keys.")
+    parser.add_argument('--sample-seed', type=int, help="Seed for --sample, so the same subset can be drawn again.")
+    parser.add_argument('--enums', action='store_true', help="Convert low-cardinality text columns to ENUM types after loading.")
+    parser.add_argument('--maintain', action='store_true', help="Afterwards, checkpoint the DuckDB file and compact it if dropped data left it fragmented.")
+    parser.add_argument('--dry-run', action='store_true', help="Estimate rows, size and duration from SQLite page statistics without loading anything.")
     parser.add_argument('--cli', action='store_true', help="Trigger the interactive shell mode.")
     
     args = parser.parse_args()
@@ -162,6 +493,24 @@ def main():
         start_interactive_mode()
         return
 
+    if args.dry_run:
+        if not args.sqlite:
+            print(f"{Fore.RED}❌ Error: --sqlite is required.")
+            return
+        planner = LoadPlanner(args.db)
+        try:
+            planner.connect_for_dry_run()
+            planner.print_plan(planner.plan("sqlite", planner.sqlite_table_stats(args.sqlite, args.tables)))
+        except Exception as e:
+            print(f"{Fore.RED}❌ Dry run failed: {e}")
+        finally:
+            planner.close_duckdb_conn()
+        return
+
+    if args.sqlite_files:
+        consolidate_cli_arguments(args)
+        return
+
     # Validate required arguments for non-interactive mode
     if not args.db or not args.sqlite or not args.tables:
         print(f"{Fore.RED}❌ Error: --db, --sqlite, and --tables are required.")
@@ -0,0 +1,199 @@
+import contextlib
+import hashlib
+import os
+import sys
+import time
+
+
+def estimate_row_bytes(row):
+    """Rough in-memory size of one fetched row: payload length for text/binary, 8 bytes otherwise."""
+    size = sys.getsizeof(row)
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            size += len(value)
+        else:
+            size += 8
+    return size
+
+
+def estimate_batch_bytes(rows, sample_size=100):
+    """Estimate a batch's memory footprint from an evenly spaced sample of its rows."""
+    if not rows:
+        return 0
+    step = max(1, len(rows) // sample_size)
+    sample = rows[::step]
+    return int(sum(estimate_row_bytes(row) for row in sample) * len(rows) / len(sample))
+
+
+class AdaptiveBatchSizer:
+    """
+    Pick the next transfer batch size from the latency and memory of previous batches.
+
+    The size grows while larger batches keep improving throughput and stay under the
+    target latency, backs off when a batch is too slow or throughput drops, and never
+    exceeds what fits in the memory ceiling at the observed bytes per row. Batches are
+    also cut by bytes as they are fetched, so a run of wide rows (large BLOB/text
+    payloads) ends a batch early instead of overshooting the ceiling. An optional
+    rows-per-second cap throttles the transfer so production targets are not saturated.
+    """
+
+    GROWTH_FACTOR = 1.5
+    SHRINK_FACTOR = 0.5
+
+    def __init__(self, initial_size=1_000, min_size=100, max_size=100_000, target_seconds=1.0,
+                 memory_limit_bytes=256 * 1024 * 1024, max_rows_per_second=None):
+        self.size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.memory_limit_bytes = memory_limit_bytes
+        self.max_rows_per_second = max_rows_per_second
+        self.bytes_per_row = None
+        self.last_throughput = None
+        self.last_size = None
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def memory_cap(self):
+        """Largest batch that fits in the memory ceiling at the observed row size."""
+        if not self.bytes_per_row:
+            return self.max_size
+        return max(1, int(self.memory_limit_bytes // self.bytes_per_row))
+
+    def record(self, rows, seconds, nbytes=None):
+        """Feed back one batch's row count, duration and (estimated) size; returns the next size."""
+        self.batches += 1
+        self.rows += rows
+        self.seconds += seconds
+        if rows and nbytes:
+            # Exponential moving average so one odd batch doesn't swing the estimate.
+            observed = nbytes / rows
+            self.bytes_per_row = observed if self.bytes_per_row is None else 0.7 * self.bytes_per_row + 0.3 * observed
+
+        throughput = rows / seconds if seconds > 0 else None
+        next_size = self.size
+        if seconds > self.target_seconds * 1.5:
+            next_size = self.size * self.SHRINK_FACTOR
+        elif throughput is not None and self.last_throughput is not None and throughput < self.last_throughput * 0.9:
+            # The last change made things worse; go back to the previous size.
+            next_size = self.last_size
+        elif rows >= self.size and seconds < self.target_seconds:
+            next_size = self.size * self.GROWTH_FACTOR
+
+        self.last_throughput = throughput
+        self.last_size = self.size
+        self.size = int(max(self.min_size, min(next_size, self.max_size, self.memory_cap())))
+        return self.size
+
+    def throttle(self, rows, seconds):
+        """Sleep long enough to keep the transfer under max_rows_per_second; returns the time slept."""
+        if not self.max_rows_per_second:
+            return 0.0
+        delay = rows / self.max_rows_per_second - seconds
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+    def fetch_batch(self, cursor):
+        """
+        Fetch up to `size` rows, stopping once the batch reaches the memory ceiling.
+
+        Rows are pulled in slices sized from the bytes per row seen so far (a single
+        row while nothing is known yet), each slice at most half the remaining budget,
+        so the batch overshoots the ceiling by no more than a row or two. Returns
+        ``(rows, nbytes, exhausted)``.
+        """
+        rows, nbytes = [], 0
+        bytes_per_row = self.bytes_per_row
+        while len(rows) < self.size and nbytes < self.memory_limit_bytes:
+            if bytes_per_row is None:
+                step = 1
+            else:
+                step = int((self.memory_limit_bytes - nbytes) / bytes_per_row / 2)
+            step = max(1, min(step, self.size - len(rows)))
+            chunk = cursor.fetchmany(step)
+            if chunk:
+                chunk_bytes = estimate_batch_bytes(chunk)
+                rows.extend(chunk)
+                nbytes += chunk_bytes
+                bytes_per_row = chunk_bytes / len(chunk)
+            if len(chunk) < step:
+                return rows, nbytes, True
+        return rows, nbytes, False
+
+    def transfer(self, cursor, write_batch, stage=None):
+        """
+        Fetch from `cursor` in adaptive batches and hand each one to `write_batch`; returns rows moved.
+
+        ``stage`` (e.g. ``DuckDBManager.stage``) opens the profiling stage the fetches are timed under.
+        """
+        exhausted = False
+        while not exhausted:
+            with stage("scan") if stage else contextlib.nullcontext():
+                rows, nbytes, exhausted = self.fetch_batch(cursor)
+            if not rows:
+                break
+            started = time.perf_counter()
+            write_batch(rows)
+            elapsed = time.perf_counter() - started
+            self.record(len(rows), elapsed, nbytes)
+            self.throttle(len(rows), elapsed)
+        return self.rows
+
+
+class ValueOffloader:
+    """
+    Move text and binary values larger than ``threshold`` bytes out of transfer batches
+    into side files, leaving a reference in their place.
+
+    Side files are content-addressed (``<sha256>.bin`` under ``directory``), so a payload
+    repeated across rows is written once. The reference is ``PREFIX`` followed by the
+    file name, stored as text or bytes to match the value it replaces.
+    """
+
+    PREFIX = "mamaduck-offload:"
+
+    def __init__(self, directory, threshold):
+        self.directory = directory
+        self.threshold = threshold
+        self.values = 0
+        self.bytes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def offload(self, value):
+        """Write one value to its side file (if not there yet) and return its reference."""
+        payload = value.encode() if isinstance(value, str) else bytes(value)
+        name = hashlib.sha256(payload).hexdigest() + ".bin"
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            partial = f"{path}.{os.getpid()}.tmp"
+            with open(partial, "wb") as f:
+                f.write(payload)
+            os.replace(partial, path)
+        self.values += 1
+        self.bytes += len(payload)
+        reference = self.PREFIX + name
+        return reference if isinstance(value, str) else reference.encode()
+
+    def apply(self, rows):
+        """Return ``rows`` with every oversized text/binary value replaced by its reference."""
+        result = []
+        for row in rows:
+            if any(isinstance(v, (str, bytes, bytearray, memoryview)) and len(v) > self.threshold for v in row):
+                row = tuple(
+                    self.offload(v) if isinstance(v, (str, bytes, bytearray, memoryview)) and len(v) > self.threshold else v
+                    for v in row
+                )
+            result.append(row)
+        return result
+
+    @classmethod
+    def resolve(cls, value, directory):
+        """Return the side-file path a reference points to, or None for an ordinary value."""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value).decode(errors="replace")
+        if isinstance(value, str) and value.startswith(cls.PREFIX):
+            return os.path.join(directory, value[len(cls.PREFIX):])
+        return None
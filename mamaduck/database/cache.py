@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import re
+import time
+from colorama import Fore, init
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class ResultCache:
+    """
+    Cache query results as tables in a DuckDB file attached to the querying connection.
+
+    Entries are keyed by normalized SQL and remember a fingerprint of every source the
+    query can read; a changed fingerprint or an expired TTL turns a lookup into a miss.
+    The cache is bounded in bytes and evicts the least recently used results first.
+    Hit, miss, stale and eviction counts are kept in the cache file.
+    """
+
+    ALIAS = "mamaduck_cache"
+    ENTRIES = f"{ALIAS}.cache_entries"
+    METRICS = f"{ALIAS}.cache_metrics"
+    CACHEABLE = ("select", "with", "from", "values", "table")
+
+    def __init__(self, duckdb_conn, cache_path, ttl_seconds=3600, max_bytes=512 * 1024 * 1024, attach_options=""):
+        self.duckdb_conn = duckdb_conn
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sources = []
+        self.duckdb_conn.execute(f"ATTACH '{cache_path}' AS {self.ALIAS} {attach_options};")
+        self.duckdb_conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.ENTRIES} (
+                cache_key VARCHAR PRIMARY KEY,
+                sql VARCHAR,
+                fingerprint VARCHAR,
+                result_table VARCHAR,
+                rows BIGINT,
+                bytes BIGINT,
+                created_at DOUBLE,
+                last_used_at DOUBLE
+            );
+        """)
+        self.duckdb_conn.execute(f"CREATE TABLE IF NOT EXISTS {self.METRICS} (name VARCHAR PRIMARY KEY, value BIGINT);")
+
+    @staticmethod
+    def normalize_sql(sql):
+        """Collapse whitespace and case outside string literals and quoted identifiers."""
+        parts = re.split(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""", sql.strip().rstrip(";").strip())
+        return "".join(part if index % 2 else re.sub(r"\s+", " ", part).lower() for index, part in enumerate(parts))
+
+    # Source fingerprints: cheap version markers that change whenever the data can have changed.
+
+    def add_psql_source(self, catalog):
+        """PostgreSQL: the cumulative insert/update/delete counters of every user table."""
+        def fingerprint():
+            query = "SELECT sum(n_tup_ins), sum(n_tup_upd), sum(n_tup_del), count(*) FROM pg_stat_user_tables"
+            return list(self.duckdb_conn.execute(f"SELECT * FROM postgres_query('{catalog}', $${query}$$);").fetchone())
+        self.sources.append((f"psql:{catalog}", fingerprint))
+
+    def add_sqlite_source(self, sqlite_path):
+        """
+        SQLite: the file change counter in the database header plus the WAL file's size and
+        mtime. (``PRAGMA data_version`` only changes relative to one open connection.)
+        """
+        def fingerprint():
+            with open(sqlite_path, "rb") as f:
+                f.seek(24)
+                change_counter = int.from_bytes(f.read(4), "big")
+            wal = sqlite_path + "-wal"
+            wal_stat = [os.stat(wal).st_size, os.stat(wal).st_mtime_ns] if os.path.exists(wal) else None
+            return [change_counter, wal_stat]
+        self.sources.append((f"sqlite:{sqlite_path}", fingerprint))
+
+    def add_file_source(self, path):
+        """CSV (or DuckDB) files: size and modification time."""
+        def fingerprint():
+            paths = [path, path + ".wal"]
+            return [[os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths if os.path.exists(p)]
+        self.sources.append((f"file:{path}", fingerprint))
+
+    def fingerprint(self):
+        versions = {name: fingerprint() for name, fingerprint in self.sources}
+        return hashlib.sha256(json.dumps(versions, sort_keys=True, default=str).encode()).hexdigest()
+
+    def bump(self, name, amount=1):
+        self.duckdb_conn.execute(
+            f"INSERT INTO {self.METRICS} VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;",
+            [name, amount],
+        )
+
+    def metrics(self):
+        """Hit/miss/stale/eviction counters plus current entry count and size."""
+        metrics = {name: 0 for name in ("hits", "misses", "stale", "evictions")}
+        metrics.update(dict(self.duckdb_conn.execute(f"SELECT name, value FROM {self.METRICS};").fetchall()))
+        entries, size = self.duckdb_conn.execute(f"SELECT count(*), coalesce(sum(bytes), 0) FROM {self.ENTRIES};").fetchone()
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics.update(entries=entries, bytes=size, hit_rate=metrics["hits"] / lookups if lookups else 0.0)
+        return metrics
+
+    def drop_entry(self, cache_key, result_table):
+        self.duckdb_conn.execute(f"DROP TABLE IF EXISTS {self.ALIAS}.{result_table};")
+        self.duckdb_conn.execute(f"DELETE FROM {self.ENTRIES} WHERE cache_key = ?;", [cache_key])
+
+    def evict(self):
+        """Drop least recently used results until the cache fits in max_bytes."""
+        entries = self.duckdb_conn.execute(
+            f"SELECT cache_key, result_table, bytes FROM {self.ENTRIES} ORDER BY last_used_at;"
+        ).fetchall()
+        total = sum(entry[2] for entry in entries)
+        # The newest entry is last and is kept even when it alone exceeds the bound.
+        for cache_key, result_table, size in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            self.drop_entry(cache_key, result_table)
+            self.bump("evictions")
+            total -= size
+
+    def cached_query(self, sql):
+        """
+        Return ``(query, hit)``: a query reading the cached result of ``sql`` (running and
+        storing it first on a miss), or ``sql`` itself when it cannot be cached.
+        """
+        normalized = self.normalize_sql(sql)
+        if not normalized.startswith(self.CACHEABLE):
+            return sql, False
+
+        cache_key = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+        result_table = f"result_{cache_key}"
+        fingerprint = self.fingerprint()
+        now = time.time()
+        entry = self.duckdb_conn.execute(
+            f"SELECT fingerprint, created_at FROM {self.ENTRIES} WHERE cache_key = ?;", [cache_key]
+        ).fetchone()
+
+        if entry:
+            if entry[0] == fingerprint and (not self.ttl_seconds or now - entry[1] <= self.ttl_seconds):
+                self.duckdb_conn.execute(f"UPDATE {self.ENTRIES} SET last_used_at = ? WHERE cache_key = ?;", [now, cache_key])
+                self.bump("hits")
+                return f"SELECT * FROM {self.ALIAS}.{result_table}", True
+            self.drop_entry(cache_key, result_table)
+            self.bump("stale")
+
+        self.bump("misses")
+        self.duckdb_conn.execute(f"CREATE TABLE {self.ALIAS}.{result_table} AS {sql.strip().rstrip(';')};")
+        rows, size = self.duckdb_conn.execute(
+            f"SELECT count(*), coalesce(sum(strlen(r::VARCHAR)), 0) FROM {self.ALIAS}.{result_table} r;"
+        ).fetchone()
+        self.duckdb_conn.execute(
+            f"INSERT INTO {self.ENTRIES} VALUES (?, ?, ?, ?, ?, ?, ?, ?);",
+            [cache_key, normalized, fingerprint, result_table, rows, size, now, now],
+        )
+        self.evict()
+        return f"SELECT * FROM {self.ALIAS}.{result_table}", False
+
+    def close(self):
+        self.duckdb_conn.execute(f"DETACH {self.ALIAS};")
+
+    def log_metrics(self, log):
+        metrics = self.metrics()
+        log(
+            f"{Fore.CYAN}🗄 Cache: {metrics['hits']} hits, {metrics['misses']} misses "
+            f"({metrics['hit_rate']:.0%} hit rate), {metrics['stale']} stale, {metrics['evictions']} evicted; "
+            f"{metrics['entries']} entries, {metrics['bytes'] / 1024 / 1024:.1f} MB."
+        )
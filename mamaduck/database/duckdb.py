@@ -1,68 +1,195 @@
+import contextlib
 import os
+import sys
+import time
 import duckdb
 from colorama import Fore, Style, init
 
+from mamaduck.database.locking import WriteLock
+
 # Initialize colorama for colored CLI output
 init(autoreset=True)
 
 class DuckDBManager:
     DATABASE_FOLDER = "databases"
+    # Set by `kwak --profile`; every connection opened while it is set gets profiled.
+    profiler = None
+    # Set by `kwak --lock-timeout`; seconds a writer waits for its turn (None: as long as it takes).
+    write_lock_timeout = None
+    LOCK_RETRY_MAX_DELAY = 2.0
+    # mamaduck's own tables (load history, run status, incremental registry) live in
+    # this schema, away from the user's tables, listings and exports.
+    BOOKKEEPING_SCHEMA = "mamaduck"
+
+    def __init__(self, duckdb_path=None, duckdb_conn=None, quiet=False, log_stream=None, read_only=False):
+        """
+        Set up the manager without touching the filesystem.
 
-    def __init__(self, duckdb_path=None):
-        self.duckdb_conn = None
+        An existing DuckDB connection can be injected with ``duckdb_conn``; it is
+        then used as-is and left open by ``close_duckdb_conn``. ``quiet`` silences
+        all output, which is what library callers usually want. ``read_only`` opens
+        a database file without taking the write lock, so any number of readers
+        can share it.
+        """
+        self.duckdb_conn = duckdb_conn
         self.duckdb_path = duckdb_path
-        self.ensure_database_folder()
+        self.owns_connection = duckdb_conn is None
+        self.quiet = quiet
+        self.log_stream = log_stream
+        self.read_only = read_only
+        self.write_lock = None
+
+    def log(self, message):
+        """Print a status message unless the manager is in quiet mode."""
+        if not self.quiet:
+            print(message, file=self.log_stream or sys.stdout)
+
+    def stage(self, name):
+        """Attribute the block to a named stage of the `kwak --profile` report; a no-op when not profiling."""
+        return DuckDBManager.profiler.stage(name) if DuckDBManager.profiler else contextlib.nullcontext()
 
     @staticmethod
     def ensure_database_folder():
-        """Ensure the 'databases' folder exists."""
+        """Ensure the 'databases' folder exists, returning True if it had to be created."""
         if not os.path.exists(DuckDBManager.DATABASE_FOLDER):
             os.makedirs(DuckDBManager.DATABASE_FOLDER)
-            print(f"{Fore.GREEN}Created folder: '{DuckDBManager.DATABASE_FOLDER}'")
+            return True
+        return False
 
     def connect_to_duckdb(self):
         """Connect to either an in-memory or file-based DuckDB database."""
+        if self.duckdb_conn is not None and not self.owns_connection:
+            # Injected connections are already open.
+            return
         try:
             if self.duckdb_path:
+                if self.ensure_database_folder():
+                    self.log(f"{Fore.GREEN}Created folder: '{DuckDBManager.DATABASE_FOLDER}'")
                 full_path = os.path.join(self.DATABASE_FOLDER, self.duckdb_path)
-                self.duckdb_conn = duckdb.connect(database=full_path)
-                print(f"{Fore.GREEN}Connected to DuckDB database file '{full_path}'.")
+                if not self.read_only:
+                    self.acquire_write_lock(full_path)
+                self.duckdb_conn = self.open_database_file(full_path)
+                mode = " (read-only)" if self.read_only else ""
+                self.log(f"{Fore.GREEN}Connected to DuckDB database file '{full_path}'{mode}.")
             else:
                 self.duckdb_conn = duckdb.connect(database=':memory:')
-                print(f"{Fore.GREEN}Created an in-memory DuckDB database.")
+                self.log(f"{Fore.GREEN}Created an in-memory DuckDB database.")
+            if DuckDBManager.profiler:
+                self.duckdb_conn = DuckDBManager.profiler.wrap(self.duckdb_conn)
         except Exception as e:
-            print(f"{Fore.RED}Failed to create DuckDB database: {e}")
+            self.release_write_lock()
+            self.log(f"{Fore.RED}Failed to create DuckDB database: {e}")
             raise
 
+    def acquire_write_lock(self, full_path):
+        """Queue behind other mamaduck writers of the same file and report how long that took."""
+        self.write_lock = WriteLock(full_path, self.write_lock_timeout)
+        holder = self.write_lock.holder()
+        waited = self.write_lock.acquire()
+        if waited >= 0.1:
+            by = f" (held by PID {holder})" if holder else ""
+            self.log(f"{Fore.YELLOW}⏳ Waited {waited:.1f}s in the write queue for '{full_path}'{by}.")
+
+    def release_write_lock(self):
+        if self.write_lock:
+            self.write_lock.release()
+            self.write_lock = None
+
+    def open_database_file(self, full_path):
+        """
+        Open a DuckDB file, retrying with backoff while a process outside the write queue
+        (e.g. a long-running reader) holds DuckDB's own file lock.
+        """
+        started = time.perf_counter()
+        delay = 0.1
+        while True:
+            try:
+                conn = duckdb.connect(database=full_path, read_only=self.read_only)
+                if delay > 0.1:
+                    self.log(f"{Fore.YELLOW}⏳ Waited {time.perf_counter() - started:.1f}s for the file lock on '{full_path}'.")
+                return conn
+            except duckdb.IOException as e:
+                waited = time.perf_counter() - started
+                if "lock" not in str(e).lower() or (self.write_lock_timeout is not None and waited >= self.write_lock_timeout):
+                    raise
+                if delay == 0.1:
+                    self.log(f"{Fore.YELLOW}⏳ '{full_path}' is locked by another process; waiting for it to close...")
+                time.sleep(delay)
+                delay = min(delay * 2, self.LOCK_RETRY_MAX_DELAY)
+
+    def attach_options(self, attach_type):
+        """Options for ATTACHing a write target; read-only connections attach read-only by default."""
+        if self.read_only and self.duckdb_path:
+            return f"(TYPE {attach_type}, READ_WRITE)"
+        return f"(TYPE {attach_type})"
+
+    def bookkeeping_table(self, name):
+        """
+        Qualified name of one of mamaduck's own tables. The catalog is spelled out
+        because a file named 'mamaduck.duckdb' would make 'mamaduck.<name>' ambiguous.
+        """
+        catalog = self.duckdb_conn.execute("SELECT current_database();").fetchone()[0]
+        return f'"{catalog}".{self.BOOKKEEPING_SCHEMA}.{name}'
+
+    def find_bookkeeping_table(self, name, legacy_name=None):
+        """Qualified name of an existing bookkeeping table (or its pre-schema legacy copy), else None."""
+        for schema, table in ((self.BOOKKEEPING_SCHEMA, name), ("main", legacy_name)):
+            if table and self.duckdb_conn.execute(
+                "SELECT count(*) FROM duckdb_tables() WHERE database_name = current_database() AND schema_name = ? AND table_name = ?;",
+                [schema, table],
+            ).fetchone()[0]:
+                return self.bookkeeping_table(name) if schema == self.BOOKKEEPING_SCHEMA else f"main.{table}"
+        return None
+
+    def ensure_bookkeeping_table(self, name, definition, legacy_name=None):
+        """
+        Create a bookkeeping table if it is missing and return its qualified name. Files
+        written before the bookkeeping schema existed hold it as ``main.<legacy_name>``;
+        its rows are moved over and the old table is dropped.
+        """
+        table = self.bookkeeping_table(name)
+        schema = table.rsplit(".", 1)[0]
+        self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+        self.duckdb_conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition});")
+        if legacy_name and self.find_bookkeeping_table(None, legacy_name):
+            self.duckdb_conn.execute(f"INSERT INTO {table} BY NAME SELECT * FROM main.{legacy_name};")
+            self.duckdb_conn.execute(f"DROP TABLE main.{legacy_name};")
+        return table
+
     def get_schema_list(self):
-        schemas = self.duckdb_conn.execute("SELECT schema_name FROM information_schema.schemata;").fetchall()
+        schemas = self.duckdb_conn.execute(
+            "SELECT schema_name FROM information_schema.schemata WHERE schema_name <> ?;", [self.BOOKKEEPING_SCHEMA]
+        ).fetchall()
         schemas = set([s[0] for s in schemas])
         return list(schemas)
     
 
     def get_table_list(self, schema=None):
-        """Get the list of tables in the specified schema or all schemas."""
+        """Get the list of tables in the specified schema or all schemas (bookkeeping tables excluded)."""
         try:
             query = "SELECT table_schema, table_name FROM information_schema.tables"
             if schema:
                 query += f" WHERE table_schema = '{schema}'"
+            else:
+                query += f" WHERE table_schema <> '{self.BOOKKEEPING_SCHEMA}'"
             query += ";"
 
             tables = self.duckdb_conn.execute(query).fetchall()
             table_list = [f"{row[0]}.{row[1]}" if schema is None else row[1] for row in tables]
             
-            print(f"{Fore.GREEN}✅ Found {len(table_list)} tables in schema '{schema or 'all'}'.")
+            self.log(f"{Fore.GREEN}✅ Found {len(table_list)} tables in schema '{schema or 'all'}'.")
             return table_list
         except Exception as e:
-            print(f"{Fore.RED}❌ Error fetching tables: {e}")
+            self.log(f"{Fore.RED}❌ Error fetching tables: {e}")
             raise
 
 
     def close_duckdb_conn(self):
-        """Close DuckDB connection."""
-        if self.duckdb_conn:
+        """Close DuckDB connection (injected connections are left open for their owner)."""
+        if self.duckdb_conn and self.owns_connection:
             self.duckdb_conn.close()
-            print(f"{Fore.GREEN}✅ DuckDB connection closed.")
+            self.release_write_lock()
+            self.log(f"{Fore.GREEN}✅ DuckDB connection closed.")
 
     @staticmethod
     def list_databases():
@@ -83,13 +210,36 @@ class DuckDBManager:
         """Query DuckDB table."""
         try:
             table = f"{schema}.{table_name}" if schema else table_name
-            print(f"{Fore.CYAN}🔍 Fetching data from '{table}'...")
+            self.log(f"{Fore.CYAN}🔍 Fetching data from '{table}'...")
             result = self.duckdb_conn.execute(f"SELECT * FROM {table} LIMIT 10;").fetchall()
             columns = [desc[0] for desc in self.duckdb_conn.execute(f"PRAGMA table_info('{table}');").fetchall()]
-            print(f"{Fore.GREEN}✅ Showing 10 records from '{table}':")
-            print(f"{Fore.CYAN}{columns}")
+            self.log(f"{Fore.GREEN}✅ Showing 10 records from '{table}':")
+            self.log(f"{Fore.CYAN}{columns}")
             for row in result:
-                print(f"{Fore.YELLOW}{row}")
+                self.log(f"{Fore.YELLOW}{row}")
         except Exception as e:
-            print(f"{Fore.RED}❌ Error: {e}")
+            self.log(f"{Fore.RED}❌ Error: {e}")
             raise
+
+    @staticmethod
+    def cluster_clause(cluster_by):
+        """Return an ORDER BY clause for the given column(s), or '' when not clustering."""
+        # Loading rows sorted on the columns queries filter by keeps each row group's
+        # min/max zone map narrow, so range scans can skip most row groups. DuckDB's
+        # sort spills to its temp directory when the data does not fit in memory.
+        if not cluster_by:
+            return ""
+        columns = cluster_by.split(",") if isinstance(cluster_by, str) else cluster_by
+        return " ORDER BY " + ", ".join(column.strip() for column in columns)
+
+    def table_relation(self, table_name, schema=None):
+        """Return a lazy DuckDB relation for a table, e.g. for ``.df()``, ``.pl()`` or ``.arrow()``."""
+        table = f"{schema}.{table_name}" if schema else table_name
+        return self.duckdb_conn.table(table)
+
+    def fetch_record_batches(self, query, batch_size=1_000_000):
+        """Run a query and return a ``pyarrow.RecordBatchReader`` over its result (requires pyarrow)."""
+        result = self.duckdb_conn.execute(query)
+        # DuckDB 1.4 renamed fetch_record_batch to to_arrow_reader.
+        reader = getattr(result, "to_arrow_reader", None) or result.fetch_record_batch
+        return reader(batch_size)
@@ -0,0 +1,95 @@
+import re
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.transforms import quote
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class EnumConverter(DuckDBManager):
+    """
+    Turn low-cardinality VARCHAR columns of a loaded table into DuckDB ENUM types.
+
+    ENUM values are stored as 1-byte codes instead of strings, which shrinks the
+    table in memory and makes joins and group-bys on those columns much cheaper.
+    """
+
+    SAMPLE_ROWS = 100_000
+    # 255 values keep the codes at one byte.
+    MAX_VALUES = 255
+    # A column qualifies when its distinct values are at most this share of its sampled rows.
+    MAX_DISTINCT_RATIO = 0.1
+
+    def table_columns(self, table_name, schema=None):
+        return self.duckdb_conn.execute(
+            "SELECT column_name, data_type FROM duckdb_columns() "
+            "WHERE table_name = ? AND schema_name = coalesce(?, current_schema()) ORDER BY column_index;",
+            [table_name, schema],
+        ).fetchall()
+
+    def enum_candidates(self, table_name, schema=None, sample_rows=None):
+        """Detect low-cardinality VARCHAR columns from a reservoir sample of the table."""
+        table = f"{schema}.{table_name}" if schema else table_name
+        columns = [name for name, data_type in self.table_columns(table_name, schema) if data_type == "VARCHAR"]
+        if not columns:
+            return []
+        aggregates = ", ".join(f'count("{c}"), approx_count_distinct("{c}")' for c in columns)
+        sample = self.duckdb_conn.execute(
+            f"SELECT {aggregates} FROM (SELECT * FROM {table} USING SAMPLE {int(sample_rows or self.SAMPLE_ROWS)} ROWS);"
+        ).fetchone()
+        candidates = []
+        for index, column in enumerate(columns):
+            non_null, distinct = sample[2 * index], sample[2 * index + 1]
+            if non_null and distinct <= self.MAX_VALUES and distinct <= non_null * self.MAX_DISTINCT_RATIO:
+                candidates.append(column)
+        return candidates
+
+    def convert_table(self, table_name, schema=None, sample_rows=None):
+        """Convert every qualifying column to an ENUM; returns {column: estimated bytes saved}."""
+        table = f"{schema}.{table_name}" if schema else table_name
+        converted = {}
+        with self.stage("transform"):
+            for column in self.enum_candidates(table_name, schema, sample_rows):
+                values, rows, string_bytes = self.duckdb_conn.execute(
+                    f'SELECT count(DISTINCT "{column}"), count(*), coalesce(sum(strlen("{column}")), 0) FROM {table};'
+                ).fetchone()
+                if values > self.MAX_VALUES:
+                    # The sample missed values; the full column is not low-cardinality after all.
+                    continue
+                # Column names may hold spaces or punctuation (CSV headers), so the type name is sanitized and quoted.
+                enum_type = quote(re.sub(r"\W", "_", f"{table_name}_{column}_enum"))
+                enum_type = f"{schema}.{enum_type}" if schema else enum_type
+                self.duckdb_conn.execute(
+                    f'CREATE OR REPLACE TYPE {enum_type} AS ENUM '
+                    f'(SELECT DISTINCT "{column}" FROM {table} WHERE "{column}" IS NOT NULL ORDER BY 1);'
+                )
+                self.duckdb_conn.execute(f'ALTER TABLE {table} ALTER "{column}" TYPE {enum_type};')
+                converted[column] = max(0, string_bytes - rows)
+                self.log(f"{Fore.GREEN}🗜 '{table}.{column}' is now an ENUM of {values} values.")
+
+        if converted:
+            saved = sum(converted.values())
+            self.log(f"{Fore.GREEN}✅ Dictionary-encoded {len(converted)} column(s) of '{table}', ~{saved / 1024 / 1024:.1f} MB of strings saved.")
+        return converted
+
+    def widen_for_new_values(self, table, source_sql):
+        """
+        Before rows from ``source_sql`` are appended to ``table``, turn ENUM columns back
+        into VARCHAR if the new rows bring values the ENUM does not know.
+        """
+        table_name = table.split(".")[-1]
+        schema = table.split(".")[0] if "." in table else None
+        widened = []
+        for column, data_type in self.table_columns(table_name, schema):
+            if not data_type.startswith("ENUM("):
+                continue
+            unknown = self.duckdb_conn.execute(
+                f'SELECT count(*) FROM ({source_sql}) '
+                f'WHERE "{column}" IS NOT NULL AND TRY_CAST("{column}" AS {data_type}) IS NULL;'
+            ).fetchone()[0]
+            if unknown:
+                self.duckdb_conn.execute(f'ALTER TABLE {table} ALTER "{column}" TYPE VARCHAR;')
+                widened.append(column)
+                self.log(f"{Fore.YELLOW}⚠️ New values in '{table}.{column}'; converted it back to VARCHAR.")
+        return widened
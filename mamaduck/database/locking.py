@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writers rely on DuckDB's own lock.
+    fcntl = None
+
+
+class WriteLock:
+    """
+    Queue writers to one DuckDB file behind an exclusive lock on a sidecar lock file.
+
+    DuckDB admits a single writer process per file and fails every other one with a
+    lock error. Jobs that take this lock first wait their turn instead, and the time
+    spent waiting is measured. Read-only connections never take it. The lock is
+    re-entrant within a process, so nested tools on the same file do not deadlock.
+    """
+
+    POLL_SECONDS = 0.05
+    # Lock file path -> [open handle, holders] for locks this process already owns.
+    held = {}
+    held_guard = threading.Lock()
+
+    def __init__(self, db_file, timeout=None):
+        directory, name = os.path.split(db_file)
+        self.db_file = db_file
+        self.path = os.path.join(directory, f".{name}.write.lock")
+        self.timeout = timeout
+        self.acquired = False
+        self.wait_seconds = 0.0
+
+    def holder(self):
+        """PID recorded by the process currently holding (or last holding) the lock."""
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    def acquire(self):
+        """Block until this process is the file's only writer; returns the seconds waited."""
+        started = time.perf_counter()
+        if fcntl is None or self.acquired:
+            return 0.0
+        with self.held_guard:
+            if self.path in self.held:
+                self.held[self.path][1] += 1
+                self.acquired = True
+                return 0.0
+        handle = open(self.path, "a+")
+        try:
+            if self.timeout is None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.perf_counter() - started >= self.timeout:
+                            raise TimeoutError(
+                                f"Timed out after {self.timeout:g}s waiting for the write lock on '{self.db_file}' "
+                                f"(held by PID {self.holder()})."
+                            )
+                        time.sleep(self.POLL_SECONDS)
+        except BaseException:
+            handle.close()
+            raise
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        with self.held_guard:
+            self.held[self.path] = [handle, 1]
+        self.acquired = True
+        self.wait_seconds = time.perf_counter() - started
+        return self.wait_seconds
+
+    def release(self):
+        if not self.acquired:
+            return
+        self.acquired = False
+        with self.held_guard:
+            entry = self.held[self.path]
+            entry[1] -= 1
+            if entry[1]:
+                return
+            del self.held[self.path]
+        fcntl.flock(entry[0], fcntl.LOCK_UN)
+        entry[0].close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,167 @@
+import argparse
+import os
+import sqlite3
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.locking import WriteLock
+from mamaduck.database.planner import LoadPlanner
+from mamaduck.database.transforms import quote
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class DuckDBMaintenance(DuckDBManager):
+    """
+    Reclaim space in a DuckDB file and refresh planner statistics on sink targets.
+
+    Dropped and reloaded tables leave free blocks behind that DuckDB reuses but never
+    returns to the file system. When free blocks exceed a threshold the database is
+    copied into a fresh file (COPY FROM DATABASE) that replaces the original.
+    """
+
+    DEFAULT_THRESHOLD = 0.25
+
+    def file_bytes(self):
+        """Size of the database file plus its write-ahead log."""
+        full_path = os.path.join(self.DATABASE_FOLDER, self.duckdb_path)
+        return sum(os.path.getsize(p) for p in (full_path, full_path + ".wal") if os.path.exists(p))
+
+    def checkpoint(self):
+        """Flush the WAL into the database file."""
+        self.duckdb_conn.execute("FORCE CHECKPOINT;")
+        self.log(f"{Fore.GREEN}✅ Checkpointed '{self.duckdb_path}'.")
+
+    def fragmentation(self):
+        """Share of the file's blocks that are free, from ``PRAGMA database_size``."""
+        total_blocks, free_blocks = self.duckdb_conn.execute(
+            "SELECT total_blocks, free_blocks FROM pragma_database_size() WHERE database_name = current_database();"
+        ).fetchone()
+        return free_blocks / total_blocks if total_blocks else 0.0
+
+    def compact(self):
+        """Rewrite the database into a fresh file and swap it in; returns bytes reclaimed."""
+        full_path = os.path.join(self.DATABASE_FOLDER, self.duckdb_path)
+        directory, name = os.path.split(full_path)
+        compacted = os.path.join(directory, f".{os.path.splitext(name)[0]}.compact-{os.getpid()}.duckdb")
+        before = self.file_bytes()
+        database = self.duckdb_conn.execute("SELECT current_database();").fetchone()[0]
+        self.log(f"{Fore.CYAN}🗜 Compacting '{full_path}'...")
+        try:
+            self.duckdb_conn.execute(f"ATTACH '{compacted}' AS mamaduck_compacted;")
+            # The catalog is named after the file, which may hold '-' or spaces.
+            self.duckdb_conn.execute(f"COPY FROM DATABASE {quote(database)} TO mamaduck_compacted;")
+            self.duckdb_conn.execute("DETACH mamaduck_compacted;")
+            # Keep this job's place in the write queue while the file is swapped.
+            with WriteLock(full_path, self.write_lock_timeout):
+                self.close_duckdb_conn()
+                os.replace(compacted, full_path)
+                if os.path.exists(full_path + ".wal"):
+                    os.remove(full_path + ".wal")
+                self.connect_to_duckdb()
+        finally:
+            if os.path.exists(compacted):
+                os.remove(compacted)
+        reclaimed = before - self.file_bytes()
+        self.log(f"{Fore.GREEN}✅ Compacted '{full_path}', {LoadPlanner.format_bytes(max(0, reclaimed))} reclaimed.")
+        return reclaimed
+
+    def maintain(self, threshold=DEFAULT_THRESHOLD, force=False):
+        """Checkpoint, then compact when free blocks exceed ``threshold``; returns bytes reclaimed."""
+        if not self.duckdb_path:
+            self.log(f"{Fore.YELLOW}⏭ In-memory database; nothing to maintain.")
+            return 0
+        before = self.file_bytes()
+        self.checkpoint()
+        fragmentation = self.fragmentation()
+        self.log(f"{Fore.CYAN}📊 {fragmentation:.0%} of '{self.duckdb_path}' is free blocks (threshold {threshold:.0%}).")
+        if (force or fragmentation > threshold) and not self.owns_connection:
+            self.log(f"{Fore.YELLOW}⏭ Not compacting through a borrowed connection; run 'kwak maintain' instead.")
+        elif force or fragmentation > threshold:
+            self.compact()
+        reclaimed = before - self.file_bytes()
+        self.log(f"{Fore.GREEN}✅ Maintenance done, {LoadPlanner.format_bytes(max(0, reclaimed))} reclaimed.")
+        return reclaimed
+
+    def analyze_postgres(self, alias, tables):
+        """Refresh PostgreSQL planner statistics for tables written through the attached ``alias``."""
+        for table in tables:
+            self.duckdb_conn.execute(f"CALL postgres_execute('{alias}', 'ANALYZE \"{table}\"');")
+        self.log(f"{Fore.GREEN}✅ Analyzed {len(tables)} PostgreSQL table(s).")
+
+    @staticmethod
+    def analyze_sqlite(sqlite_path, vacuum=True, log=print):
+        """ANALYZE (and VACUUM) a SQLite file that is no longer attached; returns bytes reclaimed."""
+        before = os.path.getsize(sqlite_path)
+        conn = sqlite3.connect(sqlite_path)
+        try:
+            conn.execute("ANALYZE;")
+            if vacuum:
+                conn.execute("VACUUM;")
+        finally:
+            conn.close()
+        reclaimed = before - os.path.getsize(sqlite_path)
+        log(f"{Fore.GREEN}✅ Analyzed{' and vacuumed' if vacuum else ''} '{sqlite_path}', {LoadPlanner.format_bytes(max(0, reclaimed))} reclaimed.")
+        return reclaimed
+
+
+def maintain_after_load(db_tool, threshold=DuckDBMaintenance.DEFAULT_THRESHOLD):
+    """Post-load hook: checkpoint (and compact if needed) the file a loader just wrote."""
+    if not db_tool.duckdb_path:
+        return 0
+    maintenance = DuckDBMaintenance(db_tool.duckdb_path, quiet=db_tool.quiet, log_stream=db_tool.log_stream)
+    # Hand the file over without giving another queued writer a turn in between.
+    with WriteLock(os.path.join(DuckDBManager.DATABASE_FOLDER, db_tool.duckdb_path), DuckDBManager.write_lock_timeout):
+        db_tool.close_duckdb_conn()
+        maintenance.connect_to_duckdb()
+        try:
+            return maintenance.maintain(threshold)
+        finally:
+            maintenance.close_duckdb_conn()
+
+def maintain_main():
+    """Main entry point for database maintenance."""
+    parser = argparse.ArgumentParser(description="Checkpoint and compact a DuckDB file, and ANALYZE/VACUUM sink targets.")
+    parser.add_argument('--db', type=str, help="DuckDB DB file to checkpoint and, when fragmented, compact.")
+    parser.add_argument('--threshold', type=float, default=DuckDBMaintenance.DEFAULT_THRESHOLD, help="Compact when this share of the file's blocks is free (default: 0.25).")
+    parser.add_argument('--force-compact', action='store_true', help="Compact regardless of fragmentation.")
+    parser.add_argument('--sqlite', type=str, action='append', default=[], help="SQLite target to ANALYZE and VACUUM (repeatable).")
+    parser.add_argument('--psql_conn_string', type=str, help="PostgreSQL target to ANALYZE.")
+    parser.add_argument('--tables', type=str, nargs='*', help="PostgreSQL tables to ANALYZE (default: all tables in 'public').")
+    args = parser.parse_args()
+
+    if not (args.db or args.sqlite or args.psql_conn_string):
+        print(f"{Fore.RED}❌ Error: '--db', '--sqlite' or '--psql_conn_string' is required.")
+        return
+
+    reclaimed = 0
+    if args.db:
+        db_tool = DuckDBMaintenance(args.db)
+        try:
+            db_tool.connect_to_duckdb()
+            reclaimed += db_tool.maintain(args.threshold, args.force_compact)
+        except Exception as e:
+            print(f"{Fore.RED}❌ Maintenance failed: {e}")
+            return
+        finally:
+            db_tool.close_duckdb_conn()
+
+    for sqlite_path in args.sqlite:
+        reclaimed += DuckDBMaintenance.analyze_sqlite(sqlite_path)
+
+    if args.psql_conn_string:
+        db_tool = DuckDBMaintenance()
+        try:
+            db_tool.connect_to_duckdb()
+            db_tool.duckdb_conn.execute(f"ATTACH '{args.psql_conn_string}' AS postgres_target (TYPE POSTGRES);")
+            tables = args.tables or [row[0] for row in db_tool.duckdb_conn.execute(
+                "SELECT table_name FROM information_schema.tables WHERE table_catalog = 'postgres_target' AND table_schema = 'public';"
+            ).fetchall()]
+            db_tool.analyze_postgres("postgres_target", tables)
+        except Exception as e:
+            print(f"{Fore.RED}❌ PostgreSQL ANALYZE failed: {e}")
+            return
+        finally:
+            db_tool.close_duckdb_conn()
+
+    print(f"{Fore.GREEN}✅ Total reclaimed: {LoadPlanner.format_bytes(max(0, reclaimed))}.")
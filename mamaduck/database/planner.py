@@ -0,0 +1,240 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class LoadPlanner(DuckDBManager):
+    """
+    Estimate rows, bytes, DuckDB disk footprint and duration of a load from cheap
+    source statistics and the throughput measured on previous runs.
+    """
+
+    HISTORY_TABLE = "load_history"
+    LEGACY_HISTORY_TABLE = "mamaduck_load_history"
+    # Used until a source type has load history: rough rows/s on a laptop-class machine.
+    DEFAULT_ROWS_PER_SECOND = {"psql": 200_000, "sqlite": 500_000, "csv": 1_000_000}
+    # DuckDB's columnar compression usually lands well below the source size.
+    FOOTPRINT_RATIO = {"psql": 0.3, "sqlite": 0.4, "csv": 0.3}
+    # Compressed CSVs are sized as if they expanded this much.
+    COMPRESSED_CSV_EXPANSION = 4
+    CSV_SAMPLE_BYTES = 1 << 20
+    MAX_PSQL_PARALLELISM = 8
+
+    def connect_for_dry_run(self):
+        """Open the target read-only to read its load history; a missing file is not created."""
+        if self.duckdb_path and not os.path.exists(os.path.join(self.DATABASE_FOLDER, self.duckdb_path)):
+            self.duckdb_path = None
+        self.read_only = True
+        self.connect_to_duckdb()
+
+    def ensure_history_table(self):
+        return self.ensure_bookkeeping_table(self.HISTORY_TABLE, """
+            source_type VARCHAR,
+            table_name VARCHAR,
+            rows BIGINT,
+            seconds DOUBLE,
+            loaded_at TIMESTAMP DEFAULT current_timestamp
+        """, legacy_name=self.LEGACY_HISTORY_TABLE)
+
+    def record_run(self, source_type, table_name, rows, seconds):
+        """Remember how long a load took so later plans use measured throughput."""
+        history = self.ensure_history_table()
+        self.duckdb_conn.execute(
+            f"INSERT INTO {history} (source_type, table_name, rows, seconds) VALUES (?, ?, ?, ?);",
+            [source_type, table_name, rows, seconds],
+        )
+
+    def timed_load(self, source_type, table_name, load):
+        """Run ``load()`` (which returns the loaded relation) and record its throughput."""
+        started = time.perf_counter()
+        relation = load()
+        seconds = time.perf_counter() - started
+        rows = relation.aggregate("count(*)").fetchone()[0]
+        self.record_run(source_type, table_name, rows, seconds)
+        return relation
+
+    def rows_per_second(self, source_type, recent=20):
+        """Throughput of the most recent runs of this source type, or the built-in default."""
+        # Read-only in dry runs, so look the table up instead of creating or migrating it.
+        history = self.find_bookkeeping_table(self.HISTORY_TABLE, self.LEGACY_HISTORY_TABLE)
+        if history:
+            rows, seconds = self.duckdb_conn.execute(f"""
+                SELECT sum(rows), sum(seconds) FROM (
+                    SELECT rows, seconds FROM {history}
+                    WHERE source_type = ? AND seconds > 0
+                    ORDER BY loaded_at DESC LIMIT {int(recent)}
+                );
+            """, [source_type]).fetchone()
+            if rows and seconds:
+                return rows / seconds, True
+        return self.DEFAULT_ROWS_PER_SECOND[source_type], False
+
+    def postgres_table_stats(self, tables=None):
+        """Planner statistics from an attached PostgreSQL catalog: {table: (rows, bytes)}."""
+        query = """
+            SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid)
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+        """
+        rows = self.duckdb_conn.execute(f"SELECT * FROM postgres_query('postgres_db', $${query}$$);").fetchall()
+        # reltuples is -1 for tables that were never vacuumed or analyzed.
+        stats = {name: (reltuples if reltuples >= 0 else None, size) for name, reltuples, size in rows}
+        return {table: stats[table] for table in (tables or stats) if table in stats}
+
+    @staticmethod
+    def sqlite_table_stats(sqlite_path, tables=None):
+        """Page-level sizes and cheap row counts of SQLite tables: {table: (rows, bytes)}."""
+        conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        try:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';"
+            )]
+            try:
+                sizes = dict(conn.execute("SELECT name, sum(pgsize) FROM dbstat GROUP BY name;").fetchall())
+            except sqlite3.OperationalError:
+                # SQLite built without dbstat: split the file evenly instead.
+                page_count = conn.execute("PRAGMA page_count;").fetchone()[0]
+                page_size = conn.execute("PRAGMA page_size;").fetchone()[0]
+                sizes = {name: page_count * page_size // max(1, len(names)) for name in names}
+
+            analyzed = {}
+            try:
+                for name, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1 WHERE idx IS NULL;"):
+                    analyzed[name] = int(stat.split()[0])
+            except sqlite3.OperationalError:
+                pass
+
+            stats = {}
+            for name in tables or names:
+                if name not in names:
+                    continue
+                rows = analyzed.get(name)
+                if rows is None:
+                    try:
+                        # max(rowid) is a single b-tree seek; exact unless rows were deleted.
+                        rows = conn.execute(f'SELECT max(rowid) FROM "{name}";').fetchone()[0] or 0
+                    except sqlite3.OperationalError:
+                        rows = None  # WITHOUT ROWID table
+                stats[name] = (rows, sizes.get(name, 0))
+            return stats
+        finally:
+            conn.close()
+
+    @classmethod
+    def csv_file_stats(cls, paths):
+        """File sizes and row estimates (from a sampled line length) of CSV files: {path: (rows, bytes)}."""
+        stats = {}
+        for path in paths:
+            size = os.path.getsize(path)
+            compressed = path.endswith((".gz", ".zst"))
+            if path.endswith(".gz"):
+                opener = gzip.open
+            elif compressed:
+                opener = None  # No stdlib zstd reader; fall back to the raw size only.
+            else:
+                opener = open
+            rows = None
+            if opener:
+                with opener(path, "rb") as f:
+                    sample = f.read(cls.CSV_SAMPLE_BYTES)
+                lines = sample.count(b"\n")
+                if lines:
+                    expanded = size * cls.COMPRESSED_CSV_EXPANSION if compressed else size
+                    rows = max(0, int(expanded / (len(sample) / lines)) - 1)
+            stats[path] = (rows, size * cls.COMPRESSED_CSV_EXPANSION if compressed else size)
+        return stats
+
+    @staticmethod
+    def suggest_parallelism(durations, limit):
+        """
+        Smallest worker count whose ideal makespan is within 10% of the best achievable;
+        the largest table bounds how far parallel loading can help.
+        """
+        if not durations:
+            return 1
+        total, largest = sum(durations), max(durations)
+        for workers in range(1, max(1, limit) + 1):
+            if total / workers <= largest * 1.1:
+                return workers
+        return max(1, limit)
+
+    def plan(self, source_type, stats):
+        """Combine source statistics with measured throughput into a per-table load plan."""
+        rows_per_second, measured = self.rows_per_second(source_type)
+        ratio = self.FOOTPRINT_RATIO[source_type]
+        tables = []
+        for name, (rows, source_bytes) in stats.items():
+            if rows is None:
+                # Unknown row count: assume ~100 bytes per row.
+                rows = source_bytes // 100
+            tables.append({
+                "table": name,
+                "rows": rows,
+                "source_bytes": source_bytes,
+                "duckdb_bytes": int(source_bytes * ratio),
+                "seconds": rows / rows_per_second,
+            })
+
+        limit = min(len(tables) or 1, os.cpu_count() or 1)
+        if source_type == "psql":
+            limit = min(limit, self.MAX_PSQL_PARALLELISM)
+        workers = self.suggest_parallelism([table["seconds"] for table in tables], limit)
+        total_seconds = sum(table["seconds"] for table in tables)
+        free_bytes = shutil.disk_usage(self.DATABASE_FOLDER if os.path.isdir(self.DATABASE_FOLDER) else ".").free
+        return {
+            "source_type": source_type,
+            "tables": tables,
+            "rows": sum(table["rows"] for table in tables),
+            "duckdb_bytes": sum(table["duckdb_bytes"] for table in tables),
+            "seconds": total_seconds,
+            "rows_per_second": rows_per_second,
+            "measured": measured,
+            "parallelism": workers,
+            "parallel_seconds": max([total_seconds / workers] + [table["seconds"] for table in tables]),
+            "free_bytes": free_bytes,
+        }
+
+    @staticmethod
+    def format_bytes(size):
+        for unit in ("B", "KB", "MB", "GB", "TB"):
+            if size < 1024 or unit == "TB":
+                return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+            size /= 1024
+
+    @staticmethod
+    def format_seconds(seconds):
+        if seconds < 60:
+            return f"{seconds:.1f}s"
+        if seconds < 3600:
+            return f"{seconds / 60:.1f}m"
+        return f"{seconds / 3600:.1f}h"
+
+    def print_plan(self, plan):
+        """Print the plan table, totals, disk check and suggested parallelism."""
+        fmt_b, fmt_s = self.format_bytes, self.format_seconds
+        self.log(f"{Fore.CYAN}🧮 Dry run: nothing will be loaded.")
+        self.log(f"{Fore.CYAN}{'table':<32} {'rows':>14} {'source':>10} {'duckdb':>10} {'duration':>10}")
+        for table in sorted(plan["tables"], key=lambda t: t["seconds"], reverse=True):
+            self.log(
+                f"{table['table']:<32} {table['rows']:>14,} {fmt_b(table['source_bytes']):>10} "
+                f"{fmt_b(table['duckdb_bytes']):>10} {fmt_s(table['seconds']):>10}"
+            )
+        source = "measured on previous runs" if plan["measured"] else "default estimate; no load history yet"
+        self.log(f"{Fore.YELLOW}Throughput: {plan['rows_per_second']:,.0f} rows/s ({source}).")
+        self.log(
+            f"{Fore.YELLOW}Total: {plan['rows']:,} rows, ~{fmt_b(plan['duckdb_bytes'])} in DuckDB, "
+            f"~{fmt_s(plan['seconds'])} sequentially."
+        )
+        if plan["duckdb_bytes"] > plan["free_bytes"]:
+            self.log(f"{Fore.RED}⚠️ Estimated footprint exceeds the {fmt_b(plan['free_bytes'])} free on disk.")
+        self.log(
+            f"{Fore.GREEN}Suggested parallelism: {plan['parallelism']} "
+            f"(~{fmt_s(plan['parallel_seconds'])}; the largest table bounds the speed-up)."
+        )
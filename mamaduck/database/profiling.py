@@ -0,0 +1,181 @@
+import cProfile
+import contextlib
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+
+class ProfilingConnection:
+    """Wrap a DuckDB connection so every statement writes its own JSON query profile."""
+
+    def __init__(self, connection, profiler):
+        self._connection = connection
+        self._profiler = profiler
+        self._connection.execute("PRAGMA enable_profiling = 'json';")
+
+    def _run(self, method, query, *args, **kwargs):
+        profile_path = self._profiler.next_profile_path()
+        self._connection.execute(f"SET profiling_output = '{profile_path}';")
+        started = time.perf_counter()
+        result = getattr(self._connection, method)(query, *args, **kwargs)
+        self._profiler.record_statement(query, profile_path, time.perf_counter() - started)
+        return self if result is self._connection else result
+
+    def execute(self, query, *args, **kwargs):
+        return self._run("execute", query, *args, **kwargs)
+
+    def executemany(self, query, *args, **kwargs):
+        return self._run("executemany", query, *args, **kwargs)
+
+    def cursor(self):
+        return ProfilingConnection(self._connection.cursor(), self._profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class Profiler:
+    """
+    Collect DuckDB query profiles and optional cProfile stats per stage of a run,
+    and write a combined report of the hottest operators and Python functions.
+    """
+
+    def __init__(self, output_dir, python=False, top=10):
+        self.output_dir = output_dir
+        self.python = python
+        self.top = top
+        self.stages = {}
+        # Open stages per thread, innermost last, as (name, cProfile) pairs.
+        self.stacks = {}
+        self.statement_count = 0
+        self.lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def stage_data(self, name):
+        return self.stages.setdefault(name, {"statements": [], "python": None, "seconds": 0.0})
+
+    @property
+    def current_stage(self):
+        """
+        Innermost open stage of this thread.
+
+        Worker threads that never opened a stage of their own (pool readers, fan-out
+        sinks) report into whatever stage the main thread is in.
+        """
+        stack = self.stacks.get(threading.get_ident()) or self.stacks.get(threading.main_thread().ident)
+        return stack[-1][0] if stack else "run"
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Attribute everything run inside the block to the named stage.
+
+        Stages nest: an inner stage pauses the outer one's Python profile, so each
+        function call lands in exactly one stage, while wall time stays inclusive.
+        """
+        stack = self.stacks.setdefault(threading.get_ident(), [])
+        outer_profile = stack[-1][1] if stack else None
+        # Only one cProfile can be active per process on newer Pythons, so worker
+        # threads contribute DuckDB statements and wall time but no Python stats.
+        main_thread = threading.current_thread() is threading.main_thread()
+        python_profile = cProfile.Profile() if self.python and main_thread else None
+        with self.lock:
+            data = self.stage_data(name)
+        if outer_profile:
+            outer_profile.disable()
+        stack.append((name, python_profile))
+        started = time.perf_counter()
+        if python_profile:
+            python_profile.enable()
+        try:
+            yield
+        finally:
+            if python_profile:
+                python_profile.disable()
+                with self.lock:
+                    if data["python"] is None:
+                        data["python"] = pstats.Stats(python_profile)
+                    else:
+                        data["python"].add(python_profile)
+            with self.lock:
+                data["seconds"] += time.perf_counter() - started
+            stack.pop()
+            if outer_profile:
+                outer_profile.enable()
+
+    def wrap(self, connection):
+        return ProfilingConnection(connection, self)
+
+    def next_profile_path(self):
+        with self.lock:
+            self.statement_count += 1
+            return os.path.join(self.output_dir, f"query_{self.statement_count:04d}.json")
+
+    def record_statement(self, query, profile_path, seconds):
+        with self.lock:
+            self.stage_data(self.current_stage)["statements"].append(
+                {"query": " ".join(query.split()), "profile": profile_path, "seconds": seconds}
+            )
+
+    @staticmethod
+    def operator_timings(profile_path):
+        """Flatten a DuckDB JSON profile into (operator, seconds, rows) tuples."""
+        if not os.path.exists(profile_path):
+            return []
+        try:
+            with open(profile_path) as f:
+                root = json.load(f)
+        except ValueError:
+            return []
+        operators = []
+        nodes = list(root.get("children", []))
+        while nodes:
+            node = nodes.pop()
+            # Key names changed across DuckDB versions.
+            name = node.get("operator_name") or node.get("name") or "?"
+            seconds = node.get("operator_timing", node.get("timing", 0.0)) or 0.0
+            rows = node.get("operator_cardinality", node.get("cardinality", 0)) or 0
+            operators.append((name.strip(), seconds, rows))
+            nodes.extend(node.get("children", []))
+        return operators
+
+    def hottest_operators(self, statements):
+        totals = {}
+        for statement in statements:
+            for name, seconds, rows in self.operator_timings(statement["profile"]):
+                total = totals.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += rows
+        return sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:self.top]
+
+    def write_report(self):
+        """Write report.txt into the output directory and return its path."""
+        lines = []
+        for name, data in self.stages.items():
+            statements = data["statements"]
+            sql_seconds = sum(statement["seconds"] for statement in statements)
+            lines.append(f"=== Stage: {name} ({data['seconds']:.3f}s wall, {sql_seconds:.3f}s in {len(statements)} DuckDB statements) ===")
+            lines.append("")
+            lines.append("Slowest statements:")
+            for statement in sorted(statements, key=lambda s: s["seconds"], reverse=True)[:self.top]:
+                lines.append(f"  {statement['seconds']:9.3f}s  {statement['query'][:100]}  [{os.path.basename(statement['profile'])}]")
+            lines.append("")
+            lines.append("Hottest DuckDB operators:")
+            for operator, (seconds, rows) in self.hottest_operators(statements):
+                lines.append(f"  {seconds:9.3f}s  {operator:<24} {rows} rows")
+            if data["python"] is not None:
+                lines.append("")
+                lines.append("Hottest Python functions (cumulative):")
+                buffer = io.StringIO()
+                data["python"].stream = buffer
+                data["python"].sort_stats("cumulative").print_stats(self.top)
+                lines.extend("  " + line for line in buffer.getvalue().strip().splitlines())
+            lines.append("")
+
+        report_path = os.path.join(self.output_dir, "report.txt")
+        with open(report_path, "w") as f:
+            f.write("\n".join(lines))
+        return report_path
@@ -0,0 +1,99 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class ReaderSnapshot(DuckDBManager):
+    """
+    A point-in-time copy of a DuckDB file that any number of read-only export
+    processes can share, so loads can keep writing the original meanwhile.
+    """
+
+    def __init__(self, db_path, **kwargs):
+        super().__init__(db_path, read_only=True, **kwargs)
+        self.snapshot_path = None
+
+    def create(self):
+        """Copy the database (and its WAL) while holding DuckDB's shared read lock; returns the copy's name."""
+        stem = os.path.splitext(os.path.basename(self.duckdb_path))[0]
+        snapshot_path = f".{stem}.readers-{os.getpid()}.duckdb"
+        source = os.path.join(self.DATABASE_FOLDER, self.duckdb_path)
+        target = os.path.join(self.DATABASE_FOLDER, snapshot_path)
+
+        # The read-only connection keeps writers out only for the length of the copy.
+        self.connect_to_duckdb()
+        try:
+            shutil.copyfile(source, target)
+            if os.path.exists(source + ".wal"):
+                shutil.copyfile(source + ".wal", target + ".wal")
+        finally:
+            self.close_duckdb_conn()
+        self.snapshot_path = snapshot_path
+        self.log(f"{Fore.GREEN}📸 Readers will share snapshot '{target}'.")
+        return snapshot_path
+
+    def remove(self):
+        """Delete the snapshot copy."""
+        if not self.snapshot_path:
+            return
+        target = os.path.join(self.DATABASE_FOLDER, self.snapshot_path)
+        for path in (target, target + ".wal"):
+            if os.path.exists(path):
+                os.remove(path)
+        self.snapshot_path = None
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, *exc_info):
+        self.remove()
+
+
+def export_from_snapshot(snapshot_path, table_name, output_file, output_format="parquet", schema=None, options=None):
+    """Export one table from a shared snapshot; runs in its own worker process."""
+    # Imported here because the sinks themselves build on the database package.
+    from mamaduck.sink.to_csv import DuckDBToCSV
+    from mamaduck.sink.to_parquet import DuckDBToParquet
+
+    if output_format == "parquet":
+        db_tool = DuckDBToParquet(snapshot_path, quiet=True)
+    else:
+        db_tool = DuckDBToCSV(snapshot_path, quiet=True)
+    db_tool.connect_to_duckdb()
+    try:
+        if output_format == "parquet":
+            db_tool.export_table_to_parquet(table_name, output_file, schema, **(options or {}))
+        else:
+            db_tool.export_table_to_csv(table_name, output_file, schema, output_format)
+    finally:
+        db_tool.close_duckdb_conn()
+    return output_file
+
+
+def export_tables_parallel(db_path, tables, output_dir, output_format="parquet", workers=1, schema=None, options=None, log_stream=None):
+    """
+    Export several tables at once: one snapshot of the database is shared by
+    ``workers`` read-only processes, each exporting whole tables. ``options``
+    are passed on to the Parquet export (compression, row_group_size).
+
+    Returns ``{table: output_file}``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {table: os.path.join(output_dir, f"{table}.{output_format}") for table in tables}
+
+    snapshot = ReaderSnapshot(db_path, log_stream=log_stream)
+    with snapshot as snapshot_path:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                table: pool.submit(export_from_snapshot, snapshot_path, table, output_file, output_format, schema, options)
+                for table, output_file in outputs.items()
+            }
+            for table, future in futures.items():
+                future.result()
+                snapshot.log(f"{Fore.GREEN}✅ Exported '{table}' to '{outputs[table]}'.")
+    return outputs
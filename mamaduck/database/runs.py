@@ -0,0 +1,181 @@
+import duckdb
+import math
+import time
+from datetime import datetime
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class RunCoordinator(DuckDBManager):
+    """
+    Run a multi-table load as independent units (tables or key-range chunks), recording
+    each unit's status in the DuckDB file. A failing unit is retried with exponential
+    backoff and then left failed while the run carries on; re-running with the same
+    run id skips every unit that already finished.
+    """
+
+    STATUS_TABLE = "run_status"
+    # Key types that can be split into [low, high) ranges.
+    CHUNKABLE_TYPES = {"TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT"}
+    LEGACY_STATUS_TABLE = "mamaduck_run_status"
+    # Errors that fail the same way on every attempt (a table that already exists, a
+    # missing column, bad SQL) are not retried.
+    PERMANENT_ERRORS = (duckdb.CatalogException, duckdb.BinderException, duckdb.ParserException)
+
+    def __init__(self, db_path=None, run_id=None, retries=3, base_delay=1.0, max_delay=60.0, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.run_id = run_id or datetime.now().strftime("run-%Y%m%d-%H%M%S")
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = time.sleep
+
+    def ensure_status_table(self):
+        self.status_table = self.ensure_bookkeeping_table(self.STATUS_TABLE, """
+            run_id VARCHAR,
+            unit VARCHAR,
+            status VARCHAR,
+            attempts INTEGER,
+            error VARCHAR,
+            seconds DOUBLE,
+            updated_at TIMESTAMP,
+            PRIMARY KEY (run_id, unit)
+        """, legacy_name=self.LEGACY_STATUS_TABLE)
+
+    def set_status(self, unit, status, attempts, error=None, seconds=None):
+        self.duckdb_conn.execute(
+            f"INSERT OR REPLACE INTO {self.status_table} VALUES (?, ?, ?, ?, ?, ?, current_timestamp);",
+            [self.run_id, unit, status, attempts, error, seconds],
+        )
+
+    def unit_status(self, unit):
+        row = self.duckdb_conn.execute(
+            f"SELECT status FROM {self.status_table} WHERE run_id = ? AND unit = ?;", [self.run_id, unit]
+        ).fetchone()
+        return row[0] if row else None
+
+    def backoff(self, attempt):
+        """Delay before retry number ``attempt`` (1-based): base, 2x base, 4x base, ... capped."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def run_unit(self, unit, action):
+        """Run one unit with retries; returns 'done', 'skipped' or 'failed' and never raises."""
+        self.ensure_status_table()
+        if self.unit_status(unit) == "done":
+            self.log(f"{Fore.YELLOW}⏭ '{unit}' already finished in run '{self.run_id}'; skipping.")
+            return "skipped"
+
+        started = time.perf_counter()
+        for attempt in range(1, self.retries + 2):
+            self.set_status(unit, "running", attempt)
+            try:
+                action()
+                self.set_status(unit, "done", attempt, seconds=time.perf_counter() - started)
+                return "done"
+            except Exception as e:
+                error = str(e)
+                if attempt > self.retries or isinstance(e, self.PERMANENT_ERRORS):
+                    break
+                delay = self.backoff(attempt)
+                self.log(f"{Fore.YELLOW}🔁 '{unit}' failed (attempt {attempt}): {error}; retrying in {delay:.0f}s.")
+                self.sleep(delay)
+
+        self.set_status(unit, "failed", attempt, error, time.perf_counter() - started)
+        self.log(f"{Fore.RED}❌ '{unit}' failed after {attempt} attempts: {error}")
+        return "failed"
+
+    def check_chunk_column(self, table, column):
+        """Raise a ValueError unless ``column`` of ``table`` is an integer key."""
+        column_type = self.duckdb_conn.execute(f'DESCRIBE SELECT "{column}" FROM {table};').fetchone()[1]
+        if column_type not in self.CHUNKABLE_TYPES:
+            raise ValueError(f"--chunk-column '{column}' is {column_type}; chunking needs an integer column.")
+
+    def chunk_ranges(self, source, column, chunk_rows):
+        """
+        Split ``source`` into half-open [low, high) ranges of an integer key holding
+        ~chunk_rows rows each, plus a (None, None) chunk for rows whose key is NULL.
+        """
+        low, high, rows, nulls = self.duckdb_conn.execute(
+            f'SELECT min("{column}"), max("{column}"), count("{column}"), count(*) FILTER (WHERE "{column}" IS NULL) FROM {source};'
+        ).fetchone()
+        ranges = []
+        if rows:
+            chunks = max(1, math.ceil(rows / chunk_rows))
+            step = max(1, math.ceil((high - low + 1) / chunks))
+            ranges = [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+        if nulls:
+            ranges.append((None, None))
+        return ranges
+
+    def load_chunk(self, source, target, column, low, high):
+        """Replace one key range of ``target`` in a single transaction, so a retried chunk never duplicates rows."""
+        condition = f'"{column}" IS NULL' if low is None else f'"{column}" >= {low} AND "{column}" < {high}'
+        self.duckdb_conn.execute("BEGIN TRANSACTION;")
+        try:
+            self.duckdb_conn.execute(f"DELETE FROM {target} WHERE {condition};")
+            self.duckdb_conn.execute(f"INSERT INTO {target} SELECT * FROM {source} WHERE {condition};")
+            self.duckdb_conn.execute("COMMIT;")
+        except Exception:
+            self.duckdb_conn.execute("ROLLBACK;")
+            raise
+
+    def run_chunked_table(self, name, source, target, column, chunk_rows, finish=None):
+        """
+        Load a table as independently retried key-range chunks; returns the chunk outcomes.
+        ``finish()`` runs as a last unit (e.g. clustering, ENUM conversion) once every chunk is loaded.
+        """
+        outcomes = {}
+        outcomes[f"{name}:create"] = self.run_unit(
+            f"{name}:create",
+            lambda: self.duckdb_conn.execute(f"CREATE TABLE IF NOT EXISTS {target} AS SELECT * FROM {source} LIMIT 0;"),
+        )
+        if outcomes[f"{name}:create"] == "failed":
+            return outcomes
+        try:
+            # The empty target has the source's column types, without another round trip to the source.
+            self.check_chunk_column(target, column)
+        except Exception as e:
+            self.set_status(f"{name}:plan", "failed", 0, str(e))
+            self.log(f"{Fore.RED}❌ '{name}' cannot be chunked: {e}")
+            outcomes[f"{name}:plan"] = "failed"
+            return outcomes
+        ranges = []
+        outcomes[f"{name}:plan"] = self.run_unit(
+            f"{name}:plan", lambda: ranges.extend(self.chunk_ranges(source, column, chunk_rows))
+        )
+        if outcomes[f"{name}:plan"] == "skipped":
+            # A resumed run re-plans the chunks; finished ones are skipped below.
+            ranges = self.chunk_ranges(source, column, chunk_rows)
+        for low, high in ranges:
+            unit = f"{name}:{column} IS NULL" if low is None else f"{name}:{column}[{low},{high})"
+            outcomes[unit] = self.run_unit(unit, lambda low=low, high=high: self.load_chunk(source, target, column, low, high))
+        if finish and "failed" not in outcomes.values():
+            outcomes[f"{name}:finish"] = self.run_unit(f"{name}:finish", finish)
+        return outcomes
+
+    def summary(self):
+        """Per-status counts and failed units (with their last error) for this run."""
+        self.ensure_status_table()
+        counts = dict(self.duckdb_conn.execute(
+            f"SELECT status, count(*) FROM {self.status_table} WHERE run_id = ? GROUP BY status;", [self.run_id]
+        ).fetchall())
+        failed = self.duckdb_conn.execute(
+            f"SELECT unit, attempts, error FROM {self.status_table} WHERE run_id = ? AND status = 'failed' ORDER BY unit;",
+            [self.run_id],
+        ).fetchall()
+        return {"done": counts.get("done", 0), "failed": failed}
+
+    def print_summary(self, skipped=0):
+        summary = self.summary()
+        self.log(
+            f"{Fore.CYAN}📋 Run '{self.run_id}': {summary['done']} unit(s) done"
+            f"{f', {skipped} skipped' if skipped else ''}, {len(summary['failed'])} failed."
+        )
+        for unit, attempts, error in summary["failed"]:
+            self.log(f"{Fore.RED}   ❌ {unit} ({attempts} attempts): {error}")
+        if summary["failed"]:
+            self.log(f"{Fore.YELLOW}Re-run with '--run-id {self.run_id}' to retry only the failed units.")
+        return summary
@@ -0,0 +1,248 @@
+import sqlite3
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.transforms import quote
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class SubsetSampler(DuckDBManager):
+    """
+    Copy a referentially consistent sample of related tables into DuckDB.
+
+    Root tables (no parent among the copied tables) are sampled with TABLESAMPLE;
+    every other table keeps only the rows that reference an already sampled row of
+    its deepest parent. A final pass pulls in any parent row a copied row still
+    points at, so every foreign key in the subset resolves.
+
+    Foreign keys are ``(child, child_columns, parent, parent_columns)`` tuples.
+    """
+
+    # Keys sent to the source per lookup query, and the row identity column lookups add.
+    KEY_BATCH = 1000
+    ROW_ID = "mamaduck_row"
+    STAGE = "mamaduck_sample_stage"
+
+    def __init__(self, db_path=None, sample="10%", seed=None, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.kind, self.amount = self.parse_sample(sample)
+        self.seed = seed
+
+    @staticmethod
+    def parse_sample(sample):
+        """'10%' samples a percentage of each root table, '5000' a row count."""
+        text = str(sample).strip()
+        try:
+            if text.endswith("%"):
+                amount = float(text[:-1])
+                if not 0 < amount <= 100:
+                    raise ValueError
+                return "percent", amount
+            amount = int(text)
+            if amount <= 0:
+                raise ValueError
+            return "rows", amount
+        except ValueError:
+            raise ValueError(f"Sample must be a percentage like '10%' or a positive row count, got '{sample}'.")
+
+    def sample_clause(self):
+        seed = f", {int(self.seed)}" if self.seed is not None else ""
+        if self.kind == "percent":
+            return f"TABLESAMPLE {self.amount} PERCENT (bernoulli{seed})"
+        return f"TABLESAMPLE {self.amount} ROWS (reservoir{seed})"
+
+    def postgres_foreign_keys(self):
+        """Foreign keys between tables of the attached PostgreSQL 'public' schema."""
+        query = """
+            SELECT child.relname,
+                   (SELECT string_agg(a.attname, ',' ORDER BY k.i) FROM unnest(c.conkey) WITH ORDINALITY AS k(attnum, i)
+                    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum),
+                   parent.relname,
+                   (SELECT string_agg(a.attname, ',' ORDER BY k.i) FROM unnest(c.confkey) WITH ORDINALITY AS k(attnum, i)
+                    JOIN pg_attribute a ON a.attrelid = c.confrelid AND a.attnum = k.attnum)
+            FROM pg_constraint c
+            JOIN pg_class child ON child.oid = c.conrelid
+            JOIN pg_class parent ON parent.oid = c.confrelid
+            JOIN pg_namespace n ON n.oid = child.relnamespace
+            WHERE c.contype = 'f' AND n.nspname = 'public'
+        """
+        rows = self.duckdb_conn.execute(f"SELECT * FROM postgres_query('postgres_db', $${query}$$);").fetchall()
+        return [(child, tuple(cc.split(",")), parent, tuple(pc.split(","))) for child, cc, parent, pc in rows]
+
+    def postgres_root_sources(self, tables):
+        """
+        Root samples run inside PostgreSQL, so only the sampled rows cross the network.
+        Percentages use TABLESAMPLE BERNOULLI. Row counts keep the first N rows of a
+        random order; PostgreSQL still scans the table, but with a bounded top-N sort.
+        """
+        if self.kind == "percent":
+            repeatable = f" REPEATABLE ({int(self.seed)})" if self.seed is not None else ""
+            sample = f"TABLESAMPLE BERNOULLI ({self.amount}){repeatable}"
+        else:
+            # Hashing the row's physical location with the seed gives a repeatable order
+            # for as long as the table is not rewritten, like REPEATABLE does.
+            order = f"md5(ctid::text || '{int(self.seed)}')" if self.seed is not None else "random()"
+            sample = f"ORDER BY {order} LIMIT {self.amount}"
+        return {
+            table: f"postgres_query('postgres_db', $$SELECT * FROM public.\"{table}\" {sample}$$)"
+            for table in tables
+        }
+
+    def postgres_lookup(self, table, condition):
+        """
+        Rows of a PostgreSQL table matching ``condition``, filtered on the server; the
+        row's ctid comes first as ``ROW_ID`` so rows found through several keys dedupe.
+        """
+        query = f'SELECT ctid::text AS {self.ROW_ID}, * FROM public."{table}" WHERE {condition}'
+        return f"postgres_query('postgres_db', {self.sql_literal(query)})"
+
+    @staticmethod
+    def sql_literal(value):
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def key_conditions(self, columns, key_query):
+        """Yield ``(columns) IN (...)`` conditions over the keys ``key_query`` returns, KEY_BATCH keys each."""
+        keys = self.duckdb_conn.execute(key_query).fetchall()
+        column_list = ", ".join(quote(column) for column in columns)
+        for start in range(0, len(keys), self.KEY_BATCH):
+            values = ", ".join(
+                "(" + ", ".join(self.sql_literal(value) for value in key) + ")" for key in keys[start:start + self.KEY_BATCH]
+            )
+            yield f"({column_list}) IN ({values})"
+
+    @staticmethod
+    def qualified(alias, columns):
+        return ", ".join(f"{alias}.{quote(column)}" for column in columns)
+
+    @staticmethod
+    def not_null(alias, columns):
+        return " AND ".join(f"{alias}.{quote(column)} IS NOT NULL" for column in columns)
+
+    @staticmethod
+    def sqlite_foreign_keys(sqlite_path):
+        """Foreign keys declared in a SQLite file, read with ``PRAGMA foreign_key_list``."""
+        conn = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+        try:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';"
+            )]
+            foreign_keys = []
+            for table in tables:
+                constraints = {}
+                for fk_id, seq, parent, column, parent_column, *_ in conn.execute(f'PRAGMA foreign_key_list("{table}");'):
+                    constraints.setdefault(fk_id, (parent, []))[1].append((seq, column, parent_column))
+                for parent, columns in constraints.values():
+                    columns.sort()
+                    parent_columns = [pc for _, _, pc in columns]
+                    if None in parent_columns:
+                        # REFERENCES parent without columns means the parent's primary key.
+                        info = conn.execute(f'PRAGMA table_info("{parent}");').fetchall()
+                        parent_columns = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+                    foreign_keys.append((table, tuple(c for _, c, _ in columns), parent, tuple(parent_columns)))
+            return foreign_keys
+        finally:
+            conn.close()
+
+    @staticmethod
+    def order_tables(tables, foreign_keys):
+        """
+        Order tables parents-first; returns ``[(table, driving_fks)]`` where an empty
+        ``driving_fks`` marks a root. A child is driven by its deepest parents only
+        (orders, not products, for order items), so shallow lookup tables do not drag
+        in extra rows; its other parents are filled in by the closure pass. Tables
+        caught in a reference cycle become roots.
+        """
+        parent_fks = {table: [fk for fk in foreign_keys if fk[0] == table and fk[2] in tables and fk[2] != table] for table in tables}
+        ordered, depth = [], {}
+        while len(ordered) < len(tables):
+            ready = [t for t in tables if t not in depth and all(fk[2] in depth for fk in parent_fks[t])]
+            if not ready:
+                # A cycle: sample its first table and let the closure pass fix its parents.
+                ready = [next(t for t in tables if t not in depth)]
+                parent_fks[ready[0]] = []
+            for table in ready:
+                parents = parent_fks[table]
+                depth[table] = 1 + max((depth[fk[2]] for fk in parents), default=-1)
+                driving = [fk for fk in parents if depth[fk[2]] == depth[table] - 1]
+                ordered.append((table, driving))
+        return ordered
+
+    @staticmethod
+    def match(left, left_columns, right, right_columns):
+        return " AND ".join(f'{left}."{lc}" = {right}."{rc}"' for lc, rc in zip(left_columns, right_columns))
+
+    def sample_subset(self, sources, foreign_keys, schema=None, root_sources=None, key_lookup=None):
+        """
+        Copy the sample of every table in ``sources`` ({table: source relation}) into
+        DuckDB; ``root_sources`` may hold already sampled relations for root tables.
+        With ``key_lookup(table, condition)`` (e.g. ``postgres_lookup``), child and
+        parent rows are fetched by sending the sampled keys to the source in batches
+        instead of semi-joining the whole source table locally. Returns {table: rows copied}.
+        """
+        tables = list(sources)
+        target = lambda table: f"{schema}.{table}" if schema else table
+        if schema:
+            self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+
+        for table, parents in self.order_tables(tables, foreign_keys):
+            if not parents:
+                sampled = (root_sources or {}).get(table) or f"(SELECT * FROM {sources[table]} {self.sample_clause()})"
+                query = f"SELECT * FROM {sampled}"
+            elif key_lookup:
+                # The rows that reference a sampled parent row, looked up by key on the source.
+                self.duckdb_conn.execute(f"CREATE OR REPLACE TEMP TABLE {self.STAGE} AS SELECT * FROM {key_lookup(table, 'false')};")
+                for _, columns, parent, parent_columns in parents:
+                    keys = f"SELECT DISTINCT {self.qualified('p', parent_columns)} FROM {target(parent)} p WHERE {self.not_null('p', parent_columns)}"
+                    for condition in self.key_conditions(columns, keys):
+                        self.duckdb_conn.execute(f"INSERT INTO {self.STAGE} SELECT * FROM {key_lookup(table, condition)};")
+                query = f"SELECT * EXCLUDE ({self.ROW_ID}) FROM (SELECT DISTINCT ON ({self.ROW_ID}) * FROM {self.STAGE})"
+            else:
+                # Keep the rows that reference a sampled row of a driving parent.
+                references = " OR ".join(
+                    f"EXISTS (SELECT 1 FROM {target(parent)} p WHERE {self.match('s', columns, 'p', parent_columns)})"
+                    for _, columns, parent, parent_columns in parents
+                )
+                query = f"SELECT * FROM {sources[table]} s WHERE {references}"
+            self.duckdb_conn.execute(f"CREATE OR REPLACE TABLE {target(table)} AS {query};")
+        self.duckdb_conn.execute(f"DROP TABLE IF EXISTS {self.STAGE};")
+
+        # Parent closure: add every referenced parent row that is still missing, until nothing changes.
+        in_scope = [fk for fk in foreign_keys if fk[0] in sources and fk[2] in sources]
+        added = True
+        while added:
+            added = False
+            for child, columns, parent, parent_columns in in_scope:
+                if key_lookup:
+                    # Only the keys still missing from the parent go to the source.
+                    missing = f"""
+                        SELECT DISTINCT {self.qualified('c', columns)} FROM {target(child)} c
+                        WHERE {self.not_null('c', columns)}
+                          AND NOT EXISTS (SELECT 1 FROM {target(parent)} t WHERE {self.match('t', parent_columns, 'c', columns)})
+                    """
+                    inserted = sum(
+                        self.duckdb_conn.execute(
+                            f"INSERT INTO {target(parent)} SELECT * EXCLUDE ({self.ROW_ID}) FROM {key_lookup(parent, condition)};"
+                        ).fetchone()[0]
+                        for condition in self.key_conditions(parent_columns, missing)
+                    )
+                else:
+                    inserted = self.duckdb_conn.execute(f"""
+                        INSERT INTO {target(parent)}
+                        SELECT * FROM {sources[parent]} s
+                        WHERE EXISTS (SELECT 1 FROM {target(child)} c WHERE {self.match('c', columns, 's', parent_columns)})
+                          AND NOT EXISTS (SELECT 1 FROM {target(parent)} t WHERE {self.match('t', parent_columns, 's', parent_columns)});
+                    """).fetchone()[0]
+                if inserted:
+                    added = True
+                    self.log(f"{Fore.YELLOW}➕ Pulled {inserted} referenced row(s) into '{parent}' for '{child}'.")
+
+        counts = {table: self.duckdb_conn.execute(f"SELECT count(*) FROM {target(table)};").fetchone()[0] for table in tables}
+        for table, rows in counts.items():
+            self.log(f"{Fore.GREEN}🧪 '{target(table)}': {rows:,} sampled row(s).")
+        self.log(f"{Fore.GREEN}✅ Copied a consistent {self.amount}{'%' if self.kind == 'percent' else ' row'} sample of {len(tables)} table(s), {sum(counts.values()):,} rows in total.")
+        return counts
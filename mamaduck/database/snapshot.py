@@ -0,0 +1,135 @@
+import argparse
+import duckdb
+import os
+import re
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class DuckDBSnapshot(DuckDBManager):
+    """Snapshot and restore whole DuckDB databases through a Parquet directory."""
+
+    def snapshot_database(self, output_dir, compression="zstd", threads=None):
+        """Export every schema, table and view to a compressed Parquet directory."""
+        try:
+            if threads:
+                # EXPORT DATABASE writes each table with a parallel COPY, so the
+                # thread count is what bounds how many row groups are written at once.
+                self.duckdb_conn.execute(f"SET threads = {int(threads)};")
+            self.log(f"{Fore.CYAN}📦 Snapshotting database to '{output_dir}'...")
+            self.duckdb_conn.execute(
+                f"EXPORT DATABASE '{output_dir}' (FORMAT PARQUET, COMPRESSION {compression.upper()});"
+            )
+            self.log(f"{Fore.GREEN}✅ Snapshot written to '{output_dir}'.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Snapshot failed: {e}")
+            raise
+
+    @staticmethod
+    def read_snapshot_statements(snapshot_dir, file_name):
+        """Split a snapshot's schema.sql or load.sql into individual statements."""
+        with open(os.path.join(snapshot_dir, file_name)) as f:
+            script = f.read()
+        # DuckDB's own parser, so ';' inside defaults, view bodies or macros never splits a statement.
+        return [statement.query.strip() for statement in duckdb.extract_statements(script) if statement.query.strip()]
+
+    @staticmethod
+    def statement_table(statement):
+        """Return the table name a CREATE TABLE or COPY statement targets."""
+        match = re.match(r'^(?:CREATE TABLE|COPY)\s+([^\s(]+)', statement, re.IGNORECASE)
+        if not match:
+            return None
+        return match.group(1).replace('"', '')
+
+    @staticmethod
+    def table_selected(table, selected):
+        """Check a possibly schema-qualified table name against the requested tables."""
+        return table is not None and (table in selected or table.split(".")[-1] in selected)
+
+    def restore_database(self, snapshot_dir, tables=None):
+        """Restore a snapshot, optionally limited to the given table names."""
+        try:
+            if not tables:
+                self.log(f"{Fore.CYAN}📥 Restoring snapshot '{snapshot_dir}'...")
+                self.duckdb_conn.execute(f"IMPORT DATABASE '{snapshot_dir}';")
+                self.log(f"{Fore.GREEN}✅ Snapshot '{snapshot_dir}' restored.")
+                return
+
+            self.log(f"{Fore.CYAN}📥 Restoring {', '.join(tables)} from snapshot '{snapshot_dir}'...")
+            selected = set(tables)
+            for statement in self.read_snapshot_statements(snapshot_dir, "schema.sql"):
+                upper = statement.upper()
+                if upper.startswith("CREATE TABLE"):
+                    if not self.table_selected(self.statement_table(statement), selected):
+                        continue
+                elif upper.startswith(("CREATE VIEW", "CREATE INDEX", "CREATE UNIQUE INDEX")):
+                    # Views and indexes may reference tables that are not being restored.
+                    continue
+                self.duckdb_conn.execute(statement.rstrip(";") + ";")
+
+            for statement in self.read_snapshot_statements(snapshot_dir, "load.sql"):
+                if not self.table_selected(self.statement_table(statement), selected):
+                    continue
+                # load.sql records paths as they were at export time; resolve them
+                # against the snapshot directory so moved snapshots still restore.
+                statement = re.sub(
+                    r"FROM '([^']*)'",
+                    lambda m: f"FROM '{os.path.join(snapshot_dir, os.path.basename(m.group(1)))}'",
+                    statement,
+                    count=1,
+                )
+                self.duckdb_conn.execute(statement.rstrip(";") + ";")
+            self.log(f"{Fore.GREEN}✅ Restored {len(selected)} table(s) from '{snapshot_dir}'.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Restore failed: {e}")
+            raise
+
+def snapshot_main():
+    """Main entry point for snapshotting a DuckDB database."""
+    parser = argparse.ArgumentParser(description="Snapshot a DuckDB database to a Parquet directory.")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file.")
+    parser.add_argument('--output', type=str, help="Snapshot directory to create.")
+    parser.add_argument('--compression', type=str, default="zstd", help="Parquet compression codec (default: zstd).")
+    parser.add_argument('--threads', type=int, help="Number of threads used to write table files.")
+    args = parser.parse_args()
+
+    if not args.db or not args.output:
+        print(f"{Fore.RED}❌ Error: '--db' and '--output' are required.")
+        return
+
+    db_tool = DuckDBSnapshot(args.db, read_only=True)
+    try:
+        db_tool.connect_to_duckdb()
+        db_tool.snapshot_database(args.output, args.compression, args.threads)
+    except Exception:
+        return
+    finally:
+        db_tool.close_duckdb_conn()
+
+def restore_main():
+    """Main entry point for restoring a DuckDB database from a snapshot."""
+    parser = argparse.ArgumentParser(description="Restore a DuckDB database from a Parquet snapshot.")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file to restore into.")
+    parser.add_argument('--snapshot', type=str, help="Snapshot directory created by 'snapshot'.")
+    parser.add_argument('--tables', type=str, nargs='*', help="Table names to restore (default: all tables).")
+    args = parser.parse_args()
+
+    if not args.db or not args.snapshot:
+        print(f"{Fore.RED}❌ Error: '--db' and '--snapshot' are required.")
+        return
+
+    if not os.path.isdir(args.snapshot):
+        print(f"{Fore.RED}❌ Snapshot directory '{args.snapshot}' does not exist.")
+        return
+
+    db_tool = DuckDBSnapshot(args.db)
+    try:
+        db_tool.connect_to_duckdb()
+        db_tool.restore_database(args.snapshot, args.tables)
+    except Exception:
+        return
+    finally:
+        db_tool.close_duckdb_conn()
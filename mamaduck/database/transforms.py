@@ -0,0 +1,77 @@
+import json
+import os
+
+TRANSFORM_KEYS = ("rename", "cast", "derive", "drop")
+
+
+def load_transform(value):
+    """
+    Read a ``--transform`` value: a JSON mapping file (or an already parsed mapping),
+    a file holding a SQL select list, or an inline SQL select list.
+    """
+    if not value:
+        return None
+    spec = value
+    if isinstance(value, str) and os.path.isfile(value):
+        with open(value) as f:
+            text = f.read()
+        spec = json.loads(text) if value.endswith(".json") else text.strip()
+    # Compile once so a malformed mapping fails before any data is read.
+    transform_query(spec, "source")
+    return spec
+
+
+def quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def compile_transform(spec):
+    """
+    Compile a transform spec into the SELECT list of a load, so columns are renamed,
+    cast, derived and dropped in the same pass that reads the source.
+
+    A string is used as the select list verbatim. A mapping may hold ``rename``
+    ({old: new}), ``cast`` ({column: type}), ``derive`` ({new: sql_expression}) and
+    ``drop`` ([column, ...]); untouched columns keep their position. Returns '*' for
+    an empty spec. A column that is both renamed and cast needs two levels; use
+    ``transform_query`` for those.
+    """
+    if not spec:
+        return "*"
+    if isinstance(spec, str):
+        return spec.strip().rstrip(";")
+    unknown = set(spec) - set(TRANSFORM_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown transform key(s) {sorted(unknown)}; expected {', '.join(TRANSFORM_KEYS)}.")
+
+    rename = spec.get("rename") or {}
+    cast = spec.get("cast") or {}
+    if set(rename) & set(cast):
+        # DuckDB rejects a column in both REPLACE and RENAME of one star.
+        raise ValueError(f"Column(s) {sorted(set(rename) & set(cast))} are renamed and cast; use transform_query.")
+    exclude = [quote(column) for column in spec.get("drop") or []]
+    replace = [f"CAST({quote(column)} AS {data_type}) AS {quote(column)}" for column, data_type in cast.items()]
+    renames = [f"{quote(old)} AS {quote(new)}" for old, new in rename.items()]
+    extra = [f"{expression} AS {quote(name)}" for name, expression in (spec.get("derive") or {}).items()]
+
+    star = "*"
+    if exclude:
+        star += f" EXCLUDE ({', '.join(exclude)})"
+    if replace:
+        star += f" REPLACE ({', '.join(replace)})"
+    if renames:
+        star += f" RENAME ({', '.join(renames)})"
+    return ", ".join([star] + extra)
+
+
+def transform_query(spec, source):
+    """
+    ``SELECT`` reading ``source`` (a table, table function or parenthesised subquery)
+    through a transform spec.
+    """
+    if isinstance(spec, dict) and set(spec.get("rename") or {}) & set(spec.get("cast") or {}):
+        # Cast, derive and drop first, then rename the result: every column keeps its
+        # position, and DuckDB flattens the subquery into the same scan.
+        inner = compile_transform({key: value for key, value in spec.items() if key != "rename"})
+        return f"SELECT {compile_transform({'rename': spec['rename']})} FROM (SELECT {inner} FROM {source})"
+    return f"SELECT {compile_transform(spec)} FROM {source}"
@@ -3,30 +3,62 @@ import sys
 from mamaduck.connectors.csv import main as csv_main
 from mamaduck.connectors.psql import main as psql_main
 from mamaduck.connectors.sqlite import main as sqlite_main
+from mamaduck.connectors.parquet import main as parquet_main
 
 from mamaduck.sink.to_csv import main as to_csv_main
 from mamaduck.sink.to_psql import main as to_psql_main
 from mamaduck.sink.to_sqlite import main as to_sqlite_main
+from mamaduck.sink.to_parquet import main as to_parquet_main
+from mamaduck.sink.fanout import main as fanout_main
+from mamaduck.sink.sharded import shard_plan_main, shard_work_main, shard_combine_main
+
+from mamaduck.database.snapshot import snapshot_main, restore_main
+from mamaduck.database.maintenance import maintain_main
+from mamaduck.watch import main as watch_main
+from mamaduck.query import main as query_main
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.profiling import Profiler
 
 from colorama import init, Fore
 import logging
 
 init(autoreset=True)
 
+# Map tool choices to corresponding functions
+TOOL_MAPPING = {
+    'load_csv': csv_main,
+    'load_psql': psql_main,
+    'load_sqlite': sqlite_main,
+    'load_parquet': parquet_main,
+    'to_csv': to_csv_main,
+    'to_psql': to_psql_main,
+    'to_sqlite': to_sqlite_main,
+    'to_parquet': to_parquet_main,
+    'fanout': fanout_main,
+    'shard_plan': shard_plan_main,
+    'shard_work': shard_work_main,
+    'shard_combine': shard_combine_main,
+    'snapshot': snapshot_main,
+    'restore': restore_main,
+    'watch': watch_main,
+    'query': query_main,
+    'maintain': maintain_main,
+}
+
 class CustomArgumentParser(argparse.ArgumentParser):
     def error(self, message):
         """Override the default error method to provide a user-friendly message."""
         self.print_help()
         print(f"\n{Fore.RED}Error: {message}\n")
         print(f"{Fore.YELLOW}Hint: Use one of the valid subcommands: "
-              f"'load_csv', 'load_psql', 'load_sqlite', 'to_csv', 'to_psql', 'to_sqlite'.")
+              f"{', '.join(repr(tool) for tool in TOOL_MAPPING)}.")
         sys.exit(2)
 
 def main():
     """Main entry point that routes to the appropriate tool based on user input."""
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-    # Display welcome banner
+    # Display welcome banner (on stderr, so tools can stream data to stdout)
     print(Fore.YELLOW + """
   __  __       _        __  __       _        ____       _   _     ____     _  __    
 U|' \/ '|u U  /"\  u  U|' \/ '|u U  /"\  u   |  _"\   U |"|u| | U /"___|   |"|/ /    
@@ -35,36 +67,44 @@ U|' \/ '|u U  /"\  u  U|' \/ '|u U  /"\  u   |  _"\   U |"|u| | U /"___|   |"|/
  |_|  |_|  /_/   \_\   |_|  |_|  /_/   \_\   |____/ u  <<\___/    \____|   |_|\_\    
 <<,-,,-.    \\    >>  <<,-,,-.    \\    >>    |||_    (__) )(    _// \\  ,-,>> \\,-. 
  (./  \.)  (__)  (__)  (./  \.)  (__)  (__)  (__)_)       (__)  (__)(__)  \.)   (_/  
-    """)
+    """, file=sys.stderr)
 
     # Use the custom argument parser
     parser = CustomArgumentParser(description="MamaDuck CLI Tool Launcher")
     parser.add_argument(
         'kwak', 
         type=str, 
-        choices=['load_csv', 'load_psql', 'load_sqlite', 'to_csv', 'to_psql', 'to_sqlite'], 
-        help="Choose the migration tool: 'load_csv', 'load_psql', 'load_sqlite', 'to_csv', 'to_psql', or 'to_sqlite'."
+        choices=list(TOOL_MAPPING), 
+        help=f"Choose the migration tool: {', '.join(repr(tool) for tool in TOOL_MAPPING)}."
     )
+    parser.add_argument('--profile', type=str, metavar='DIR', help="Write a DuckDB query profile per statement and a combined report to DIR.")
+    parser.add_argument('--profile-python', action='store_true', help="With --profile, also run the tool under cProfile.")
+    parser.add_argument('--lock-timeout', type=float, metavar='SECONDS', help="Give up after waiting this long for another job's write lock on the DuckDB file (default: wait).")
     
     args, unknown_args = parser.parse_known_args()
 
-    # Map tool choices to corresponding functions
-    tool_mapping = {
-        'load_csv': csv_main,
-        'load_psql': psql_main,
-        'load_sqlite': sqlite_main,
-        'to_csv': to_csv_main,
-        'to_psql': to_psql_main,
-        'to_sqlite': to_sqlite_main,
-    }
+    if args.lock_timeout is not None:
+        DuckDBManager.write_lock_timeout = args.lock_timeout
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile, python=args.profile_python)
+        DuckDBManager.profiler = profiler
 
     try:
         logging.info(f"Launching {args.kwak.replace('_', ' ').title()} Tool...")
         sys.argv = [sys.argv[0], *unknown_args]
-        tool_mapping[args.kwak]()
+        if profiler:
+            with profiler.stage(args.kwak):
+                TOOL_MAPPING[args.kwak]()
+        else:
+            TOOL_MAPPING[args.kwak]()
     except Exception as e:
         logging.error(f"An error occurred while executing the tool: {e}")
         sys.exit(1)
+    finally:
+        if profiler:
+            logging.info(f"Profile report written to {profiler.write_report()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,171 @@
+import argparse
+import os
+import sys
+from colorama import Fore, init
+
+from mamaduck.database.cache import ResultCache
+from mamaduck.sink.to_csv import DuckDBToCSV
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class FederatedQuery(DuckDBToCSV):
+    """
+    Run one SQL statement across live PostgreSQL, SQLite and CSV sources without
+    copying them into DuckDB first.
+
+    Sources are attached (or wrapped in views) under the names given by the caller,
+    so DuckDB pushes column projections and filters down to each scan.
+    """
+
+    FILE_FORMATS = {"csv": "FORMAT CSV, HEADER", "json": "FORMAT JSON", "parquet": "FORMAT PARQUET"}
+
+    def __init__(self, db_path=None, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.cache = None
+
+    def enable_cache(self, cache_path, ttl_seconds=3600, max_bytes=512 * 1024 * 1024):
+        """
+        Serve repeated queries from a result cache stored in the DuckDB file ``cache_path``.
+        A cache that cannot be opened (held by another process, bad path) is skipped and
+        queries run uncached.
+        """
+        try:
+            self.cache = ResultCache(self.duckdb_conn, cache_path, ttl_seconds, max_bytes, self.attach_options("DUCKDB"))
+        except Exception as e:
+            self.duckdb_conn.execute(f"DETACH DATABASE IF EXISTS {ResultCache.ALIAS};")
+            self.log(f"{Fore.YELLOW}⚠️ Result cache '{cache_path}' is unavailable ({e}); running uncached.")
+            return
+        if self.duckdb_path:
+            self.cache.add_file_source(os.path.join(self.DATABASE_FOLDER, self.duckdb_path))
+        self.log(f"{Fore.GREEN}✅ Using result cache '{cache_path}'.")
+
+    def attach_psql(self, name, psql_conn_string):
+        """Attach a PostgreSQL database read-only as catalog ``name``."""
+        try:
+            self.duckdb_conn.execute(f"ATTACH '{psql_conn_string}' AS {name} (TYPE POSTGRES, READ_ONLY);")
+            if self.cache:
+                self.cache.add_psql_source(name)
+            self.log(f"{Fore.GREEN}✅ Attached PostgreSQL as '{name}'.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Failed to attach PostgreSQL as '{name}': {e}")
+            raise
+
+    def attach_sqlite(self, name, sqlite_path):
+        """Attach a SQLite file read-only as catalog ``name``."""
+        try:
+            self.duckdb_conn.execute(f"ATTACH '{sqlite_path}' AS {name} (TYPE SQLITE, READ_ONLY);")
+            if self.cache:
+                self.cache.add_sqlite_source(sqlite_path)
+            self.log(f"{Fore.GREEN}✅ Attached SQLite '{sqlite_path}' as '{name}'.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Failed to attach SQLite '{sqlite_path}': {e}")
+            raise
+
+    def register_csv(self, name, file_name):
+        """Expose a CSV file as temporary view ``name``; it is scanned only when the query runs."""
+        try:
+            self.duckdb_conn.execute(f"CREATE TEMP VIEW {name} AS SELECT * FROM read_csv_auto('{file_name}');")
+            if self.cache:
+                self.cache.add_file_source(file_name)
+            self.log(f"{Fore.GREEN}✅ Registered CSV '{file_name}' as '{name}'.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Failed to register CSV '{file_name}': {e}")
+            raise
+
+    def export_query(self, query, output_file, output_format="csv"):
+        """Write a query's result straight to a file with COPY."""
+        query = query.strip().rstrip(";")
+        with self.stage("export"):
+            self.duckdb_conn.execute(f"COPY ({query}) TO '{output_file}' ({self.FILE_FORMATS[output_format]});")
+
+    def run_query(self, query, output=DuckDBToCSV.STDOUT_MARKER, output_format="csv", stream=None):
+        """Run ``query`` and stream it to stdout (``output='-'``) or write it to a file; returns rows streamed."""
+        try:
+            self.log(f"{Fore.BLUE}Running federated query... 🔎")
+            if self.cache:
+                query, hit = self.cache.cached_query(query)
+                self.log(f"{Fore.CYAN}{'⚡ Served from the result cache.' if hit else 'Result cached for next time.'}")
+            if output == self.STDOUT_MARKER:
+                row_count = self.stream_query(query, output_format, stream)
+                self.log(f"{Fore.GREEN}Streamed {row_count} rows ✅")
+                return row_count
+            self.export_query(query, output, output_format)
+            self.log(f"{Fore.GREEN}Result written to {output} ✅")
+            return None
+        except Exception as e:
+            self.log(f"{Fore.RED}Query failed: {e} ❌")
+            raise
+
+def parse_sources(values, flag):
+    """Split repeated NAME=VALUE arguments into (name, value) pairs."""
+    sources = []
+    for value in values:
+        name, separator, target = value.partition("=")
+        if not separator or not name or not target:
+            raise ValueError(f"'{flag}' expects NAME=VALUE, got '{value}'.")
+        sources.append((name, target))
+    return sources
+
+def main():
+    """Main entry point for federated queries."""
+    parser = argparse.ArgumentParser(description="Run one SQL query across PostgreSQL, SQLite and CSV sources without loading them.")
+    parser.add_argument('--sql', type=str, help="SQL statement to run.")
+    parser.add_argument('--sql-file', type=str, help="File containing the SQL statement to run.")
+    parser.add_argument('--psql', type=str, action='append', default=[], help="NAME=CONNECTION_STRING: attach PostgreSQL as catalog NAME (repeatable).")
+    parser.add_argument('--sqlite', type=str, action='append', default=[], help="NAME=PATH: attach a SQLite file as catalog NAME (repeatable).")
+    parser.add_argument('--csv', type=str, action='append', default=[], help="NAME=PATH: expose a CSV file as view NAME (repeatable).")
+    parser.add_argument('--db', type=str, help="Optional DuckDB file whose tables can be joined too (opened read-only).")
+    parser.add_argument('--output', type=str, default=DuckDBToCSV.STDOUT_MARKER, help="Output file, or '-' to stream to stdout (default).")
+    parser.add_argument('--format', type=str, choices=['csv', 'json', 'parquet'], default='csv', help="Output format (default: csv; parquet needs --output).")
+    parser.add_argument('--cache', type=str, help="DuckDB file used as a result cache; repeated queries over unchanged sources are served from it.")
+    parser.add_argument('--cache-ttl', type=int, default=3600, help="Seconds a cached result stays valid (default: 3600; 0 = until a source changes).")
+    parser.add_argument('--cache-max-mb', type=int, default=512, help="Cache size bound in MB; least recently used results are evicted (default: 512).")
+    args = parser.parse_args()
+
+    query = args.sql
+    if args.sql_file:
+        with open(args.sql_file) as f:
+            query = f.read()
+    if not query:
+        print(f"{Fore.RED}❌ Error: '--sql' or '--sql-file' is required.", file=sys.stderr)
+        return
+
+    streaming = args.output == DuckDBToCSV.STDOUT_MARKER
+    if streaming and args.format == "parquet":
+        print(f"{Fore.RED}❌ Error: Parquet output needs an '--output' file.", file=sys.stderr)
+        return
+
+    log_stream = sys.stderr if streaming else sys.stdout
+    try:
+        psql_sources = parse_sources(args.psql, "--psql")
+        sqlite_sources = parse_sources(args.sqlite, "--sqlite")
+        csv_sources = parse_sources(args.csv, "--csv")
+    except ValueError as e:
+        print(f"{Fore.RED}❌ Error: {e}", file=sys.stderr)
+        return
+
+    db_tool = FederatedQuery(args.db, log_stream=log_stream)
+    try:
+        db_tool.connect_to_duckdb()
+        if args.cache:
+            db_tool.enable_cache(args.cache, args.cache_ttl, args.cache_max_mb * 1024 * 1024)
+        for name, conn_string in psql_sources:
+            db_tool.attach_psql(name, conn_string)
+        for name, path in sqlite_sources:
+            db_tool.attach_sqlite(name, path)
+        for name, path in csv_sources:
+            db_tool.register_csv(name, path)
+        db_tool.run_query(query, args.output, args.format)
+        if db_tool.cache:
+            db_tool.cache.log_metrics(db_tool.log)
+    except BrokenPipeError:
+        # The downstream reader (e.g. `head`) closed the pipe early; stop quietly.
+        sys.stdout = open(os.devnull, "w")
+    except Exception:
+        return
+    finally:
+        db_tool.close_duckdb_conn()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import csv
+import queue
+import re
+import threading
+import time
+import duckdb
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.sink.to_parquet import DuckDBToParquet
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class CSVSink:
+    """Write fan-out batches to a CSV file."""
+
+    def __init__(self, output_file):
+        self.name = f"csv:{output_file}"
+        self.output_file = output_file
+        self.file = None
+        self.writer = None
+
+    def open(self, columns, column_definitions):
+        self.file = open(self.output_file, "w", newline="")
+        # Match DuckDB's COPY output: '\n' line endings and lower-case booleans.
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(
+            [str(value).lower() if isinstance(value, bool) else value for value in row] for row in rows
+        )
+
+    def finish(self):
+        pass
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class ParquetSink:
+    """
+    Stage fan-out batches in a private DuckDB database and write them to a Parquet
+    file once the scan has finished; a Parquet file can't be appended to batch by batch.
+    """
+
+    def __init__(self, output_file, compression="zstd", row_group_size=None):
+        self.name = f"parquet:{output_file}"
+        self.output_file = output_file
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.conn = None
+        self.insert_query = None
+
+    def open(self, columns, column_definitions):
+        self.conn = duckdb.connect(database=':memory:')
+        self.conn.execute(f"CREATE TABLE staged ({', '.join(column_definitions)});")
+        self.insert_query = f"INSERT INTO staged VALUES ({', '.join(['?' for _ in columns])})"
+
+    def write(self, rows):
+        self.conn.executemany(self.insert_query, rows)
+
+    def finish(self):
+        DuckDBToParquet(None, duckdb_conn=self.conn, quiet=True).export_table_to_parquet(
+            "staged", self.output_file, compression=self.compression, row_group_size=self.row_group_size
+        )
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+
+class AttachedSink:
+    """Write fan-out batches to a database attached on its own DuckDB cursor."""
+
+    def __init__(self, name, attach_target, attach_type, table_name):
+        self.name = name
+        self.attach_target = attach_target
+        self.attach_type = attach_type
+        self.table_name = table_name
+        self.cursor = None
+        self.alias = None
+        self.attach_options = None
+        self.insert_query = None
+
+    def open_cursor(self, duckdb_conn, alias, attach_options):
+        """Give the sink a dedicated cursor so it can insert while other sinks do the same."""
+        self.cursor = duckdb_conn.cursor()
+        self.alias = alias
+        self.attach_options = attach_options
+
+    def open(self, columns, column_definitions):
+        self.cursor.execute(f"ATTACH '{self.attach_target}' AS {self.alias} {self.attach_options};")
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.alias}.{self.table_name} ({', '.join(column_definitions)});"
+        )
+        self.insert_query = (
+            f"INSERT INTO {self.alias}.{self.table_name} VALUES ({', '.join(['?' for _ in columns])})"
+        )
+
+    def write(self, rows):
+        self.cursor.executemany(self.insert_query, rows)
+
+    def finish(self):
+        pass
+
+    def close(self):
+        if self.cursor:
+            self.cursor.close()
+
+
+class DuckDBFanout(DuckDBManager):
+    """Scan a DuckDB table once and stream every batch to several sinks concurrently."""
+
+    def __init__(self, db_path=None, batch_size=10_000, queue_size=4, read_only=True, **kwargs):
+        super().__init__(db_path, read_only=read_only, **kwargs)
+        self.batch_size = batch_size
+        # Each sink buffers at most queue_size batches; a slow sink then blocks
+        # the scan (backpressure) instead of letting memory grow without bound.
+        self.queue_size = queue_size
+        self.sinks = []
+
+    def add_sink(self, sink):
+        """Register a sink, keeping sink names unique so their stats don't collide."""
+        names = {existing.name for existing in self.sinks}
+        if sink.name in names:
+            sink.name = f"{sink.name}#{len(self.sinks)}"
+        self.sinks.append(sink)
+
+    def add_csv_sink(self, output_file):
+        self.add_sink(CSVSink(output_file))
+
+    def add_parquet_sink(self, output_file, compression="zstd", row_group_size=None):
+        self.add_sink(ParquetSink(output_file, compression, row_group_size))
+
+    def add_sqlite_sink(self, sqlite_db_path, table_name):
+        self.add_sink(AttachedSink(f"sqlite:{sqlite_db_path}", sqlite_db_path, "SQLITE", table_name))
+
+    def add_psql_sink(self, psql_conn_string, table_name):
+        host = re.search(r"host=(\S+)", psql_conn_string)
+        label = host.group(1) if host else "postgres"
+        self.add_sink(AttachedSink(f"psql:{label}", psql_conn_string, "POSTGRES", table_name))
+
+    def run_sink(self, sink, batches, stats, scanned):
+        """Worker loop: drain one sink's queue until the end-of-scan marker arrives, then finish the sink."""
+        while True:
+            rows = batches.get()
+            if rows is None:
+                break
+            if stats["error"]:
+                # Keep draining so a failed sink never stalls the scan.
+                continue
+            started = time.perf_counter()
+            try:
+                with self.stage("insert"):
+                    sink.write(rows)
+                stats["rows"] += len(rows)
+            except Exception as e:
+                stats["error"] = str(e)
+            stats["write_seconds"] += time.perf_counter() - started
+        # Sinks that write on finish (Parquet) only do so after a complete scan.
+        if scanned.is_set() and not stats["error"]:
+            started = time.perf_counter()
+            try:
+                with self.stage("export"):
+                    sink.finish()
+            except Exception as e:
+                stats["error"] = str(e)
+            stats["write_seconds"] += time.perf_counter() - started
+
+    def fanout_table(self, table_name, schema=None):
+        """Stream a table to every configured sink in a single scan and return per-sink stats."""
+        if not self.sinks:
+            raise ValueError("No sinks configured for fan-out.")
+
+        table = f"{schema}.{table_name}" if schema else table_name
+        try:
+            table_info = self.duckdb_conn.execute(f"PRAGMA table_info('{table}')").fetchall()
+            columns = [column[1] for column in table_info]
+            column_definitions = [f"{column[1]} {column[2]}" for column in table_info]
+
+            for index, sink in enumerate(self.sinks):
+                if isinstance(sink, AttachedSink):
+                    sink.open_cursor(self.duckdb_conn, f"fanout_sink_{index}", self.attach_options(sink.attach_type))
+                sink.open(columns, column_definitions)
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Failed to prepare sinks: {e}")
+            for sink in self.sinks:
+                sink.close()
+            raise
+
+        stats = {sink.name: {"rows": 0, "write_seconds": 0.0, "blocked_seconds": 0.0, "error": None} for sink in self.sinks}
+        queues = {sink.name: queue.Queue(maxsize=self.queue_size) for sink in self.sinks}
+        scanned = threading.Event()
+        workers = [
+            threading.Thread(target=self.run_sink, args=(sink, queues[sink.name], stats[sink.name], scanned), daemon=True)
+            for sink in self.sinks
+        ]
+        for worker in workers:
+            worker.start()
+
+        self.log(f"{Fore.BLUE}Fanning out '{table}' to {len(self.sinks)} sinks... 📊")
+        started = time.perf_counter()
+        try:
+            scan = self.duckdb_conn.cursor()
+            with self.stage("scan"):
+                scan.execute(f"SELECT * FROM {table}")
+            while True:
+                with self.stage("scan"):
+                    rows = scan.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for name, batches in queues.items():
+                    put_started = time.perf_counter()
+                    batches.put(rows)
+                    stats[name]["blocked_seconds"] += time.perf_counter() - put_started
+            scan.close()
+            scanned.set()
+        finally:
+            for batches in queues.values():
+                batches.put(None)
+            for worker in workers:
+                worker.join()
+            for sink in self.sinks:
+                sink.close()
+
+        self.log(f"{Fore.BLUE}Scan finished in {time.perf_counter() - started:.2f}s.")
+        for name, sink_stats in stats.items():
+            write_seconds = sink_stats["write_seconds"]
+            sink_stats["rows_per_second"] = sink_stats["rows"] / write_seconds if write_seconds else 0.0
+            if sink_stats["error"]:
+                self.log(f"{Fore.RED}❌ {name}: failed after {sink_stats['rows']} rows: {sink_stats['error']}")
+            else:
+                self.log(
+                    f"{Fore.GREEN}✅ {name}: {sink_stats['rows']} rows, "
+                    f"{sink_stats['rows_per_second']:.0f} rows/s, "
+                    f"{sink_stats['write_seconds']:.2f}s writing, "
+                    f"scan blocked {sink_stats['blocked_seconds']:.2f}s"
+                )
+        return stats
+
+def main():
+    """Main entry point for fanning out a DuckDB table to several sinks."""
+    parser = argparse.ArgumentParser(description="Stream one DuckDB table to several sinks in a single scan.")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file (leave blank for in-memory).")
+    parser.add_argument('--table', type=str, help="Source table in DuckDB.")
+    parser.add_argument('--schema', type=str, help="Optional schema for the table.")
+    parser.add_argument('--newtable', type=str, help="Target table name in SQLite/PostgreSQL (default: source table name).")
+    parser.add_argument('--csv', type=str, action='append', default=[], help="CSV output file (repeatable).")
+    parser.add_argument('--sqlite', type=str, action='append', default=[], help="SQLite database path (repeatable).")
+    parser.add_argument('--psql', type=str, action='append', default=[], help="PostgreSQL connection string (repeatable).")
+    parser.add_argument('--parquet', type=str, action='append', default=[], help="Parquet output file (repeatable).")
+    parser.add_argument('--compression', type=str, default='zstd', help="Parquet compression codec (default: zstd).")
+    parser.add_argument('--row-group-size', type=int, help="Rows per Parquet row group (default: DuckDB's).")
+    parser.add_argument('--batch-size', type=int, default=10_000, help="Rows per scanned batch (default: 10000).")
+    parser.add_argument('--queue-size', type=int, default=4, help="Batches buffered per sink before the scan waits (default: 4).")
+    args = parser.parse_args()
+
+    if not args.table or not (args.csv or args.parquet or args.sqlite or args.psql):
+        print(f"{Fore.RED}❌ Error: '--table' and at least one of '--csv', '--parquet', '--sqlite' or '--psql' are required.")
+        return
+
+    target_table = args.newtable or args.table
+    db_tool = DuckDBFanout(args.db, batch_size=args.batch_size, queue_size=args.queue_size)
+    for output_file in args.csv:
+        db_tool.add_csv_sink(output_file)
+    for output_file in args.parquet:
+        db_tool.add_parquet_sink(output_file, args.compression, args.row_group_size)
+    for sqlite_db_path in args.sqlite:
+        db_tool.add_sqlite_sink(sqlite_db_path, target_table)
+    for psql_conn_string in args.psql:
+        db_tool.add_psql_sink(psql_conn_string, target_table)
+
+    try:
+        db_tool.connect_to_duckdb()
+        stats = db_tool.fanout_table(args.table, args.schema)
+    except Exception as e:
+        print(f"{Fore.RED}❌ An error occurred: {e}")
+        return
+    finally:
+        db_tool.close_duckdb_conn()
+
+    if any(sink_stats["error"] for sink_stats in stats.values()):
+        print(f"{Fore.RED}❌ Fan-out finished with failed sinks.")
+    else:
+        print(f"{Fore.GREEN}✅ Export completed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.transforms import quote
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class ShardedExport(DuckDBManager):
+    """
+    Split one table's export into shards that independent workers claim and export.
+
+    A coordinator writes a manifest describing each shard as a predicate on a key:
+    ``hash(key) % N = i``, or a key range cut at quantiles. Workers can be local
+    processes or other nodes reading their own copy of the file. A worker claims a
+    shard by creating its claim file with O_EXCL. It writes the shard to a temporary
+    file, renames it into place and records a done marker. While it works, the worker
+    touches its claim file. If a worker dies, its claim goes stale and another worker
+    takes the shard over, so a re-run only redoes unfinished shards. Shard outputs are
+    combined through the manifest.
+
+    PostgreSQL shards have no file to rename, so each insert commits together with a
+    row in a shard log table on the server; a shard found there is never inserted twice.
+    """
+
+    MANIFEST = "manifest.json"
+    CLAIMS = ".claims"
+    FORMATS = ("parquet", "csv", "json", "psql")
+    METHODS = ("hash", "range")
+    HEARTBEAT_SECONDS = 10
+    STALE_SECONDS = 60
+    # Kept in PostgreSQL under DuckDBManager.BOOKKEEPING_SCHEMA.
+    SHARD_LOG = "shard_log"
+
+    def __init__(self, db_path=None, read_only=True, stale_seconds=STALE_SECONDS, **kwargs):
+        super().__init__(db_path, read_only=read_only, **kwargs)
+        self.stale_seconds = stale_seconds
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def literal(value):
+        if value is None:
+            return "NULL"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return repr(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def shard_predicates(self, source, key_columns, shards, method="hash"):
+        """One WHERE predicate per shard; together they cover every row exactly once."""
+        if shards == 1:
+            return ["TRUE"]
+        if method == "hash":
+            key = ", ".join(quote(column) for column in key_columns)
+            return [f"hash({key}) % {shards} = {i}" for i in range(shards)]
+        if len(key_columns) != 1:
+            raise ValueError("Range shards need a single key column.")
+        key = quote(key_columns[0])
+        fractions = ", ".join(str(i / shards) for i in range(1, shards))
+        bounds = self.duckdb_conn.execute(f"SELECT quantile_disc({key}, [{fractions}]) FROM {source};").fetchone()[0] or []
+        bounds = [self.literal(bound) for bound in bounds]
+        if not bounds:
+            # Empty table: the first shard takes everything (nothing).
+            return ["TRUE"] + ["FALSE"] * (shards - 1)
+        predicates = [f"({key} < {bounds[0]} OR {key} IS NULL)"]
+        predicates += [f"{key} >= {low} AND {key} < {high}" for low, high in zip(bounds, bounds[1:])]
+        predicates.append(f"{key} >= {bounds[-1]}")
+        return predicates
+
+    def plan(self, table, key_columns, shards, output_dir, output_format="parquet", method="hash", schema=None, target_table=None):
+        """Write the manifest for exporting ``table`` in ``shards`` pieces; returns the manifest."""
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unknown format '{output_format}'; expected one of {', '.join(self.FORMATS)}.")
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown shard method '{method}'; expected 'hash' or 'range'.")
+        source = f"{schema}.{table}" if schema else table
+        predicates = self.shard_predicates(source, key_columns, shards, method)
+        rows = self.duckdb_conn.execute(f"SELECT count(*) FROM {source};").fetchone()[0]
+        manifest = {
+            # Identifies this plan's shards in the PostgreSQL shard log.
+            "id": uuid.uuid4().hex,
+            "db": self.duckdb_path,
+            "table": table,
+            "schema": schema,
+            "key": list(key_columns),
+            "method": method,
+            "format": output_format,
+            "target_table": (target_table or table) if output_format == "psql" else None,
+            "rows": rows,
+            "shards": [
+                {
+                    "id": i,
+                    "predicate": predicate,
+                    "output": None if output_format == "psql" else f"{table}.shard-{i:04d}.{output_format}",
+                }
+                for i, predicate in enumerate(predicates)
+            ],
+        }
+        os.makedirs(os.path.join(output_dir, self.CLAIMS), exist_ok=True)
+        path = os.path.join(output_dir, self.MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+        self.log(f"{Fore.GREEN}🗺 Planned {len(predicates)} {method} shard(s) of '{source}' ({rows:,} rows) in '{path}'.")
+        return manifest
+
+    @classmethod
+    def read_manifest(cls, manifest_path):
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    @classmethod
+    def marker(cls, manifest_dir, shard_id, kind):
+        return os.path.join(manifest_dir, cls.CLAIMS, f"shard-{shard_id:04d}.{kind}")
+
+    @classmethod
+    def done(cls, manifest_dir, shard_id):
+        """The done marker of a finished shard ({worker, rows, seconds}), or None."""
+        try:
+            with open(cls.marker(manifest_dir, shard_id, "done")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def claim(self, manifest_dir, shard_id):
+        """Claim a shard for this worker; False when it is done or claimed by a live worker."""
+        path = self.marker(manifest_dir, shard_id, "claim")
+        for _ in range(2):
+            if self.done(manifest_dir, shard_id):
+                return False
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - os.path.getmtime(path)
+                except FileNotFoundError:
+                    continue
+                if age < self.stale_seconds:
+                    return False
+                # The claimant stopped touching its claim: move it aside and race for the shard once more.
+                try:
+                    os.rename(path, f"{path}.stale-{self.worker.replace(':', '-')}")
+                    self.log(f"{Fore.YELLOW}♻️ Taking over shard {shard_id} from a stale claim ({age:.0f}s old).")
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(self.worker)
+            return True
+        return False
+
+    def heartbeat(self, claim_path, stop):
+        """Touch the claim file until ``stop`` is set, well within the stale timeout."""
+        while not stop.wait(min(self.HEARTBEAT_SECONDS, self.stale_seconds / 3)):
+            try:
+                os.utime(claim_path)
+            except FileNotFoundError:
+                return
+
+    def ensure_shard_log(self):
+        """Create the PostgreSQL shard log if needed and return its qualified name."""
+        schema = f"postgres_db.{self.BOOKKEEPING_SCHEMA}"
+        self.duckdb_conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+        self.duckdb_conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.{self.SHARD_LOG} (
+                manifest_id VARCHAR,
+                shard_id INTEGER,
+                worker VARCHAR,
+                rows BIGINT,
+                finished_at TIMESTAMP,
+                PRIMARY KEY (manifest_id, shard_id)
+            );
+        """)
+        return f"{schema}.{self.SHARD_LOG}"
+
+    def insert_shard(self, manifest, manifest_dir, shard, query):
+        """
+        Insert one shard into PostgreSQL and log it in the same transaction.
+
+        A worker killed between the commit and its done marker leaves the shard in the
+        log, so whoever takes the shard over records it as done instead of inserting
+        the rows a second time.
+        """
+        log = self.ensure_shard_log()
+        manifest_id = manifest.get("id") or manifest_dir
+        logged = self.duckdb_conn.execute(
+            f"SELECT rows FROM {log} WHERE manifest_id = ? AND shard_id = ?;", [manifest_id, shard["id"]]
+        ).fetchone()
+        if logged:
+            self.log(f"{Fore.YELLOW}⏭ Shard {shard['id']} was already committed to PostgreSQL; recording it as done.")
+            return logged[0]
+        self.duckdb_conn.execute("BEGIN TRANSACTION;")
+        try:
+            with self.stage("insert"):
+                rows = self.duckdb_conn.execute(f"INSERT INTO postgres_db.{manifest['target_table']} {query};").fetchone()[0]
+            self.duckdb_conn.execute(
+                f"INSERT INTO {log} VALUES (?, ?, ?, ?, now());", [manifest_id, shard["id"], self.worker, rows]
+            )
+            self.duckdb_conn.execute("COMMIT;")
+        except Exception:
+            self.duckdb_conn.execute("ROLLBACK;")
+            raise
+        return rows
+
+    def export_shard(self, manifest, manifest_dir, shard):
+        """Export one shard; file outputs appear atomically, PostgreSQL inserts commit with their log entry."""
+        source = f"{manifest['schema']}.{manifest['table']}" if manifest["schema"] else manifest["table"]
+        query = f"SELECT * FROM {source} WHERE {shard['predicate']}"
+        if manifest["format"] == "psql":
+            return self.insert_shard(manifest, manifest_dir, shard, query)
+        options = {
+            "parquet": "FORMAT PARQUET",
+            "csv": "HEADER, DELIMITER ','",
+            "json": "FORMAT JSON",
+        }[manifest["format"]]
+        output = os.path.join(manifest_dir, shard["output"])
+        partial = f"{output}.{self.worker.replace(':', '-')}.tmp"
+        try:
+            with self.stage("export"):
+                rows = self.duckdb_conn.execute(f"COPY ({query}) TO '{partial}' ({options});").fetchone()[0]
+        except Exception:
+            # A failed COPY can leave a partial file behind; don't let it pile up in the shared directory.
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        os.replace(partial, output)
+        return rows
+
+    def work(self, manifest_path, max_shards=None):
+        """Claim and export shards until none is left (or ``max_shards`` are done); returns their ids."""
+        manifest = self.read_manifest(manifest_path)
+        manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        exported = []
+        for shard in manifest["shards"]:
+            if max_shards is not None and len(exported) >= max_shards:
+                break
+            if not self.claim(manifest_dir, shard["id"]):
+                continue
+            claim_path = self.marker(manifest_dir, shard["id"], "claim")
+            stop = threading.Event()
+            beat = threading.Thread(target=self.heartbeat, args=(claim_path, stop), daemon=True)
+            beat.start()
+            started = time.perf_counter()
+            try:
+                rows = self.export_shard(manifest, manifest_dir, shard)
+            except Exception:
+                stop.set()
+                os.remove(claim_path)
+                raise
+            stop.set()
+            beat.join()
+            done = {"worker": self.worker, "rows": rows, "seconds": round(time.perf_counter() - started, 3)}
+            done_path = self.marker(manifest_dir, shard["id"], "done")
+            with open(done_path + ".tmp", "w") as f:
+                json.dump(done, f)
+            os.replace(done_path + ".tmp", done_path)
+            os.remove(claim_path)
+            exported.append(shard["id"])
+            self.log(f"{Fore.GREEN}✅ Shard {shard['id']}: {rows:,} rows in {done['seconds']:.1f}s.")
+        self.log(f"{Fore.GREEN}✅ Worker {self.worker} exported {len(exported)} shard(s).")
+        return exported
+
+    def combine(self, manifest_path, output=None):
+        """
+        Check every shard is done and the row counts add up, then (for file formats)
+        concatenate the shard files into ``output`` when one is given. Returns the rows.
+        """
+        manifest = self.read_manifest(manifest_path)
+        manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        markers = {shard["id"]: self.done(manifest_dir, shard["id"]) for shard in manifest["shards"]}
+        missing = [shard_id for shard_id, done in markers.items() if not done]
+        if missing:
+            raise RuntimeError(f"{len(missing)} shard(s) not exported yet: {missing}.")
+        rows = sum(done["rows"] for done in markers.values())
+        if rows != manifest["rows"]:
+            raise RuntimeError(f"Shards hold {rows:,} rows but the table had {manifest['rows']:,} when planned; "
+                               f"were the workers reading different copies?")
+
+        if output and manifest["format"] != "psql":
+            files = [os.path.join(manifest_dir, shard["output"]) for shard in manifest["shards"]]
+            if manifest["format"] == "parquet":
+                file_list = ", ".join(f"'{path}'" for path in files)
+                self.duckdb_conn.execute(f"COPY (SELECT * FROM read_parquet([{file_list}])) TO '{output}' (FORMAT PARQUET);")
+            else:
+                # CSV/NDJSON shards are concatenated as is, keeping only the first CSV header.
+                with open(output, "wb") as out:
+                    for index, path in enumerate(files):
+                        with open(path, "rb") as f:
+                            if manifest["format"] == "csv" and index:
+                                f.readline()
+                            while chunk := f.read(1024 * 1024):
+                                out.write(chunk)
+            self.log(f"{Fore.GREEN}✅ Combined {len(files)} shard(s) into '{output}'.")
+        self.log(f"{Fore.GREEN}✅ All {len(markers)} shard(s) of '{manifest['table']}' done, {rows:,} rows.")
+        return rows
+
+    def attach_postgresql(self, psql_conn_string):
+        self.duckdb_conn.execute(f"ATTACH '{psql_conn_string}' AS postgres_db {self.attach_options('POSTGRES')};")
+
+
+def work_manifest(manifest_path, db_path=None, psql_conn_string=None, max_shards=None, stale_seconds=ShardedExport.STALE_SECONDS):
+    """Run one worker over a manifest; used directly and as the body of each local worker process."""
+    manifest = ShardedExport.read_manifest(manifest_path)
+    db_tool = ShardedExport(db_path or manifest["db"], stale_seconds=stale_seconds)
+    db_tool.connect_to_duckdb()
+    try:
+        if manifest["format"] == "psql":
+            db_tool.attach_postgresql(psql_conn_string)
+        return db_tool.work(manifest_path, max_shards)
+    finally:
+        db_tool.close_duckdb_conn()
+
+
+def shard_plan_main():
+    """Main entry point for planning a sharded export."""
+    parser = argparse.ArgumentParser(description="Write a manifest that splits a table's export into shards.")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file.")
+    parser.add_argument('--table', type=str, help="Table to export.")
+    parser.add_argument('--schema', type=str, help="Optional schema for the table.")
+    parser.add_argument('--key', type=str, nargs='+', help="Column(s) the shards are cut on.")
+    parser.add_argument('--shards', type=int, help="Number of shards.")
+    parser.add_argument('--method', choices=ShardedExport.METHODS, default="hash", help="'hash' (hash(key) %% N) or 'range' (quantiles of one key column) (default: hash).")
+    parser.add_argument('--format', choices=ShardedExport.FORMATS, default="parquet", help="Shard output format; 'psql' inserts into a PostgreSQL table (default: parquet).")
+    parser.add_argument('--output-dir', type=str, help="Directory for the manifest and shard files, shared by all workers.")
+    parser.add_argument('--psql', type=str, help="With --format psql: connection string used to create the target table.")
+    parser.add_argument('--target-table', type=str, help="With --format psql: target table name (default: the source table's name).")
+    args = parser.parse_args()
+
+    if not (args.db and args.table and args.key and args.shards and args.output_dir):
+        print(f"{Fore.RED}❌ Error: '--db', '--table', '--key', '--shards' and '--output-dir' are required.")
+        return
+    if args.format == "psql" and not args.psql:
+        print(f"{Fore.RED}❌ Error: '--psql' is required with '--format psql'.")
+        return
+
+    db_tool = ShardedExport(args.db)
+    try:
+        db_tool.connect_to_duckdb()
+        manifest = db_tool.plan(args.table, args.key, args.shards, args.output_dir, args.format, args.method, args.schema, args.target_table)
+        if args.format == "psql":
+            # Created once here, so concurrent workers never race on CREATE TABLE.
+            from mamaduck.sink.to_psql import DuckDBToPostgreSQL
+            psql_tool = DuckDBToPostgreSQL(psql_conn_string=args.psql, duckdb_conn=db_tool.duckdb_conn)
+            psql_tool.attach_postgresql()
+            source = f"{args.schema}.{args.table}" if args.schema else args.table
+            psql_tool.create_table_in_psql(manifest["target_table"], psql_tool.get_table_columns(source))
+    except Exception as e:
+        print(f"{Fore.RED}❌ Planning failed: {e}")
+    finally:
+        db_tool.close_duckdb_conn()
+
+def shard_work_main():
+    """Main entry point for a sharded export worker."""
+    parser = argparse.ArgumentParser(description="Claim and export shards listed in a manifest.")
+    parser.add_argument('--manifest', type=str, help="Manifest written by 'shard_plan'.")
+    parser.add_argument('--db', type=str, help="This node's copy of the DuckDB file (default: the manifest's 'db').")
+    parser.add_argument('--psql', type=str, help="PostgreSQL connection string for 'psql' manifests.")
+    parser.add_argument('--processes', type=int, default=1, help="Local worker processes (default: 1).")
+    parser.add_argument('--max-shards', type=int, help="Stop after exporting this many shards (per process).")
+    parser.add_argument('--stale-after', type=float, default=ShardedExport.STALE_SECONDS, help="Take over claims not refreshed for this many seconds (default: 60).")
+    args = parser.parse_args()
+
+    if not args.manifest:
+        print(f"{Fore.RED}❌ Error: '--manifest' is required.")
+        return
+
+    try:
+        if ShardedExport.read_manifest(args.manifest)["format"] == "psql" and not args.psql:
+            print(f"{Fore.RED}❌ Error: '--psql' is required for a 'psql' manifest.")
+            return
+        work_args = (args.manifest, args.db, args.psql, args.max_shards, args.stale_after)
+        if args.processes > 1:
+            with ProcessPoolExecutor(max_workers=args.processes) as pool:
+                futures = [pool.submit(work_manifest, *work_args) for _ in range(args.processes)]
+                exported = sum(len(future.result()) for future in futures)
+        else:
+            exported = len(work_manifest(*work_args))
+    except Exception as e:
+        print(f"{Fore.RED}❌ Worker failed: {e}")
+        return
+    print(f"{Fore.GREEN}✅ Exported {exported} shard(s).")
+
+def shard_combine_main():
+    """Main entry point for combining a sharded export."""
+    parser = argparse.ArgumentParser(description="Verify a sharded export and combine its shard files.")
+    parser.add_argument('--manifest', type=str, help="Manifest written by 'shard_plan'.")
+    parser.add_argument('--output', type=str, help="Single file to combine the shards into (optional).")
+    args = parser.parse_args()
+
+    if not args.manifest:
+        print(f"{Fore.RED}❌ Error: '--manifest' is required.")
+        return
+
+    db_tool = ShardedExport()
+    try:
+        db_tool.connect_to_duckdb()
+        db_tool.combine(args.manifest, args.output)
+    except Exception as e:
+        print(f"{Fore.RED}❌ Combine failed: {e}")
+    finally:
+        db_tool.close_duckdb_conn()
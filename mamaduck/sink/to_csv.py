@@ -1,26 +1,92 @@
 import argparse
 import duckdb
+import io
 import os
+import sys
+import threading
 from colorama import Fore, Style, init
 from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.readers import ReaderSnapshot, export_tables_parallel
 
 # Initialize colorama for colored CLI output
 init(autoreset=True)
 
 class DuckDBToCSV(DuckDBManager):
+    # '--output -' streams the table to standard output instead of a file.
+    STDOUT_MARKER = "-"
+    STREAM_FORMATS = {"csv": "FORMAT CSV, HEADER", "json": "FORMAT JSON"}
+    # Bytes relayed from the COPY pipe to the output stream per read.
+    STREAM_CHUNK_SIZE = 1 << 16
 
-    def __init__(self, db_path):
-        super().__init__(db_path)
+    def __init__(self, db_path, read_only=True, **kwargs):
+        super().__init__(db_path, read_only=read_only, **kwargs)
 
-    def export_table_to_csv(self, table_name, output_file, schema=None):
-        """Export DuckDB table to CSV."""
+    def export_table_to_csv(self, table_name, output_file, schema=None, output_format="csv"):
+        """Export DuckDB table to CSV (or newline-delimited JSON)."""
         try:
             table = f"{schema}.{table_name}" if schema else table_name
-            print(f"{Fore.BLUE}Exporting '{table}' to '{output_file}'... 📊")
-            self.duckdb_conn.execute(f"COPY {table} TO '{output_file}' WITH (HEADER, DELIMITER ',');")
-            print(f"{Fore.GREEN}Exported successfully to {output_file} ✅")
+            self.log(f"{Fore.BLUE}Exporting '{table}' to '{output_file}'... 📊")
+            with self.stage("export"):
+                if output_format == "json":
+                    self.duckdb_conn.execute(f"COPY {table} TO '{output_file}' (FORMAT JSON);")
+                else:
+                    self.duckdb_conn.execute(f"COPY {table} TO '{output_file}' WITH (HEADER, DELIMITER ',');")
+            self.log(f"{Fore.GREEN}Exported successfully to {output_file} ✅")
         except Exception as e:
-            print(f"{Fore.RED}Export failed: {e} ❌")
+            self.log(f"{Fore.RED}Export failed: {e} ❌")
+            raise
+
+    def stream_query(self, query, output_format="csv", stream=None):
+        """
+        Write a query's result to a stream as CSV or newline-delimited JSON.
+
+        DuckDB's COPY formats the rows and writes them into a pipe, so streamed values
+        look exactly like a COPY to a file; this thread only relays the bytes.
+        """
+        stream = stream or sys.stdout
+        query = query.strip().rstrip(";")
+        read_fd, write_fd = os.pipe()
+        result = {}
+
+        def copy():
+            try:
+                result["rows"] = self.duckdb_conn.execute(
+                    f"COPY ({query}) TO '/dev/fd/{write_fd}' ({self.STREAM_FORMATS[output_format]});"
+                ).fetchone()[0]
+            except Exception as e:
+                result["error"] = e
+            finally:
+                os.close(write_fd)
+
+        # Real stdout gets the bytes as-is; text streams (e.g. io.StringIO) get decoded text.
+        target = getattr(stream, "buffer", None) or stream
+        writer = threading.Thread(target=copy, daemon=True)
+        with self.stage("export"):
+            writer.start()
+            try:
+                with open(read_fd, "rb") as pipe:
+                    source = pipe if target is not stream else io.TextIOWrapper(pipe, encoding="utf-8", newline="")
+                    while chunk := source.read(self.STREAM_CHUNK_SIZE):
+                        target.write(chunk)
+            finally:
+                # The read end is closed by now, so COPY fails fast instead of blocking
+                # when the downstream reader went away (e.g. `head`).
+                writer.join()
+        target.flush()
+        if "error" in result:
+            raise result["error"]
+        return result["rows"]
+
+    def stream_table(self, table_name, schema=None, output_format="csv", stream=None):
+        """Stream a DuckDB table as CSV or newline-delimited JSON."""
+        try:
+            table = f"{schema}.{table_name}" if schema else table_name
+            self.log(f"{Fore.BLUE}Streaming '{table}' to stdout as {output_format.upper()}... 📊")
+            row_count = self.stream_query(f"SELECT * FROM {table};", output_format, stream)
+            self.log(f"{Fore.GREEN}Streamed {row_count} rows from '{table}' ✅")
+            return row_count
+        except Exception as e:
+            self.log(f"{Fore.RED}Export failed: {e} ❌")
             raise
 
 def interactive_mode():
@@ -61,7 +127,12 @@ def main():
     parser.add_argument('--db', type=str, help="Path to DuckDB DB file (leave blank for in-memory).")
     parser.add_argument('--table', type=str, help="Table name to export.")
     parser.add_argument('--schema', type=str, help="Optional schema for the table.")
-    parser.add_argument('--output', type=str, help="Output CSV file path.")
+    parser.add_argument('--output', type=str, help="Output CSV file path ('-' streams to stdout).")
+    parser.add_argument('--format', type=str, choices=['csv', 'json'], default='csv', help="Output format: 'csv' or newline-delimited 'json' (default: csv).")
+    parser.add_argument('--snapshot', action='store_true', help="Export from a private copy of the DB file so loads are not blocked while exporting.")
+    parser.add_argument('--tables', type=str, nargs='+', help="Export several tables into --output-dir from one shared snapshot.")
+    parser.add_argument('--output-dir', type=str, help="Directory for --tables exports (one file per table).")
+    parser.add_argument('--workers', type=int, default=1, help="Reader processes used for --tables (default: 1).")
     parser.add_argument('--cli', action='store_true', help="Run in interactive mode.")
 
     args = parser.parse_args()
@@ -71,28 +142,64 @@ def main():
         interactive_mode()
         return
 
+    if args.tables:
+        if not args.db or not args.output_dir:
+            print(f"{Fore.RED}Error: '--db' and '--output-dir' are required with '--tables'. ⚠️")
+            return
+        try:
+            export_tables_parallel(args.db, args.tables, args.output_dir, args.format, args.workers, args.schema)
+        except Exception as e:
+            print(f"{Fore.RED}Export failed: {e} ❌")
+            return
+        print(f"{Fore.GREEN}✅ Export completed.")
+        return
+
     # Non-interactive mode validation
     if not args.table or not args.output:
         print(f"{Fore.RED}Error: '--table' and '--output' are required. ⚠️")
         return
 
+    # When the data goes to stdout, every status message goes to stderr instead
+    streaming = args.output == DuckDBToCSV.STDOUT_MARKER
+    log_stream = sys.stderr if streaming else sys.stdout
+
     # Default to in-memory if no database path
     db_path = args.db
+    snapshot = None
+    if args.snapshot and db_path:
+        snapshot = ReaderSnapshot(db_path, log_stream=log_stream)
+        try:
+            db_path = snapshot.create()
+        except Exception as e:
+            print(f"{Fore.RED}Snapshot failed: {e} ❌", file=log_stream)
+            return
 
     # Connect to DuckDB and export table to CSV
-    db_tool = DuckDBToCSV(db_path)
+    db_tool = DuckDBToCSV(db_path, log_stream=log_stream)
     try:
         db_tool.connect_to_duckdb()
     except Exception:
+        if snapshot:
+            snapshot.remove()
         return
 
     try:
-        db_tool.export_table_to_csv(args.table, args.output, args.schema)
+        if streaming:
+            db_tool.stream_table(args.table, args.schema, args.format)
+        else:
+            db_tool.export_table_to_csv(args.table, args.output, args.schema, args.format)
+    except BrokenPipeError:
+        # The downstream reader (e.g. `head`) closed the pipe early; stop quietly.
+        sys.stdout = open(os.devnull, "w")
+        return
     except Exception:
         return
-    
-    db_tool.close_duckdb_conn()
-    print(f"{Fore.GREEN}✅ Export completed.")
+    finally:
+        db_tool.close_duckdb_conn()
+        if snapshot:
+            snapshot.remove()
+
+    print(f"{Fore.GREEN}✅ Export completed.", file=log_stream)
 
 if __name__ == "__main__":
     main()
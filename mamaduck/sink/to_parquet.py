@@ -0,0 +1,128 @@
+import argparse
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.readers import ReaderSnapshot, export_tables_parallel
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class DuckDBToParquet(DuckDBManager):
+
+    def __init__(self, db_path, read_only=True, **kwargs):
+        super().__init__(db_path, read_only=read_only, **kwargs)
+
+    def export_table_to_parquet(self, table_name, output_file, schema=None, compression="zstd", row_group_size=None):
+        """Export DuckDB table to a Parquet file."""
+        try:
+            table = f"{schema}.{table_name}" if schema else table_name
+            options = ["FORMAT PARQUET", f"COMPRESSION {compression.upper()}"]
+            if row_group_size:
+                options.append(f"ROW_GROUP_SIZE {int(row_group_size)}")
+            self.log(f"{Fore.BLUE}Exporting '{table}' to '{output_file}'... 📊")
+            with self.stage("export"):
+                self.duckdb_conn.execute(f"COPY {table} TO '{output_file}' ({', '.join(options)});")
+            self.log(f"{Fore.GREEN}Exported successfully to {output_file} ✅")
+        except Exception as e:
+            self.log(f"{Fore.RED}Export failed: {e} ❌")
+            raise
+
+def interactive_mode():
+    """Interactive session for DuckDB to Parquet export."""
+    print(f"{Fore.CYAN}🦆 MamaDuck")
+
+    # Choose database type (in-memory or file)
+    db_choice = input(f"{Fore.CYAN}💡 Use in-memory or persistent file DB? (memory/file): ").strip().lower()
+    if db_choice == 'file':
+        db_path = input(f"{Fore.CYAN}🔑 Enter DuckDB file name (existing/new): ").strip()
+    elif db_choice == 'memory':
+        db_path = None
+    else:
+        print(f"{Fore.RED}❌ Invalid choice. Choose 'memory' or 'file'.")
+        return
+
+    db_tool = DuckDBToParquet(db_path)
+    db_tool.connect_to_duckdb()
+
+    schema = input(f"{Fore.CYAN}Enter schema (optional): ").strip() or None
+    table_name = input(f"{Fore.CYAN}🗃 Enter the DuckDB table to transfer: ").strip()
+    output_file = input(f"{Fore.CYAN}🗂 Enter output Parquet file: ").strip()
+    compression = input(f"{Fore.CYAN}🗜 Compression codec (default: zstd): ").strip() or "zstd"
+
+    try:
+        db_tool.export_table_to_parquet(table_name, output_file, schema, compression)
+    except Exception:
+        return
+
+    db_tool.close_duckdb_conn()
+    print(f"{Fore.GREEN}✅ Export completed.")
+
+def main():
+    """Main entry point for DuckDB to Parquet export."""
+    parser = argparse.ArgumentParser(description="Export DuckDB tables to Parquet.")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file (leave blank for in-memory).")
+    parser.add_argument('--table', type=str, help="Table name to export.")
+    parser.add_argument('--schema', type=str, help="Optional schema for the table.")
+    parser.add_argument('--output', type=str, help="Output Parquet file path.")
+    parser.add_argument('--compression', type=str, default="zstd", help="Compression codec: zstd, snappy, gzip, lz4 or uncompressed (default: zstd).")
+    parser.add_argument('--row-group-size', type=int, help="Rows per Parquet row group (default: DuckDB's default).")
+    parser.add_argument('--snapshot', action='store_true', help="Export from a private copy of the DB file so loads are not blocked while exporting.")
+    parser.add_argument('--tables', type=str, nargs='+', help="Export several tables into --output-dir from one shared snapshot.")
+    parser.add_argument('--output-dir', type=str, help="Directory for --tables exports (one file per table).")
+    parser.add_argument('--workers', type=int, default=1, help="Reader processes used for --tables (default: 1).")
+    parser.add_argument('--cli', action='store_true', help="Run in interactive mode.")
+
+    args = parser.parse_args()
+
+    if args.cli:
+        interactive_mode()
+        return
+
+    if args.tables:
+        if not args.db or not args.output_dir:
+            print(f"{Fore.RED}Error: '--db' and '--output-dir' are required with '--tables'. ⚠️")
+            return
+        options = {"compression": args.compression, "row_group_size": args.row_group_size}
+        try:
+            export_tables_parallel(args.db, args.tables, args.output_dir, "parquet", args.workers, args.schema, options)
+        except Exception as e:
+            print(f"{Fore.RED}Export failed: {e} ❌")
+            return
+        print(f"{Fore.GREEN}✅ Export completed.")
+        return
+
+    if not args.table or not args.output:
+        print(f"{Fore.RED}Error: '--table' and '--output' are required. ⚠️")
+        return
+
+    db_path = args.db
+    snapshot = None
+    if args.snapshot and db_path:
+        snapshot = ReaderSnapshot(db_path)
+        try:
+            db_path = snapshot.create()
+        except Exception as e:
+            print(f"{Fore.RED}Snapshot failed: {e} ❌")
+            return
+
+    db_tool = DuckDBToParquet(db_path)
+    try:
+        db_tool.connect_to_duckdb()
+    except Exception:
+        if snapshot:
+            snapshot.remove()
+        return
+
+    try:
+        db_tool.export_table_to_parquet(args.table, args.output, args.schema, args.compression, args.row_group_size)
+    except Exception:
+        return
+    finally:
+        db_tool.close_duckdb_conn()
+        if snapshot:
+            snapshot.remove()
+
+    print(f"{Fore.GREEN}✅ Export completed.")
+
+if __name__ == "__main__":
+    main()
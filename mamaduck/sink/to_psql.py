@@ -5,6 +5,8 @@ from colorama import Fore, init
 import argparse
 
 from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.batching import AdaptiveBatchSizer, ValueOffloader
+from mamaduck.database.maintenance import DuckDBMaintenance
 
 # Initialize colorama for colored CLI output
 init(autoreset=True)
@@ -12,18 +14,18 @@ init(autoreset=True)
 class DuckDBToPostgreSQL(DuckDBManager):
     DATABASE_FOLDER = "databases"
 
-    def __init__(self, db_path=None, psql_conn_string=None):
-        super().__init__(db_path)
+    def __init__(self, db_path=None, psql_conn_string=None, read_only=True, **kwargs):
+        super().__init__(db_path, read_only=read_only, **kwargs)
         self.psql_conn_string = psql_conn_string
 
     def attach_postgresql(self):
         """Attach a PostgreSQL database to DuckDB using the provided connection string."""
         try:
-            attach_query = f"ATTACH '{self.psql_conn_string}' AS postgres_db (TYPE POSTGRES);"
+            attach_query = f"ATTACH '{self.psql_conn_string}' AS postgres_db {self.attach_options('POSTGRES')};"
             self.duckdb_conn.execute(attach_query)
-            print(f"{Fore.GREEN}✅ Attached PostgreSQL database to DuckDB.")
+            self.log(f"{Fore.GREEN}✅ Attached PostgreSQL database to DuckDB.")
         except Exception as e:
-            print(f"{Fore.RED}❌ Failed to attach PostgreSQL database: {e}")
+            self.log(f"{Fore.RED}❌ Failed to attach PostgreSQL database: {e}")
             raise
 
     def get_table_columns(self, table_name):
@@ -33,7 +35,7 @@ class DuckDBToPostgreSQL(DuckDBManager):
             column_definitions = [f"{column[1]} {column[2]}" for column in columns]
             return column_definitions
         except Exception as e:
-            print(f"{Fore.RED}❌ Failed to retrieve table columns: {e}")
+            self.log(f"{Fore.RED}❌ Failed to retrieve table columns: {e}")
             raise
 
     def create_table_in_psql(self, table_name, column_definitions):
@@ -41,20 +43,41 @@ class DuckDBToPostgreSQL(DuckDBManager):
         try:
             create_table_query = f"CREATE TABLE IF NOT EXISTS postgres_db.{table_name} ({', '.join(column_definitions)});"
             self.duckdb_conn.execute(create_table_query)
-            print(f"{Fore.GREEN}✅ Created table '{table_name}' in PostgreSQL.")
+            self.log(f"{Fore.GREEN}✅ Created table '{table_name}' in PostgreSQL.")
         except Exception as e:
-            print(f"{Fore.RED}❌ Failed to create table in PostgreSQL: {e}")
+            self.log(f"{Fore.RED}❌ Failed to create table in PostgreSQL: {e}")
             raise
 
-    def transfer_data_to_psql(self, source_table_name, psql_table_name):
-        """Transfer data from DuckDB to PostgreSQL."""
+    def transfer_data_to_psql(self, source_table_name, psql_table_name, batch_sizer=None, offloader=None):
+        """
+        Transfer data from DuckDB to PostgreSQL in batches sized by latency and bytes.
+
+        With an ``offloader``, oversized text/binary values go to side files and the
+        target stores a reference instead.
+        """
         try:
-            data = self.duckdb_conn.execute(f"SELECT * FROM {source_table_name}").fetchall()
-            insert_query = f"INSERT INTO postgres_db.{psql_table_name} VALUES ({', '.join(['?' for _ in data[0]])})"
-            self.duckdb_conn.executemany(insert_query, data)
-            print(f"{Fore.GREEN}✅ Data successfully transferred from '{source_table_name}' to PostgreSQL table '{psql_table_name}'.")
+            # Scan on a separate cursor so the inserts don't cancel the pending result.
+            scan = self.duckdb_conn.cursor()
+            with self.stage("scan"):
+                scan.execute(f"SELECT * FROM {source_table_name}")
+            insert_query = f"INSERT INTO postgres_db.{psql_table_name} VALUES ({', '.join(['?' for _ in scan.description])})"
+            batch_sizer = batch_sizer or AdaptiveBatchSizer()
+
+            def write(batch):
+                if offloader:
+                    with self.stage("transform"):
+                        batch = offloader.apply(batch)
+                with self.stage("insert"):
+                    self.duckdb_conn.executemany(insert_query, batch)
+
+            rows = batch_sizer.transfer(scan, write, self.stage)
+            scan.close()
+            if offloader and offloader.values:
+                self.log(f"{Fore.CYAN}📦 Offloaded {offloader.values} oversized value(s) ({offloader.bytes / 1024 / 1024:.1f} MB) to '{offloader.directory}'.")
+            self.log(f"{Fore.GREEN}✅ {rows} rows transferred from '{source_table_name}' to PostgreSQL table '{psql_table_name}' "
+                     f"in {batch_sizer.batches} batches.")
         except Exception as e:
-            print(f"{Fore.RED}❌ Failed to transfer data: {e}")
+            self.log(f"{Fore.RED}❌ Failed to transfer data: {e}")
             raise
 
 def get_postgresql_connection_string():
@@ -102,6 +125,12 @@ def main():
     parser.add_argument("--psql", help="PostgreSQL connection string")
     parser.add_argument("--table", help="Name of the source table in DuckDB")
     parser.add_argument("--output", help="Name of the target table in PostgreSQL")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Initial rows per insert batch; adapted to measured latency (default: 1000)")
+    parser.add_argument("--max-batch-memory", type=int, default=256, help="Memory ceiling per batch in MB (default: 256)")
+    parser.add_argument("--max-rows-per-second", type=int, help="Throttle inserts to at most this many rows per second")
+    parser.add_argument("--offload-over", type=int, help="Write text/binary values larger than this many bytes to side files and store a reference instead")
+    parser.add_argument("--offload-dir", default="offloaded", help="Directory for offloaded values (default: offloaded)")
+    parser.add_argument("--analyze", action="store_true", help="ANALYZE the target table afterwards, so PostgreSQL plans with fresh statistics")
 
     args = parser.parse_args()
 
@@ -129,7 +158,15 @@ def main():
         # Transfer data
         column_definitions = db_tool.get_table_columns(args.table)
         db_tool.create_table_in_psql(args.output, column_definitions)
-        db_tool.transfer_data_to_psql(args.table, args.output)
+        batch_sizer = AdaptiveBatchSizer(
+            initial_size=args.batch_size,
+            memory_limit_bytes=args.max_batch_memory * 1024 * 1024,
+            max_rows_per_second=args.max_rows_per_second,
+        )
+        offloader = ValueOffloader(args.offload_dir, args.offload_over) if args.offload_over else None
+        db_tool.transfer_data_to_psql(args.table, args.output, batch_sizer, offloader)
+        if args.analyze:
+            DuckDBMaintenance(duckdb_conn=db_tool.duckdb_conn).analyze_postgres("postgres_db", [args.output])
 
     except Exception as e:
         print(f"{Fore.RED}❌ An error occurred: {e}")
@@ -1,29 +1,55 @@
 import argparse
 import duckdb
 import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from colorama import Fore, init
 
 from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.batching import AdaptiveBatchSizer, ValueOffloader
+from mamaduck.database.maintenance import DuckDBMaintenance
 
 # Initialize colorama for colored CLI output
 init(autoreset=True)
 
 class DuckDBToSQLite(DuckDBManager):
+    MERGE_GROUP_SIZE = 8
 
-    def __init__(self, db_path, sqlite_db_path):
-        super().__init__(db_path)
+    def __init__(self, db_path, sqlite_db_path, read_only=True, **kwargs):
+        super().__init__(db_path, read_only=read_only, **kwargs)
         self.sqlite_db_path = sqlite_db_path
         self.schema = None
 
+    @staticmethod
+    def attach_alias(sqlite_db_path, taken=()):
+        """
+        Derive a valid DuckDB catalog alias from a SQLite file path (e.g. 'out/app.db' ->
+        'sqlite_app'). The prefix keeps it clear of the DuckDB file's own catalog and of
+        'memory', 'system' and 'temp'; a suffix is added if it is still in ``taken``.
+        """
+        stem = os.path.splitext(os.path.basename(sqlite_db_path))[0]
+        alias = re.sub(r"\W", "_", stem)
+        alias = alias if alias.startswith("sqlite_") else f"sqlite_{alias}".rstrip("_")
+        candidate, index = alias, 1
+        while candidate in taken:
+            index += 1
+            candidate = f"{alias}_{index}"
+        return candidate
+
     def attach_sqlite_database(self):
-        """Attach SQLite database."""
-        self.schema = self.sqlite_db_path.replace('.', '_') # Implement to handle better cases
+        """Attach SQLite database (once per tool instance)."""
+        if self.schema:
+            return
+        taken = {row[0] for row in self.duckdb_conn.execute("SELECT database_name FROM duckdb_databases();").fetchall()}
+        schema = self.attach_alias(self.sqlite_db_path, taken)
 
         try:
-            self.duckdb_conn.execute(f"ATTACH '{self.sqlite_db_path}' AS {self.schema} (TYPE SQLITE);")
-            print(f"{Fore.GREEN}✅ Attached SQLite database '{self.sqlite_db_path}'.")
+            self.duckdb_conn.execute(f"ATTACH '{self.sqlite_db_path}' AS {schema} {self.attach_options('SQLITE')};")
+            self.schema = schema
+            self.log(f"{Fore.GREEN}✅ Attached SQLite database '{self.sqlite_db_path}'.")
         except Exception as e:
-            print(f"{Fore.RED}❌ Failed to attach SQLite: {e}")
+            self.log(f"{Fore.RED}❌ Failed to attach SQLite: {e}")
             raise
 
     def get_table_columns(self, table_name):
@@ -32,7 +58,7 @@ class DuckDBToSQLite(DuckDBManager):
             columns = self.duckdb_conn.execute(f"PRAGMA table_info('{table_name}')").fetchall()
             return [f"{column[1]} {column[2]}" for column in columns]
         except Exception as e:
-            print(f"{Fore.RED}❌ Failed to retrieve columns: {e}")
+            self.log(f"{Fore.RED}❌ Failed to retrieve columns: {e}")
             raise
 
     def create_table_in_sqlite(self, table_name, column_definitions):
@@ -40,22 +66,133 @@ class DuckDBToSQLite(DuckDBManager):
         try:
             create_query = f"CREATE TABLE IF NOT EXISTS {self.schema}.{table_name} ({', '.join(column_definitions)});"
             self.duckdb_conn.execute(create_query)
-            print(f"{Fore.GREEN}✅ Table '{table_name}' created in SQLite with schema {self.schema}.")
+            self.log(f"{Fore.GREEN}✅ Table '{table_name}' created in SQLite with schema {self.schema}.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Table creation failed: {e}")
+            raise
+
+    def transfer_data_to_sqlite(self, source_table_name, sqlite_table_name, batch_sizer=None, offloader=None):
+        """
+        Transfer data from DuckDB to SQLite in batches sized by latency and bytes.
+
+        With an ``offloader``, oversized text/binary values go to side files and the
+        target stores a reference instead.
+        """
+        try:
+            # Scan on a separate cursor so the inserts don't cancel the pending result.
+            scan = self.duckdb_conn.cursor()
+            with self.stage("scan"):
+                scan.execute(f"SELECT * FROM {source_table_name}")
+            insert_query = f"INSERT INTO {self.schema}.{sqlite_table_name} VALUES ({', '.join(['?' for _ in scan.description])})"
+            batch_sizer = batch_sizer or AdaptiveBatchSizer()
+
+            def write(batch):
+                if offloader:
+                    with self.stage("transform"):
+                        batch = offloader.apply(batch)
+                with self.stage("insert"):
+                    self.duckdb_conn.executemany(insert_query, batch)
+
+            rows = batch_sizer.transfer(scan, write, self.stage)
+            scan.close()
+            if offloader and offloader.values:
+                self.log(f"{Fore.CYAN}📦 Offloaded {offloader.values} oversized value(s) ({offloader.bytes / 1024 / 1024:.1f} MB) to '{offloader.directory}'.")
+            self.log(f"{Fore.GREEN}✅ {rows} rows transferred from '{source_table_name}' to SQLite '{self.schema}.{sqlite_table_name}' "
+                     f"in {batch_sizer.batches} batches.")
         except Exception as e:
-            print(f"{Fore.RED}❌ Table creation failed: {e}")
+            self.log(f"{Fore.RED}❌ Data transfer failed: {e}")
             raise
 
-    def transfer_data_to_sqlite(self, source_table_name, sqlite_table_name):
-        """Transfer data from DuckDB to SQLite."""
+    def export_schema(self, schema="main", tables=None, parallel=1):
+        """Copy every table of a DuckDB schema (or the given tables) into the SQLite database."""
         try:
-            data = self.duckdb_conn.execute(f"SELECT * FROM {source_table_name}").fetchall()
-            insert_query = f"INSERT INTO {self.schema}.{sqlite_table_name} VALUES ({', '.join(['?' for _ in data[0]])})"
-            self.duckdb_conn.executemany(insert_query, data)
-            print(f"{Fore.GREEN}✅ Data transferred from '{source_table_name}' to SQLite '{self.schema}.{sqlite_table_name}'.")
+            tables = tables or self.get_table_list(schema)
+            if parallel > 1 and len(tables) > 1:
+                self.export_schema_parallel(schema, tables, parallel)
+            else:
+                self.attach_sqlite_database()
+                # One transaction for the whole schema: SQLite syncs to disk once
+                # at COMMIT instead of after every table.
+                self.duckdb_conn.execute("BEGIN TRANSACTION;")
+                try:
+                    for table in tables:
+                        self.log(f"{Fore.CYAN}📤 Copying '{schema}.{table}'...")
+                        # Re-running an export replaces the tables it wrote last time.
+                        self.duckdb_conn.execute(f"DROP TABLE IF EXISTS {self.schema}.{table};")
+                        self.duckdb_conn.execute(f"CREATE TABLE {self.schema}.{table} AS SELECT * FROM {schema}.{table};")
+                    self.duckdb_conn.execute("COMMIT;")
+                except Exception:
+                    self.duckdb_conn.execute("ROLLBACK;")
+                    raise
+            self.log(f"{Fore.GREEN}✅ Exported {len(tables)} tables from schema '{schema}' to '{self.sqlite_db_path}'.")
+            return tables
         except Exception as e:
-            print(f"{Fore.RED}❌ Data transfer failed: {e}")
+            self.log(f"{Fore.RED}❌ Schema export failed: {e}")
             raise
 
+    def build_sqlite_part(self, schema, table, part_path):
+        """Write one table into its own SQLite file on a dedicated cursor."""
+        cursor = self.duckdb_conn.cursor()
+        alias = "part_" + re.sub(r"\W", "_", table)
+        # A part left behind by an interrupted run would already hold the table.
+        for leftover in (part_path, f"{part_path}-journal", f"{part_path}-wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        try:
+            cursor.execute(f"ATTACH '{part_path}' AS {alias} {self.attach_options('SQLITE')};")
+            cursor.execute(f"CREATE TABLE {alias}.{table} AS SELECT * FROM {schema}.{table};")
+            cursor.execute(f"DETACH {alias};")
+        finally:
+            cursor.close()
+        return part_path
+
+    def export_schema_parallel(self, schema, tables, parallel):
+        """
+        Build one SQLite file per table in parallel, then merge them into the target.
+
+        SQLite allows a single writer per file, so the tables are written to separate
+        part files concurrently. The merge then copies the parts' rows into the target
+        with INSERT ... SELECT, a few parts per transaction.
+        """
+        parts = {table: f"{self.sqlite_db_path}.part-{index}" for index, table in enumerate(tables)}
+        try:
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                futures = {table: pool.submit(self.build_sqlite_part, schema, table, part) for table, part in parts.items()}
+                for table, future in futures.items():
+                    future.result()
+                    self.log(f"{Fore.CYAN}📤 Built '{schema}.{table}'.")
+            self.merge_sqlite_parts(self.sqlite_db_path, parts)
+        finally:
+            for part in parts.values():
+                if os.path.exists(part):
+                    os.remove(part)
+
+    @staticmethod
+    def merge_sqlite_parts(sqlite_db_path, parts):
+        """Merge per-table SQLite part files ({table: path}) into one database."""
+        target = sqlite3.connect(sqlite_db_path, isolation_level=None)
+        items = list(parts.items())
+        try:
+            # SQLite can't ATTACH/DETACH inside a transaction and caps attached
+            # databases at 10, so parts are merged in groups, one transaction each.
+            for start in range(0, len(items), DuckDBToSQLite.MERGE_GROUP_SIZE):
+                group = items[start:start + DuckDBToSQLite.MERGE_GROUP_SIZE]
+                for index, (_, part) in enumerate(group):
+                    target.execute(f"ATTACH DATABASE ? AS part_{index};", (part,))
+                target.execute("BEGIN;")
+                for index, (table, _) in enumerate(group):
+                    create_sql = target.execute(
+                        f"SELECT sql FROM part_{index}.sqlite_master WHERE type = 'table' AND name = ?;", (table,)
+                    ).fetchone()[0]
+                    target.execute(f'DROP TABLE IF EXISTS main."{table}";')
+                    target.execute(create_sql)
+                    target.execute(f'INSERT INTO main."{table}" SELECT * FROM part_{index}."{table}";')
+                target.execute("COMMIT;")
+                for index in range(len(group)):
+                    target.execute(f"DETACH DATABASE part_{index};")
+        finally:
+            target.close()
+
 def interactive_mode():
     """Interactive mode to transfer data from DuckDB to SQLite."""
     print(f"{Fore.CYAN}🦆 MamaDuck")
@@ -75,6 +212,7 @@ def interactive_mode():
     sqlite_table_name = input(f"{Fore.CYAN}Enter new SQLite table name: ").strip()
 
     db_tool = DuckDBToSQLite(db_path, sqlite_db_path)
+    db_tool.connect_to_duckdb()
     db_tool.attach_sqlite_database()
 
     column_definitions = db_tool.get_table_columns(source_table_name)
@@ -92,12 +230,38 @@ def main():
     parser.add_argument("--sqlite", help="SQLite database path.")
     parser.add_argument("--table", help="Source table in DuckDB.")
     parser.add_argument("--newtable", help="New table in SQLite.")
+    parser.add_argument("--all-tables", action="store_true", help="Export every table of the DuckDB schema in one run (ignores --table/--newtable).")
+    parser.add_argument("--schema", default="main", help="DuckDB schema to export with --all-tables (default: main).")
+    parser.add_argument("--parallel", type=int, default=1, help="With --all-tables, build this many tables concurrently in separate files and merge them (default: 1).")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Initial rows per insert batch; adapted to measured latency (default: 1000).")
+    parser.add_argument("--max-batch-memory", type=int, default=256, help="Memory ceiling per batch in MB (default: 256).")
+    parser.add_argument("--max-rows-per-second", type=int, help="Throttle inserts to at most this many rows per second.")
+    parser.add_argument("--offload-over", type=int, help="Write text/binary values larger than this many bytes to side files and store a reference instead.")
+    parser.add_argument("--offload-dir", default="offloaded", help="Directory for offloaded values (default: offloaded).")
+    parser.add_argument("--analyze", action="store_true", help="ANALYZE and VACUUM the SQLite file afterwards, reporting bytes reclaimed.")
     args = parser.parse_args()
 
     if args.cli:
         interactive_mode()
         return
 
+    if args.all_tables:
+        if not (args.db and args.sqlite):
+            print(f"{Fore.RED}❌ Missing arguments: --db and --sqlite are required.")
+            return
+        db_tool = DuckDBToSQLite(args.db, args.sqlite)
+        try:
+            db_tool.connect_to_duckdb()
+            db_tool.export_schema(args.schema, parallel=args.parallel)
+        except Exception:
+            return
+        finally:
+            db_tool.close_duckdb_conn()
+        if args.analyze:
+            DuckDBMaintenance.analyze_sqlite(args.sqlite)
+        print(f"{Fore.GREEN}✅ Export completed.")
+        return
+
     if not (args.db and args.sqlite and args.table and args.newtable):
         print(f"{Fore.RED}❌ Missing arguments: --db, --sqlite, --table, and --newtable are required.")
         return
@@ -113,9 +277,18 @@ def main():
 
     column_definitions = db_tool.get_table_columns(source_table_name)
     db_tool.create_table_in_sqlite(sqlite_table_name, column_definitions)
-    db_tool.transfer_data_to_sqlite(source_table_name, sqlite_table_name)
+    batch_sizer = AdaptiveBatchSizer(
+        initial_size=args.batch_size,
+        memory_limit_bytes=args.max_batch_memory * 1024 * 1024,
+        max_rows_per_second=args.max_rows_per_second,
+    )
+    offloader = ValueOffloader(args.offload_dir, args.offload_over) if args.offload_over else None
+    db_tool.transfer_data_to_sqlite(source_table_name, sqlite_table_name, batch_sizer, offloader)
 
     db_tool.close_duckdb_conn()
+    if args.analyze:
+        # After the DuckDB connection (and its attachment) is closed, so VACUUM has the file to itself.
+        DuckDBMaintenance.analyze_sqlite(sqlite_db_path)
     print(f"{Fore.GREEN}✅ Export completed.")
 
 
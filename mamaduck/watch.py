@@ -0,0 +1,220 @@
+import argparse
+import fnmatch
+import json
+import os
+import time
+from colorama import Fore, init
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.enums import EnumConverter
+from mamaduck.database.transforms import load_transform
+from mamaduck.connectors.csv import CSVToDuckDB
+from mamaduck.connectors.psql import PostgreSQLToDuckDB
+from mamaduck.connectors.sqlite import SQLiteToDuckDB
+
+# Initialize colorama for colored CLI output
+init(autoreset=True)
+
+class SyncJob:
+    """One configured sync: what to run, how often, and which path to watch for changes."""
+
+    def __init__(self, name, action, interval=None, watch_path=None, pattern="*"):
+        self.name = name
+        self.action = action
+        self.interval = interval
+        self.watch_path = watch_path
+        self.pattern = pattern
+        self.last_run = None
+        self.last_signature = None
+        self.runs = 0
+
+    def path_signature(self):
+        """Cheap change detector: names, sizes and mtimes of the watched file or directory entries."""
+        if not self.watch_path or not os.path.exists(self.watch_path):
+            return None
+        if os.path.isdir(self.watch_path):
+            entries = []
+            with os.scandir(self.watch_path) as scan:
+                for entry in scan:
+                    if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                        stat = entry.stat()
+                        entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+            return tuple(sorted(entries))
+        stat = os.stat(self.watch_path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def is_due(self, now):
+        """A job is due when its interval has elapsed or its watched path changed."""
+        if self.last_run is None:
+            return True
+        if self.interval and now - self.last_run >= self.interval:
+            return True
+        return self.watch_path is not None and self.path_signature() != self.last_signature
+
+
+class SyncScheduler(DuckDBManager):
+    """Keep one DuckDB connection open and re-run configured syncs on intervals or file changes."""
+
+    def __init__(self, db_path=None, poll_interval=1.0, **kwargs):
+        super().__init__(db_path, **kwargs)
+        self.poll_interval = poll_interval
+        self.jobs = []
+        # Triggered job names in arrival order; a dict doubles as an ordered set,
+        # so triggers that pile up while a sync is running collapse into one run.
+        self.pending = {}
+        self.psql_tools = {}
+        self.sqlite_tool = None
+
+    def add_job(self, job):
+        self.jobs.append(job)
+
+    def trigger(self, name):
+        """Queue a job to run on the next tick; repeated triggers are coalesced."""
+        self.pending[name] = True
+
+    def csv_tool(self):
+        return CSVToDuckDB(duckdb_conn=self.duckdb_conn, quiet=self.quiet, log_stream=self.log_stream)
+
+    def psql_tool(self, psql_conn_string):
+        """Attach each PostgreSQL source once and reuse it for every later run."""
+        if psql_conn_string not in self.psql_tools:
+            tool = PostgreSQLToDuckDB(
+                psql_conn_string=psql_conn_string, duckdb_conn=self.duckdb_conn, quiet=self.quiet, log_stream=self.log_stream
+            )
+            tool.attach_postgresql()
+            self.psql_tools[psql_conn_string] = tool
+        return self.psql_tools[psql_conn_string]
+
+    def sqlite_source(self):
+        """Load the SQLite extension once for the lifetime of the scheduler."""
+        if self.sqlite_tool is None:
+            self.sqlite_tool = SQLiteToDuckDB(duckdb_conn=self.duckdb_conn, quiet=self.quiet, log_stream=self.log_stream)
+            self.sqlite_tool.load_sqlite_extension()
+        return self.sqlite_tool
+
+    def build_job(self, config):
+        """Turn one entry of the watch config into a SyncJob."""
+        sync_type = config["type"]
+        name = config.get("name") or f"{sync_type}:{config.get('path') or config.get('table')}"
+        interval = config.get("interval")
+        schema = config.get("schema")
+        cluster_by = config.get("cluster_by")
+        transform = load_transform(config.get("transform"))
+
+        def convert(table, outcome="loaded"):
+            # Full reloads recreate the table, so the ENUM conversion is redone each time;
+            # appends keep it and fall back to VARCHAR themselves when new values show up.
+            if config.get("enums") and outcome == "loaded":
+                EnumConverter(duckdb_conn=self.duckdb_conn, quiet=self.quiet, log_stream=self.log_stream).convert_table(table, schema)
+
+        if sync_type == "csv":
+            def action():
+                convert(config["table"], self.csv_tool().load_csv_incremental(config["path"], config["table"], schema, cluster_by=cluster_by, transform=transform))
+            return SyncJob(name, action, interval, watch_path=config["path"])
+
+        if sync_type == "csv_dir":
+            pattern = config.get("pattern", "*.csv")
+
+            def action():
+                tool = self.csv_tool()
+                for file_name in sorted(os.listdir(config["path"])):
+                    if fnmatch.fnmatch(file_name, pattern):
+                        table_name = config.get("table") or file_name.split(".")[0]
+                        convert(table_name, tool.load_csv_incremental(os.path.join(config["path"], file_name), table_name, schema, cluster_by=cluster_by, transform=transform))
+            return SyncJob(name, action, interval, watch_path=config["path"], pattern=pattern)
+
+        if sync_type == "psql":
+            def action():
+                tool = self.psql_tool(config["conn"])
+                for table in config.get("tables") or tool.list_postgresql_tables():
+                    tool.migrate_table(table, table, schema, replace=True, cluster_by=cluster_by, transform=transform)
+                    convert(table)
+            return SyncJob(name, action, interval)
+
+        if sync_type == "sqlite":
+            def action():
+                tool = self.sqlite_source()
+                for table in config.get("tables") or tool.list_sqlite_tables(config["path"]):
+                    tool.migrate_table(config["path"], table, table, schema, replace=True, cluster_by=cluster_by, transform=transform)
+                    convert(table)
+            return SyncJob(name, action, interval, watch_path=config["path"])
+
+        raise ValueError(f"Unknown sync type '{sync_type}' in watch config.")
+
+    def load_config(self, config):
+        """Register every sync listed in a watch config dictionary."""
+        for sync in config.get("syncs", []):
+            self.add_job(self.build_job(sync))
+
+    def run_job(self, job, now):
+        """Run one sync on the shared connection; a failure is logged and retried on its next trigger."""
+        self.log(f"{Fore.CYAN}🔄 Running sync '{job.name}'...")
+        # Capture the signature before running so changes made during the run trigger another one.
+        job.last_signature = job.path_signature()
+        job.last_run = now
+        started = time.perf_counter()
+        try:
+            job.action()
+            job.runs += 1
+            self.log(f"{Fore.GREEN}✅ Sync '{job.name}' finished in {time.perf_counter() - started:.2f}s.")
+        except Exception as e:
+            self.log(f"{Fore.RED}❌ Sync '{job.name}' failed: {e}")
+
+    def tick(self, now=None):
+        """Queue every due job, then run the queued jobs one after another."""
+        now = time.monotonic() if now is None else now
+        for job in self.jobs:
+            if job.is_due(now):
+                self.trigger(job.name)
+        jobs = {job.name: job for job in self.jobs}
+        while self.pending:
+            name = next(iter(self.pending))
+            del self.pending[name]
+            self.run_job(jobs[name], now)
+
+    def run_forever(self):
+        """Tick until interrupted."""
+        self.log(f"{Fore.CYAN}👀 Watching {len(self.jobs)} sync(s); press Ctrl+C to stop.")
+        try:
+            while True:
+                self.tick()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            self.log(f"{Fore.YELLOW}Stopping watch mode.")
+
+def main():
+    """Main entry point for watch mode."""
+    parser = argparse.ArgumentParser(description="Keep DuckDB in sync by re-running loads on intervals or file changes.")
+    parser.add_argument('--config', type=str, help="Path to a JSON watch config.")
+    parser.add_argument('--db', type=str, help="Path to DuckDB DB file (overrides the config's 'db').")
+    parser.add_argument('--poll', type=float, default=1.0, help="Seconds between checks for due syncs and file changes (default: 1).")
+    parser.add_argument('--once', action='store_true', help="Run every sync once and exit.")
+    args = parser.parse_args()
+
+    if not args.config:
+        print(f"{Fore.RED}❌ Error: '--config' is required.")
+        return
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    db_path = args.db or config.get("db")
+    if not db_path:
+        print(f"{Fore.RED}❌ Error: a DuckDB file is required ('--db' or 'db' in the config).")
+        return
+
+    scheduler = SyncScheduler(db_path, poll_interval=args.poll)
+    try:
+        scheduler.connect_to_duckdb()
+        scheduler.load_config(config)
+        if args.once:
+            scheduler.tick()
+        else:
+            scheduler.run_forever()
+    except Exception as e:
+        print(f"{Fore.RED}❌ An error occurred: {e}")
+    finally:
+        scheduler.close_duckdb_conn()
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,23 @@
+import gzip
 import os
+import sqlite3
+import subprocess
+import sys
 import textwrap
+import threading
+
+import duckdb
 
 import pytest
 from unittest.mock import MagicMock, patch, call
 
 from mamaduck.database.duckdb import DuckDBManager
 from mamaduck.connectors.psql import PostgreSQLToDuckDB
-from mamaduck.connectors.sqlite import SQLiteToDuckDB
+from mamaduck.connectors.sqlite import SQLiteConsolidator, SQLiteToDuckDB
 from mamaduck.connectors.csv import CSVToDuckDB
+from mamaduck.connectors.parquet import ParquetToDuckDB
+from mamaduck.database.enums import EnumConverter
+from mamaduck.database.transforms import compile_transform, transform_query
 
 
 def single_space(text):
@@ -141,3 +151,349 @@ def test_migrate_sqlite_table_invalid_table(mock_duckdb_manager):
 
     with pytest.raises(ValueError, match="Table does not exist"):
         sqlite_tool.migrate_table("mock_sqlite.db", "nonexistent_table", "duckdb_table")
+
+
+# ParquetToDuckDB Tests
+def test_load_parquet_to_table_pushes_down_projection_and_filter(mock_duckdb_manager):
+    parquet_tool = ParquetToDuckDB(":memory:")
+    parquet_tool.duckdb_conn = mock_duckdb_manager.duckdb_conn
+
+    parquet_tool.load_parquet_to_table("data/*.parquet", "events", columns=["id", "ts"], where="ts >= '2024-01-01'")
+
+    expected_sql = (
+        "CREATE TABLE events AS SELECT id, ts FROM read_parquet('data/*.parquet', union_by_name = true) "
+        "WHERE ts >= '2024-01-01';"
+    )
+    actual_sql = mock_duckdb_manager.duckdb_conn.execute.call_args[0][0]
+
+    assert single_space(actual_sql) == single_space(expected_sql)
+
+
+def test_load_gzipped_csv_from_stdin(tmp_path):
+    # A real pipe: DuckDB cannot seek stdin, so the stream is decompressed in Python.
+    loader = subprocess.run(
+        [sys.executable, "-m", "mamaduck.kwak", "load_csv", "--db", "piped.duckdb", "--csv", "-", "--compression", "gzip", "--table", "people"],
+        input=gzip.compress(b"id,name\n1,ada\n2,grace\n"), capture_output=True, cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))},
+    )
+    assert loader.returncode == 0, loader.stderr
+
+    conn = duckdb.connect(str(tmp_path / "databases" / "piped.duckdb"), read_only=True)
+    assert conn.execute("SELECT * FROM people ORDER BY id").fetchall() == [(1, "ada"), (2, "grace")]
+
+
+def test_load_gzipped_csv_from_named_pipe(tmp_path):
+    fifo = str(tmp_path / "people.pipe")
+    os.mkfifo(fifo)
+    writer = threading.Thread(target=lambda: open(fifo, "wb").write(gzip.compress(b"id,name\n1,ada\n2,grace\n")))
+    writer.start()
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+    relation = csv_tool.load_csv_to_table(fifo, "people", compression="gzip")
+    writer.join()
+
+    assert relation.fetchall() == [(1, "ada"), (2, "grace")]
+
+
+def test_truncated_gzip_stream_is_rolled_back(tmp_path):
+    fifo = str(tmp_path / "people.pipe")
+    os.mkfifo(fifo)
+    rows = "".join(f"{i},name{i}\n" for i in range(10_000))
+    truncated = gzip.compress(("id,name\n" + rows).encode())[:-200]
+    writer = threading.Thread(target=lambda: open(fifo, "wb").write(truncated))
+    writer.start()
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+    with pytest.raises(EOFError):
+        csv_tool.load_csv_to_table(fifo, "people", compression="gzip")
+    writer.join()
+
+    assert csv_tool.duckdb_conn.execute("SELECT count(*) FROM duckdb_tables() WHERE table_name = 'people'").fetchone() == (0,)
+
+
+def test_load_gzipped_csv_without_staging(tmp_path):
+    csv_file = tmp_path / "people.csv.gz"
+    with gzip.open(csv_file, "wt") as f:
+        f.write("id,name\n1,ada\n2,grace\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+    relation = csv_tool.load_csv_to_table(str(csv_file), "people")
+
+    assert relation.fetchall() == [(1, "ada"), (2, "grace")]
+
+
+def test_incremental_csv_load_skips_and_appends_tail(tmp_path):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("id,name\n1,ada\n2,grace\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "loaded"
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "skipped"
+
+    with open(csv_file, "a") as f:
+        f.write("3,alan\n4,bar")  # the last row is still being written
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "appended"
+    assert csv_tool.duckdb_conn.execute("SELECT max(id), count(*) FROM events;").fetchone() == (3, 3)
+
+    with open(csv_file, "a") as f:
+        f.write("bara\n")
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "appended"
+    assert csv_tool.duckdb_conn.execute("SELECT name FROM events WHERE id = 4;").fetchone() == ("barbara",)
+
+
+def test_incremental_csv_load_reloads_rewritten_file(tmp_path):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("id,name\n1,ada\n2,grace\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    csv_tool.load_csv_incremental(str(csv_file), "events")
+
+    csv_file.write_text("id,name\n7,linus\n8,guido\n9,ken\n")
+
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "loaded"
+    assert csv_tool.duckdb_conn.execute("SELECT min(id), count(*) FROM events;").fetchone() == (7, 3)
+
+
+def test_incremental_csv_load_catches_same_size_edit_in_the_middle(tmp_path, monkeypatch):
+    monkeypatch.setattr(CSVToDuckDB, "FINGERPRINT_BLOCK", 16)
+    csv_file = tmp_path / "events.csv"
+    lines = [f"{i},name{i:03d}\n" for i in range(100)]
+    csv_file.write_text("id,name\n" + "".join(lines))
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    csv_tool.load_csv_incremental(str(csv_file), "events")
+
+    lines[50] = "50,editedX\n"  # same length as the original row
+    csv_file.write_text("id,name\n" + "".join(lines))
+    os.utime(csv_file, ns=(0, os.stat(csv_file).st_mtime_ns + 10**9))
+
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "loaded"
+    assert csv_tool.duckdb_conn.execute("SELECT name FROM events WHERE id = 50").fetchone() == ("editedX",)
+
+
+def test_incremental_csv_append_and_registry_commit_together(tmp_path, monkeypatch):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("id,name\n1,ada\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    csv_tool.load_csv_incremental(str(csv_file), "events")
+    with open(csv_file, "a") as f:
+        f.write("2,grace\n")
+
+    monkeypatch.setattr(csv_tool, "record_load", MagicMock(side_effect=OSError("crash")))
+    with pytest.raises(OSError):
+        csv_tool.load_csv_incremental(str(csv_file), "events")
+    assert csv_tool.duckdb_conn.execute("SELECT count(*) FROM events").fetchone() == (1,)
+
+    monkeypatch.undo()
+    assert csv_tool.load_csv_incremental(str(csv_file), "events") == "appended"
+    assert csv_tool.duckdb_conn.execute("SELECT count(*) FROM events").fetchone() == (2,)
+
+
+def test_bookkeeping_tables_stay_out_of_listings(tmp_path):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("id,name\n1,ada\n")
+    # The file name matches the bookkeeping schema, so unqualified names would be ambiguous.
+    conn = duckdb.connect(database=str(tmp_path / "mamaduck.duckdb"))
+    conn.execute("CREATE TABLE mamaduck_load_registry AS SELECT 'old.csv' AS file_path, 'old' AS table_name, "
+                 "1 AS file_size, 1 AS file_mtime_ns, 'x' AS content_hash, 1 AS ingested_bytes, "
+                 "current_timestamp AS loaded_at;")
+    csv_tool = CSVToDuckDB(duckdb_conn=conn, quiet=True)
+
+    csv_tool.load_csv_incremental(str(csv_file), "events")
+
+    assert [row[0] for row in conn.execute("SHOW TABLES;").fetchall()] == ["events"]
+    assert csv_tool.get_table_list() == ["main.events"]
+    registry = csv_tool.bookkeeping_table(CSVToDuckDB.LOAD_REGISTRY)
+    assert sorted(row[0] for row in conn.execute(f"SELECT table_name FROM {registry};").fetchall()) == ["events", "old"]
+
+
+def test_migrate_postgresql_table_clustered(mock_duckdb_manager):
+    psql_tool = PostgreSQLToDuckDB(":memory:", "mock_conn_string")
+    psql_tool.duckdb_conn = mock_duckdb_manager.duckdb_conn
+
+    psql_tool.migrate_table("events", "events", cluster_by="event_date, account_id")
+
+    actual_sql = mock_duckdb_manager.duckdb_conn.execute.call_args[0][0]
+    assert single_space(actual_sql) == (
+        "CREATE TABLE events AS SELECT * FROM postgres_db.events ORDER BY event_date, account_id;"
+    )
+
+
+def test_load_csv_clustered_sorts_rows(tmp_path):
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("id,day\n1,2024-03-01\n2,2024-01-01\n3,2024-02-01\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+    relation = csv_tool.load_csv_to_table(str(csv_file), "events", cluster_by="day")
+
+    assert [row[0] for row in relation.fetchall()] == [2, 3, 1]
+
+
+def test_enum_conversion_and_fallback_on_new_values(tmp_path):
+    csv_file = tmp_path / "orders.csv"
+    rows = "".join(f"{i},{['open', 'paid', 'shipped'][i % 3]},note {i}\n" for i in range(300))
+    csv_file.write_text("id,status,note\n" + rows)
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    csv_tool.load_csv_incremental(str(csv_file), "orders")
+
+    converted = EnumConverter(duckdb_conn=csv_tool.duckdb_conn, quiet=True).convert_table("orders")
+
+    assert list(converted) == ["status"]
+    types = dict(csv_tool.duckdb_conn.execute("SELECT column_name, data_type FROM duckdb_columns() WHERE table_name = 'orders'").fetchall())
+    assert types["status"].startswith("ENUM(") and types["note"] == "VARCHAR"
+
+    with open(csv_file, "a") as f:
+        f.write("300,paid,late\n")
+    assert csv_tool.load_csv_incremental(str(csv_file), "orders") == "appended"
+    assert csv_tool.duckdb_conn.execute("SELECT data_type FROM duckdb_columns() WHERE column_name = 'status'").fetchone()[0].startswith("ENUM(")
+
+    with open(csv_file, "a") as f:
+        f.write("301,refunded,late\n")
+    assert csv_tool.load_csv_incremental(str(csv_file), "orders") == "appended"
+    assert csv_tool.duckdb_conn.execute("SELECT data_type FROM duckdb_columns() WHERE column_name = 'status'").fetchone()[0] == "VARCHAR"
+    assert csv_tool.duckdb_conn.execute("SELECT status FROM orders WHERE id = 301").fetchone() == ("refunded",)
+
+
+def test_enum_conversion_of_columns_with_spaces():
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE SCHEMA sales")
+    conn.execute("""CREATE TABLE sales.orders AS SELECT range AS id, ['open', 'paid'][range % 2 + 1] AS "Status Code" FROM range(100)""")
+
+    converted = EnumConverter(duckdb_conn=conn, quiet=True).convert_table("orders", "sales")
+
+    assert list(converted) == ["Status Code"]
+    assert conn.execute("""SELECT count(*) FROM sales.orders WHERE "Status Code" = 'paid'""").fetchone() == (50,)
+
+
+def test_load_csv_with_transform_reshapes_in_one_pass(tmp_path):
+    csv_file = tmp_path / "orders.csv"
+    csv_file.write_text("id,cust,amount,note\n1,7,2.50,x\n2,8,4.00,y\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    transform = {
+        "rename": {"cust": "customer_id"},
+        "cast": {"amount": "DECIMAL(10,2)", "id": "VARCHAR"},
+        "derive": {"doubled": "amount * 2"},
+        "drop": ["note"],
+    }
+
+    relation = csv_tool.load_csv_incremental(str(csv_file), "orders", transform=transform)
+    with open(csv_file, "a") as f:
+        f.write("3,9,1.25,z\n")
+    assert csv_tool.load_csv_incremental(str(csv_file), "orders", transform=transform) == "appended"
+
+    relation = csv_tool.table_relation("orders")
+    assert relation.columns == ["id", "customer_id", "amount", "doubled"]
+    assert [str(t) for t in relation.types][:3] == ["VARCHAR", "BIGINT", "DECIMAL(10,2)"]
+    assert relation.order("id").fetchall()[-1] == ("3", 9, 1.25, 2.5)
+
+
+def test_compile_transform_inline_and_cast_with_rename(mock_duckdb_manager):
+    assert compile_transform(None) == "*"
+    assert compile_transform("id, upper(name) AS name;") == "id, upper(name) AS name"
+    with pytest.raises(ValueError):
+        compile_transform({"rename_to": {}})
+
+    # A column that is renamed and cast keeps its position.
+    query = transform_query({"rename": {"amt": "amount"}, "cast": {"amt": "DOUBLE"}}, "orders")
+    assert query == (
+        'SELECT * RENAME ("amt" AS "amount") FROM (SELECT * REPLACE (CAST("amt" AS DOUBLE) AS "amt") FROM orders)'
+    )
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE orders AS SELECT 1 AS id, '2.5' AS amt, 'x' AS note")
+    relation = conn.sql(query)
+    assert relation.columns == ["id", "amount", "note"]
+    assert relation.fetchall() == [(1, 2.5, "x")]
+
+    psql_tool = PostgreSQLToDuckDB(duckdb_conn=mock_duckdb_manager.duckdb_conn, quiet=True)
+    psql_tool.migrate_table("events", "events", transform={"drop": ["payload"]})
+    actual_sql = mock_duckdb_manager.duckdb_conn.execute.call_args[0][0]
+    assert single_space(actual_sql) == 'CREATE TABLE events AS SELECT * EXCLUDE ("payload") FROM postgres_db.events;'
+
+
+def test_sqlite_consolidation_groups_files_by_cached_schema(tmp_path, monkeypatch):
+    devices = tmp_path / "devices"
+    devices.mkdir()
+    for index in range(5):
+        conn = sqlite3.connect(devices / f"device-{index}.db")
+        # The last device runs newer firmware with an extra column.
+        extra = ", battery REAL" if index == 4 else ""
+        conn.execute(f"CREATE TABLE readings (id INTEGER, value TEXT{extra})")
+        conn.commit()
+        conn.close()
+    (devices / "notes.txt").write_text("not a database")
+
+    tool = SQLiteConsolidator(duckdb_conn=duckdb.connect(), workers=2, batch_files=3, quiet=True)
+    inserted = []
+    monkeypatch.setattr(tool, "insert_batch", lambda target, table, files: inserted.append(files) or len(files))
+
+    rows = tool.consolidate(str(devices))
+
+    assert rows == {"readings": 5}
+    assert sorted(len(files) for files in inserted) == [1, 1, 3]
+    assert len(tool.schema_cache) == 2
+    assert tool.cache_hits == 3
+    columns = [row[0] for row in tool.duckdb_conn.execute("DESCRIBE readings").fetchall()]
+    assert columns == ["id", "value", "source_file", "battery"]
+
+    # Files already recorded in the target are skipped on the next run.
+    tool.duckdb_conn.execute("INSERT INTO readings (source_file) VALUES (?)", [str(devices / "device-0.db")])
+    rerun = SQLiteConsolidator(duckdb_conn=tool.duckdb_conn, quiet=True)
+    monkeypatch.setattr(rerun, "insert_batch", lambda target, table, files: len(files))
+    assert rerun.consolidate(str(devices / "*.db")) == {"readings": 4}
+
+
+def test_sqlite_consolidation_records_failed_files_and_reuses_existing_table(tmp_path, monkeypatch):
+    for index in range(4):
+        conn = sqlite3.connect(tmp_path / f"device-{index}.db")
+        conn.execute("CREATE TABLE readings (id INTEGER, Value TEXT)")
+        conn.commit()
+        conn.close()
+    # A table loaded some other way, with no source column and differently cased names.
+    duck = duckdb.connect()
+    duck.execute('CREATE TABLE readings ("ID" BIGINT, "value" VARCHAR)')
+
+    tool = SQLiteConsolidator(duckdb_conn=duck, batch_files=4, quiet=True)
+    def insert_batch(target, table, files):
+        if any("device-2" in path for path in files):
+            raise duckdb.IOException("file is not a database")
+        return len(files)
+    monkeypatch.setattr(tool, "insert_batch", insert_batch)
+
+    assert tool.consolidate(str(tmp_path)) == {"readings": 3}
+    assert list(tool.failures) == [str(tmp_path / "device-2.db")]
+    columns = [row[0] for row in duck.execute("DESCRIBE readings").fetchall()]
+    assert columns == ["ID", "value", "source_file"]
+
+
+def test_sqlite_consolidation_end_to_end(tmp_path):
+    duck = duckdb.connect()
+    try:
+        duck.execute("LOAD sqlite;")
+    except duckdb.Error:
+        pytest.skip("the sqlite_scanner extension is not available")
+    for index, (columns, values) in enumerate([("id INTEGER, value TEXT", "(1, 'a')"), ("id INTEGER, value TEXT, battery REAL", "(2, 'b', 0.5)")]):
+        conn = sqlite3.connect(tmp_path / f"device-{index}.db")
+        conn.execute(f"CREATE TABLE readings ({columns})")
+        conn.execute(f"INSERT INTO readings VALUES {values}")
+        conn.commit()
+        conn.close()
+
+    tool = SQLiteConsolidator(duckdb_conn=duck, quiet=True)
+    assert tool.consolidate(str(tmp_path)) == {"readings": 2}
+    assert duck.execute("SELECT id, value, battery, source_file FROM readings ORDER BY id").fetchall() == [
+        (1, "a", None, str(tmp_path / "device-0.db")),
+        (2, "b", 0.5, str(tmp_path / "device-1.db")),
+    ]
+    assert not tool.failures
+
+
+def test_sqlite_consolidation_insert_is_one_union(mock_duckdb_manager):
+    tool = SQLiteConsolidator(duckdb_conn=mock_duckdb_manager.duckdb_conn, quiet=True)
+    cursor = tool.duckdb_conn.cursor.return_value
+    cursor.execute.return_value.fetchone.return_value = (7,)
+
+    assert tool.insert_batch("readings", "readings", ["a.db", "o'b.db"]) == 7
+    assert single_space(cursor.execute.call_args[0][0]) == (
+        "INSERT INTO readings BY NAME "
+        "SELECT *, 'a.db' AS source_file FROM sqlite_scan('a.db', 'readings') UNION ALL "
+        "SELECT *, 'o''b.db' AS source_file FROM sqlite_scan('o''b.db', 'readings');"
+    )
+
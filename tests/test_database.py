@@ -0,0 +1,512 @@
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import duckdb
+import pytest
+from unittest.mock import MagicMock
+
+from mamaduck.database.duckdb import DuckDBManager
+from mamaduck.database.snapshot import DuckDBSnapshot
+from mamaduck.connectors.csv import CSVToDuckDB
+from mamaduck.database.batching import AdaptiveBatchSizer, ValueOffloader
+from mamaduck.database.profiling import Profiler
+from mamaduck.database.readers import ReaderSnapshot, export_tables_parallel
+from mamaduck.database.planner import LoadPlanner
+from mamaduck.database.runs import RunCoordinator
+from mamaduck.database.sampling import SubsetSampler
+from mamaduck.database.locking import WriteLock
+from mamaduck.database.maintenance import DuckDBMaintenance, maintain_after_load
+
+
+@pytest.fixture
+def snapshot_tool():
+    """Snapshot tool backed by a real in-memory DuckDB connection."""
+    tool = DuckDBSnapshot(None)
+    tool.duckdb_conn = duckdb.connect(database=':memory:')
+    yield tool
+    tool.close_duckdb_conn()
+
+
+# DuckDBSnapshot Tests
+def test_snapshot_database_uses_export():
+    tool = DuckDBSnapshot(None)
+    tool.duckdb_conn = MagicMock()
+
+    tool.snapshot_database("snap", threads=4)
+
+    tool.duckdb_conn.execute.assert_any_call("SET threads = 4;")
+    tool.duckdb_conn.execute.assert_any_call("EXPORT DATABASE 'snap' (FORMAT PARQUET, COMPRESSION ZSTD);")
+
+
+def test_restore_selected_tables(snapshot_tool, tmp_path):
+    conn = snapshot_tool.duckdb_conn
+    conn.execute("CREATE SCHEMA sales;")
+    conn.execute("CREATE TABLE orders AS SELECT range AS id FROM range(5);")
+    conn.execute("CREATE TABLE sales.customers AS SELECT 'ada' AS name;")
+    conn.execute("CREATE VIEW order_ids AS SELECT id FROM orders;")
+    snapshot_dir = str(tmp_path / "snap")
+    snapshot_tool.snapshot_database(snapshot_dir)
+
+    restored = DuckDBSnapshot(None)
+    restored.duckdb_conn = duckdb.connect(database=':memory:')
+    restored.restore_database(snapshot_dir, ["customers"])
+
+    tables = restored.get_table_list()
+    assert tables == ["sales.customers"]
+    assert restored.duckdb_conn.execute("SELECT name FROM sales.customers;").fetchall() == [("ada",)]
+    restored.close_duckdb_conn()
+
+
+def test_restore_selected_tables_keeps_statements_with_semicolons(snapshot_tool, tmp_path):
+    conn = snapshot_tool.duckdb_conn
+    conn.execute("CREATE TABLE notes (body VARCHAR DEFAULT 'a;\nb', id INTEGER);")
+    conn.execute("INSERT INTO notes (id) VALUES (1);")
+    conn.execute("CREATE MACRO joined(x) AS x || ';\n';")
+    snapshot_dir = str(tmp_path / "snap")
+    snapshot_tool.snapshot_database(snapshot_dir)
+
+    restored = DuckDBSnapshot(None)
+    restored.duckdb_conn = duckdb.connect(database=':memory:')
+    restored.restore_database(snapshot_dir, ["notes"])
+
+    assert restored.duckdb_conn.execute("SELECT body, id FROM notes;").fetchall() == [("a;\nb", 1)]
+    assert restored.duckdb_conn.execute("SELECT joined('x');").fetchone() == ("x;\n",)
+    restored.close_duckdb_conn()
+
+
+def test_restore_full_snapshot(snapshot_tool, tmp_path):
+    snapshot_tool.duckdb_conn.execute("CREATE TABLE orders AS SELECT range AS id FROM range(5);")
+    snapshot_dir = str(tmp_path / "snap")
+    snapshot_tool.snapshot_database(snapshot_dir)
+
+    restored = DuckDBSnapshot(None)
+    restored.duckdb_conn = duckdb.connect(database=':memory:')
+    restored.restore_database(snapshot_dir)
+
+    assert restored.duckdb_conn.execute("SELECT COUNT(*) FROM orders;").fetchone() == (5,)
+    restored.close_duckdb_conn()
+
+
+# DuckDBManager library usage
+def test_injected_connection_is_quiet_and_side_effect_free(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    conn = duckdb.connect(database=':memory:')
+    tool = CSVToDuckDB("ignored.duckdb", duckdb_conn=conn, quiet=True)
+
+    csv_file = tmp_path / "people.csv"
+    csv_file.write_text("id,name\n1,ada\n2,grace\n")
+    tool.connect_to_duckdb()
+    relation = tool.load_csv_to_table(str(csv_file), "people")
+    tool.close_duckdb_conn()
+
+    assert relation.fetchall() == [(1, "ada"), (2, "grace")]
+    assert capsys.readouterr().out == ""
+    assert not (tmp_path / DuckDBManager.DATABASE_FOLDER).exists()
+    # The caller still owns the injected connection.
+    assert conn.execute("SELECT COUNT(*) FROM people;").fetchone() == (2,)
+
+
+def test_fetch_record_batches_returns_arrow_reader():
+    pytest.importorskip("pyarrow")
+    tool = DuckDBManager(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+    reader = tool.fetch_record_batches("SELECT range AS id FROM range(10)", batch_size=4)
+
+    assert reader.read_all().num_rows == 10
+
+
+# AdaptiveBatchSizer Tests
+def test_batch_sizer_grows_while_fast_and_shrinks_when_slow():
+    sizer = AdaptiveBatchSizer(initial_size=1000, target_seconds=1.0)
+
+    assert sizer.record(1000, 0.1) == 1500
+    assert sizer.record(1500, 0.12) == 2250
+    assert sizer.record(2250, 3.0) == 1125
+
+
+def test_batch_sizer_respects_memory_ceiling():
+    sizer = AdaptiveBatchSizer(initial_size=1000, memory_limit_bytes=1024 * 1024)
+
+    # 10 KB rows: at most ~100 fit in a 1 MB ceiling.
+    size = sizer.record(1000, 0.1, nbytes=1000 * 10 * 1024)
+
+    assert size == 102
+
+
+def test_batch_sizer_transfer_moves_every_row():
+    conn = duckdb.connect(database=':memory:')
+    cursor = conn.execute("SELECT range AS id FROM range(5000)")
+    written = []
+    sizer = AdaptiveBatchSizer(initial_size=100, min_size=10)
+
+    rows = sizer.transfer(cursor, written.extend)
+
+    assert rows == 5000
+    assert len(written) == 5000
+    assert sizer.batches < 50
+
+
+def test_batch_sizer_cuts_batches_by_bytes():
+    conn = duckdb.connect(database=':memory:')
+    cursor = conn.execute("SELECT range AS id, repeat('x', 100000)::BLOB AS payload FROM range(50)")
+    sizes = []
+    # ~100 KB rows against a 1 MB ceiling: well under the 1000-row batch size.
+    sizer = AdaptiveBatchSizer(initial_size=1000, memory_limit_bytes=1024 * 1024)
+
+    rows = sizer.transfer(cursor, lambda batch: sizes.append(len(batch)))
+
+    assert rows == 50
+    assert sum(sizes) == 50
+    assert max(sizes) <= 12
+
+
+def test_value_offloader_replaces_large_values(tmp_path):
+    offloader = ValueOffloader(str(tmp_path / "side"), threshold=10)
+    big = b"\x00" * 100
+
+    rows = offloader.apply([(1, "small", big), (2, "y" * 50, big)])
+
+    assert rows[0][:2] == (1, "small")
+    assert rows[0][2].startswith(ValueOffloader.PREFIX.encode())
+    assert rows[1][1].startswith(ValueOffloader.PREFIX)
+    path = ValueOffloader.resolve(rows[0][2], str(tmp_path / "side"))
+    with open(path, "rb") as f:
+        assert f.read() == big
+    # The repeated payload is stored once.
+    assert offloader.values == 3
+    assert len(os.listdir(tmp_path / "side")) == 2
+    assert ValueOffloader.resolve("small", str(tmp_path / "side")) is None
+
+# Profiler Tests
+def test_profiler_reports_statements_and_operators(tmp_path):
+    profiler = Profiler(str(tmp_path), python=True)
+    conn = profiler.wrap(duckdb.connect(database=':memory:'))
+    with profiler.stage("load"):
+        conn.execute("CREATE TABLE t AS SELECT range AS id FROM range(1000)")
+        assert conn.execute("SELECT count(*) FROM t").fetchone() == (1000,)
+
+    report = open(profiler.write_report()).read()
+    assert "Stage: load" in report
+    assert "CREATE TABLE t" in report
+    assert len(profiler.stages["load"]["statements"]) == 2
+    assert any(Profiler.operator_timings(s["profile"]) for s in profiler.stages["load"]["statements"])
+    assert "Hottest Python functions" in report
+
+
+def test_profiler_splits_tool_into_phase_stages(tmp_path, monkeypatch):
+    profiler = Profiler(str(tmp_path / "profile"), python=True)
+    monkeypatch.setattr(DuckDBManager, "profiler", profiler)
+    csv_file = tmp_path / "events.csv"
+    csv_file.write_text("id,name\n1,ada\n")
+    csv_tool = CSVToDuckDB(duckdb_conn=profiler.wrap(duckdb.connect(database=':memory:')), quiet=True)
+
+    with profiler.stage("load_csv"):
+        csv_tool.load_csv_incremental(str(csv_file), "events")
+        with open(csv_file, "a") as f:
+            f.write("2,grace\n")
+        csv_tool.load_csv_incremental(str(csv_file), "events")
+
+    assert {"load_csv", "load", "scan", "insert"} <= set(profiler.stages)
+    assert any(s["query"].startswith("CREATE OR REPLACE TABLE events") for s in profiler.stages["load"]["statements"])
+    assert any(s["query"].startswith("INSERT INTO events") for s in profiler.stages["insert"]["statements"])
+    # Each phase keeps its own Python profile instead of everything landing in the tool's stage.
+    assert profiler.stages["scan"]["python"] is not None
+    assert "Stage: insert" in open(profiler.write_report()).read()
+
+
+# Read-only / ReaderSnapshot Tests
+def test_read_only_manager_attaches_targets_read_write():
+    assert DuckDBManager("db.duckdb", read_only=True).attach_options("SQLITE") == "(TYPE SQLITE, READ_WRITE)"
+    assert DuckDBManager("db.duckdb").attach_options("SQLITE") == "(TYPE SQLITE)"
+
+
+def test_reader_snapshot_is_shared_by_parallel_exports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "databases").mkdir()
+    conn = duckdb.connect(str(tmp_path / "databases" / "w.duckdb"))
+    conn.execute("CREATE TABLE a AS SELECT range AS id FROM range(10)")
+    conn.execute("CREATE TABLE b AS SELECT range AS id FROM range(20)")
+    conn.close()
+
+    outputs = export_tables_parallel("w.duckdb", ["a", "b"], str(tmp_path / "out"), "csv", workers=2, log_stream=io.StringIO())
+
+    assert duckdb.sql(f"SELECT count(*) FROM '{outputs['b']}'").fetchone() == (20,)
+    # The shared copy is removed and the original is left untouched and writable.
+    assert sorted(p.name for p in (tmp_path / "databases").iterdir()) == ["w.duckdb"]
+    duckdb.connect(str(tmp_path / "databases" / "w.duckdb")).execute("CREATE TABLE c (id INTEGER)").close()
+
+
+# LoadPlanner Tests
+def test_planner_uses_sqlite_stats_and_measured_throughput(tmp_path):
+    sqlite_path = str(tmp_path / "src.db")
+    source = sqlite3.connect(sqlite_path)
+    source.execute("CREATE TABLE big (id INTEGER, payload TEXT)")
+    source.executemany("INSERT INTO big VALUES (?, ?)", [(i, "x" * 40) for i in range(5000)])
+    source.execute("CREATE TABLE small (id INTEGER)")
+    source.commit()
+    source.close()
+
+    stats = LoadPlanner.sqlite_table_stats(sqlite_path)
+    assert stats["big"][0] == 5000 and stats["big"][1] > stats["small"][1]
+
+    planner = LoadPlanner(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    assert planner.plan("sqlite", stats)["measured"] is False
+    planner.record_run("sqlite", "big", 1000, 2.0)
+    plan = planner.plan("sqlite", stats)
+    assert plan["measured"] and plan["rows_per_second"] == 500
+    assert {t["table"]: t["seconds"] for t in plan["tables"]}["big"] == 10
+
+
+def test_planner_parallelism_is_bounded_by_largest_table():
+    assert LoadPlanner.suggest_parallelism([10, 10, 10, 10], limit=8) == 4
+    assert LoadPlanner.suggest_parallelism([100, 1, 1], limit=8) == 1
+    assert LoadPlanner.suggest_parallelism([10, 10, 10, 10], limit=2) == 2
+
+
+# RunCoordinator Tests
+def test_run_coordinator_retries_isolates_failures_and_resumes():
+    conn = duckdb.connect(database=':memory:')
+    coordinator = RunCoordinator(duckdb_conn=conn, run_id="nightly", retries=2, quiet=True)
+    delays = []
+    coordinator.sleep = delays.append
+    flaky = MagicMock(side_effect=[ConnectionError("blip"), None])
+    broken = MagicMock(side_effect=ValueError("bad table"))
+
+    assert coordinator.run_unit("flaky", flaky) == "done"
+    assert coordinator.run_unit("broken", broken) == "failed"
+    assert coordinator.run_unit("fine", lambda: None) == "done"
+    assert delays == [1.0, 1.0, 2.0]
+    assert broken.call_count == 3
+
+    summary = coordinator.summary()
+    assert summary["done"] == 2 and summary["failed"] == [("broken", 3, "bad table")]
+
+    resumed = RunCoordinator(duckdb_conn=conn, run_id="nightly", quiet=True)
+    assert resumed.run_unit("flaky", flaky) == "skipped"
+    assert resumed.run_unit("broken", lambda: None) == "done"
+
+
+def test_run_coordinator_chunked_table_retries_only_the_failed_chunk():
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE src AS SELECT range AS id, range * 2 AS v FROM range(100)")
+    coordinator = RunCoordinator(duckdb_conn=conn, run_id="r1", retries=0, quiet=True)
+
+    original = coordinator.load_chunk
+    def fail_second_chunk(source, target, column, low, high):
+        if low == 34:
+            raise ConnectionError("network blip")
+        original(source, target, column, low, high)
+    coordinator.load_chunk = fail_second_chunk
+
+    outcomes = coordinator.run_chunked_table("src", "src", "dst", "id", 34)
+    assert list(outcomes.values()).count("failed") == 1
+    assert conn.execute("SELECT count(*) FROM dst").fetchone() == (66,)
+
+    coordinator.load_chunk = original
+    outcomes = coordinator.run_chunked_table("src", "src", "dst", "id", 34)
+    assert list(outcomes.values()).count("done") == 1
+    assert conn.execute("SELECT count(*), sum(v) FROM dst").fetchone() == (100, 9900)
+
+
+def test_run_coordinator_chunked_table_loads_null_keys_and_finishes():
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE src AS SELECT CASE WHEN range % 10 = 0 THEN NULL ELSE range END AS id FROM range(50)")
+    coordinator = RunCoordinator(duckdb_conn=conn, run_id="r1", retries=0, quiet=True)
+    finish = MagicMock()
+
+    outcomes = coordinator.run_chunked_table("src", "src", "dst", "id", 20, finish)
+
+    assert outcomes["src:id IS NULL"] == "done" and outcomes["src:finish"] == "done"
+    assert conn.execute("SELECT count(*), count(id) FROM dst").fetchone() == (50, 45)
+    finish.assert_called_once()
+
+
+def test_run_coordinator_rejects_non_integer_chunk_column():
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE src AS SELECT range::VARCHAR AS code FROM range(10)")
+    coordinator = RunCoordinator(duckdb_conn=conn, run_id="r1", quiet=True)
+
+    outcomes = coordinator.run_chunked_table("src", "src", "dst", "code", 5)
+
+    assert outcomes["src:plan"] == "failed"
+    assert "VARCHAR" in coordinator.summary()["failed"][0][2]
+
+
+def test_run_coordinator_does_not_retry_catalog_errors():
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE orders AS SELECT 1 AS id")
+    coordinator = RunCoordinator(duckdb_conn=conn, run_id="r1", retries=3, quiet=True)
+    delays = []
+    coordinator.sleep = delays.append
+
+    outcome = coordinator.run_unit("orders", lambda: conn.execute("CREATE TABLE orders AS SELECT 2 AS id"))
+
+    assert outcome == "failed" and delays == []
+    assert conn.execute("SELECT id FROM orders").fetchall() == [(1,)]
+
+
+def test_sqlite_foreign_keys_resolve_composite_and_implicit_keys(tmp_path):
+    sqlite_path = str(tmp_path / "shop.db")
+    conn = sqlite3.connect(sqlite_path)
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY);
+        CREATE TABLE products (sku TEXT, region INT, PRIMARY KEY (sku, region));
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INT REFERENCES customers);
+        CREATE TABLE items (order_id INT REFERENCES orders (id), sku TEXT, region INT,
+                            FOREIGN KEY (sku, region) REFERENCES products (sku, region));
+    """)
+    conn.close()
+
+    foreign_keys = SubsetSampler.sqlite_foreign_keys(sqlite_path)
+
+    assert sorted(foreign_keys) == [
+        ("items", ("order_id",), "orders", ("id",)),
+        ("items", ("sku", "region"), "products", ("sku", "region")),
+        ("orders", ("customer_id",), "customers", ("id",)),
+    ]
+
+
+@pytest.mark.parametrize("pushdown", [False, True])
+def test_sample_subset_is_referentially_consistent(pushdown):
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE SCHEMA src")
+    conn.execute("CREATE TABLE src.customers AS SELECT range AS id FROM range(100)")
+    conn.execute("CREATE TABLE src.products AS SELECT range AS sku FROM range(20)")
+    conn.execute("CREATE TABLE src.orders AS SELECT range AS id, range % 100 AS customer_id FROM range(1000)")
+    conn.execute("CREATE TABLE src.items AS SELECT range % 1000 AS order_id, range % 20 AS sku FROM range(3000)")
+    conn.execute("CREATE TABLE src.staff AS SELECT range AS id, nullif(range - 1, -1) AS manager_id FROM range(50)")
+    foreign_keys = [
+        ("orders", ("customer_id",), "customers", ("id",)),
+        ("items", ("order_id",), "orders", ("id",)),
+        ("items", ("sku",), "products", ("sku",)),
+        ("staff", ("manager_id",), "staff", ("id",)),
+    ]
+    tables = ["items", "orders", "customers", "products", "staff"]
+    sampler = SubsetSampler(duckdb_conn=conn, sample="10%", seed=7, quiet=True)
+
+    assert [table for table, _ in sampler.order_tables(tables, foreign_keys)] == ["customers", "products", "staff", "orders", "items"]
+    lookups = []
+    def key_lookup(table, condition):
+        # Stands in for postgres_lookup: a filtered source scan with a row identity first.
+        lookups.append(condition)
+        return f"(SELECT rowid::VARCHAR AS mamaduck_row, * FROM src.{table} WHERE {condition})"
+    sampler.KEY_BATCH = 25
+    counts = sampler.sample_subset(
+        {table: f"src.{table}" for table in tables}, foreign_keys, schema="dev", key_lookup=key_lookup if pushdown else None
+    )
+    assert bool(lookups) == pushdown and all(c == "false" or " IN (" in c for c in lookups)
+
+    assert 0 < counts["customers"] < 100 and counts["items"] < 3000
+    for child, (column,), parent, (parent_column,) in foreign_keys:
+        dangling = conn.execute(
+            f"SELECT count(*) FROM dev.{child} c WHERE c.{column} IS NOT NULL "
+            f"AND NOT EXISTS (SELECT 1 FROM dev.{parent} p WHERE p.{parent_column} = c.{column})"
+        ).fetchone()[0]
+        assert dangling == 0
+    with pytest.raises(ValueError):
+        SubsetSampler.parse_sample("150%")
+
+
+def test_postgres_root_samples_are_pushed_down():
+    percent = SubsetSampler(duckdb_conn=MagicMock(), sample="5%", seed=42, quiet=True)
+    rows = SubsetSampler(duckdb_conn=MagicMock(), sample="1000", seed=42, quiet=True)
+
+    assert percent.postgres_root_sources(["orders"]) == {
+        "orders": "postgres_query('postgres_db', $$SELECT * FROM public.\"orders\" TABLESAMPLE BERNOULLI (5.0) REPEATABLE (42)$$)"
+    }
+    assert rows.postgres_root_sources(["orders"]) == {
+        "orders": "postgres_query('postgres_db', $$SELECT * FROM public.\"orders\" ORDER BY md5(ctid::text || '42') LIMIT 1000$$)"
+    }
+    rows.duckdb_conn = duckdb.connect()
+    assert list(rows.key_conditions(["note"], "SELECT 'o''b'")) == ["(\"note\") IN (('o''b'))"]
+    assert rows.postgres_lookup("orders", "(\"id\") IN ((1))") == (
+        "postgres_query('postgres_db', 'SELECT ctid::text AS mamaduck_row, * FROM public.\"orders\" WHERE (\"id\") IN ((1))')"
+    )
+
+
+def test_writers_queue_on_the_write_lock_and_report_the_wait(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    DuckDBManager.ensure_database_folder()
+    # Another process holds the write lock for a moment, as a concurrent load would.
+    holder = subprocess.Popen([sys.executable, "-c", textwrap.dedent("""
+        import sys, time
+        from mamaduck.database.locking import WriteLock
+        with WriteLock("databases/shared.duckdb"):
+            print("locked", flush=True)
+            time.sleep(0.5)
+    """)], stdout=subprocess.PIPE, text=True, cwd=tmp_path, env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))})
+    assert holder.stdout.readline().strip() == "locked"
+
+    monkeypatch.setattr(DuckDBManager, "write_lock_timeout", 0.1)
+    with pytest.raises(TimeoutError):
+        DuckDBManager("shared.duckdb", quiet=True).connect_to_duckdb()
+
+    monkeypatch.setattr(DuckDBManager, "write_lock_timeout", None)
+    log = io.StringIO()
+    writer = DuckDBManager("shared.duckdb", log_stream=log)
+    writer.connect_to_duckdb()
+    # A second writer in the same process shares the lock instead of deadlocking on it.
+    nested = DuckDBManager("shared.duckdb", quiet=True)
+    nested.connect_to_duckdb()
+    nested.close_duckdb_conn()
+    assert WriteLock("databases/shared.duckdb").path in WriteLock.held
+    writer.close_duckdb_conn()
+    holder.wait()
+
+    assert writer.write_lock is None and not WriteLock.held
+    assert "Waited" in log.getvalue() and "write queue" in log.getvalue()
+
+
+def test_maintenance_compacts_a_fragmented_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    loader = DuckDBManager("frag.duckdb", quiet=True)
+    loader.connect_to_duckdb()
+    loader.duckdb_conn.execute("CREATE TABLE keep AS SELECT range AS id FROM range(100)")
+    loader.duckdb_conn.execute("CREATE VIEW recent AS SELECT * FROM keep WHERE id > 90")
+    for _ in range(3):
+        loader.duckdb_conn.execute("CREATE OR REPLACE TABLE scratch AS SELECT range AS id, md5(range::VARCHAR) AS s FROM range(200000)")
+    loader.duckdb_conn.execute("DROP TABLE scratch")
+
+    reclaimed = maintain_after_load(loader, threshold=0.25)
+
+    assert reclaimed > 1024 * 1024
+    assert not WriteLock.held
+    assert [p.name for p in (tmp_path / "databases").iterdir() if "compact" in p.name] == []
+    check = DuckDBMaintenance("frag.duckdb", quiet=True)
+    check.connect_to_duckdb()
+    assert check.duckdb_conn.execute("SELECT count(*) FROM recent").fetchone() == (9,)
+    assert check.maintain(threshold=0.25) <= 0
+    check.close_duckdb_conn()
+
+
+def test_maintenance_compacts_a_file_with_a_dash_in_its_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tool = DuckDBMaintenance("my-db.duckdb", quiet=True)
+    tool.connect_to_duckdb()
+    tool.duckdb_conn.execute("CREATE TABLE keep AS SELECT range AS id FROM range(100)")
+
+    tool.compact()
+
+    assert tool.duckdb_conn.execute("SELECT count(*) FROM keep").fetchone() == (100,)
+    tool.close_duckdb_conn()
+
+
+def test_analyze_sqlite_refreshes_stats_and_reports_reclaimed_bytes(tmp_path):
+    sqlite_path = str(tmp_path / "target.db")
+    conn = sqlite3.connect(sqlite_path)
+    conn.execute("CREATE TABLE t (id INTEGER, payload TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, "x" * 200) for i in range(5000)])
+    conn.commit()
+    conn.execute("DELETE FROM t WHERE id >= 100")
+    conn.commit()
+    conn.close()
+
+    reclaimed = DuckDBMaintenance.analyze_sqlite(sqlite_path, log=lambda message: None)
+
+    assert reclaimed > 0
+    conn = sqlite3.connect(sqlite_path)
+    assert conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 't'").fetchone() == ("100",)
+    conn.close()
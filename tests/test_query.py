@@ -0,0 +1,99 @@
+import io
+import json
+
+import duckdb
+import pytest
+from unittest.mock import MagicMock
+
+from mamaduck.database.cache import ResultCache
+from mamaduck.query import FederatedQuery, parse_sources
+
+
+def test_query_joins_csv_view_with_duckdb_table(tmp_path):
+    csv_file = tmp_path / "accounts.csv"
+    csv_file.write_text("id,region\n1,eu\n2,us\n3,eu\n")
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE orders AS SELECT range % 3 + 1 AS account_id, 10 AS amount FROM range(9)")
+    tool = FederatedQuery(None, duckdb_conn=conn, quiet=True)
+
+    tool.register_csv("accounts", str(csv_file))
+    output = io.StringIO()
+    rows = tool.run_query(
+        "SELECT a.region, sum(o.amount) AS total FROM orders o JOIN accounts a ON a.id = o.account_id GROUP BY 1 ORDER BY 1",
+        output_format="json",
+        stream=output,
+    )
+
+    assert rows == 2
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {"region": "eu", "total": 60},
+        {"region": "us", "total": 30},
+    ]
+    # Nothing was copied into the database.
+    assert conn.execute("SELECT count(*) FROM duckdb_tables()").fetchone() == (1,)
+
+
+def test_query_attaches_sources_read_only():
+    tool = FederatedQuery(None, duckdb_conn=MagicMock(), quiet=True)
+    tool.attach_sqlite("app", "app.db")
+    tool.attach_psql("crm", "dbname=crm")
+
+    statements = [c.args[0] for c in tool.duckdb_conn.execute.call_args_list]
+    assert statements == [
+        "ATTACH 'app.db' AS app (TYPE SQLITE, READ_ONLY);",
+        "ATTACH 'dbname=crm' AS crm (TYPE POSTGRES, READ_ONLY);",
+    ]
+
+
+def test_parse_sources_requires_names():
+    assert parse_sources(["pg=dbname=crm host=db"], "--psql") == [("pg", "dbname=crm host=db")]
+    with pytest.raises(ValueError):
+        parse_sources(["app.db"], "--sqlite")
+
+
+def test_result_cache_hits_until_a_source_changes(tmp_path):
+    csv_file = tmp_path / "accounts.csv"
+    csv_file.write_text("id,region\n1,eu\n2,us\n")
+    tool = FederatedQuery(None, duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+    tool.enable_cache(str(tmp_path / "cache.duckdb"))
+    tool.register_csv("accounts", str(csv_file))
+
+    for sql in ("SELECT region FROM accounts ORDER BY 1", "select  region\nfrom accounts order by 1;"):
+        output = io.StringIO()
+        tool.run_query(sql, stream=output)
+        assert output.getvalue() == "region\neu\nus\n"
+
+    csv_file.write_text("id,region\n1,eu\n2,us\n3,apac\n")
+    output = io.StringIO()
+    tool.run_query("SELECT region FROM accounts ORDER BY 1", stream=output)
+    assert output.getvalue() == "region\napac\neu\nus\n"
+
+    metrics = tool.cache.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["stale"], metrics["entries"]) == (1, 2, 1, 1)
+
+
+def test_unavailable_result_cache_falls_back_to_uncached(tmp_path):
+    log = io.StringIO()
+    tool = FederatedQuery(None, duckdb_conn=duckdb.connect(database=':memory:'), log_stream=log)
+    tool.enable_cache(str(tmp_path / "missing" / "cache.duckdb"))
+
+    output = io.StringIO()
+    tool.run_query("SELECT 42 AS answer", stream=output)
+
+    assert tool.cache is None
+    assert "running uncached" in log.getvalue()
+    assert output.getvalue() == "answer\n42\n"
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(duckdb.connect(database=':memory:'), str(tmp_path / "cache.duckdb"), max_bytes=1)
+    cache.cached_query("SELECT 1 AS a")
+    cache.cached_query("SELECT 2 AS b")
+
+    assert cache.metrics()["evictions"] == 1
+    assert cache.cached_query("SELECT 2 AS b")[1] is True
+    assert cache.cached_query("SELECT 1 AS a")[1] is False
+
+
+def test_normalize_sql_keeps_literals():
+    assert ResultCache.normalize_sql("SELECT  *\n FROM t WHERE name = 'Ada  Lovelace';") == "select * from t where name = 'Ada  Lovelace'"
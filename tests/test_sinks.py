@@ -1,8 +1,17 @@
+import io
+import json
+import os
+import sqlite3
+
+import duckdb
 import pytest
 from unittest.mock import MagicMock, patch
 from mamaduck.sink.to_csv import DuckDBToCSV
 from mamaduck.sink.to_psql import DuckDBToPostgreSQL
 from mamaduck.sink.to_sqlite import DuckDBToSQLite
+from mamaduck.sink.to_parquet import DuckDBToParquet
+from mamaduck.sink.fanout import DuckDBFanout
+from mamaduck.sink.sharded import ShardedExport, work_manifest
 
 
 # Mock DuckDBManager and DuckDB connection
@@ -72,7 +81,9 @@ def test_transfer_data_to_psql_success(mock_duckdb_connection):
     psql_table_name = "test_psql_table"
     db_tool = DuckDBToPostgreSQL(db_path=None, psql_conn_string="fake_psql_conn")
     db_tool.duckdb_conn = mock_duckdb_connection
-    db_tool.duckdb_conn.execute.return_value.fetchall.return_value = [(1, 'test')]
+    scan = db_tool.duckdb_conn.cursor.return_value
+    scan.description = [("id",), ("name",)]
+    scan.fetchmany.side_effect = [[(1, 'test')], []]
 
     # Act
     db_tool.transfer_data_to_psql(source_table_name, psql_table_name)
@@ -92,7 +103,7 @@ def test_attach_sqlite_database_success(mock_duckdb_connection):
     db_tool.attach_sqlite_database()
 
     # Assert
-    db_tool.duckdb_conn.execute.assert_called_once_with(f"ATTACH '{sqlite_db_path}' AS sqlite_db (TYPE SQLITE);")
+    db_tool.duckdb_conn.execute.assert_called_with(f"ATTACH '{sqlite_db_path}' AS sqlite_db (TYPE SQLITE);")
 
 
 def test_attach_sqlite_database_failure(mock_duckdb_connection):
@@ -113,7 +124,9 @@ def test_transfer_data_to_sqlite_success(mock_duckdb_connection):
     sqlite_table_name = "test_sqlite_table"
     db_tool = DuckDBToSQLite(db_path=None, sqlite_db_path="fake_sqlite_path")
     db_tool.duckdb_conn = mock_duckdb_connection
-    db_tool.duckdb_conn.execute.return_value.fetchall.return_value = [(1, 'test')]
+    scan = db_tool.duckdb_conn.cursor.return_value
+    scan.description = [("id",), ("name",)]
+    scan.fetchmany.side_effect = [[(1, 'test')], []]
 
     # Act
     db_tool.transfer_data_to_sqlite(source_table_name, sqlite_table_name)
@@ -132,3 +145,267 @@ def test_preview_sqlite_data_failure(mock_duckdb_connection):
     with pytest.raises(Exception):
         db_tool.preview_sqlite_data(sqlite_table_name)
 
+
+# Test for DuckDBToParquet
+def test_export_table_to_parquet_options(mock_duckdb_connection):
+    db_tool = DuckDBToParquet(db_path=None)
+    db_tool.duckdb_conn = mock_duckdb_connection
+
+    db_tool.export_table_to_parquet("events", "events.parquet", schema="raw", compression="snappy", row_group_size=122880)
+
+    db_tool.duckdb_conn.execute.assert_called_once_with(
+        "COPY raw.events TO 'events.parquet' (FORMAT PARQUET, COMPRESSION SNAPPY, ROW_GROUP_SIZE 122880);"
+    )
+
+
+def test_stream_table_to_stdout():
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE people AS SELECT * FROM (VALUES (1, 'ada'), (2, 'grace'), (3, 'alan')) t(id, name);")
+    db_tool = DuckDBToCSV(db_path=None, duckdb_conn=conn, quiet=True)
+
+    csv_out, json_out = io.StringIO(), io.StringIO()
+    rows = db_tool.stream_table("people", stream=csv_out)
+    db_tool.stream_table("people", output_format="json", stream=json_out)
+
+    assert rows == 3
+    assert csv_out.getvalue() == "id,name\n1,ada\n2,grace\n3,alan\n"
+    assert json_out.getvalue().splitlines()[0] == '{"id":1,"name":"ada"}'
+
+
+def test_stream_query_formats_values_like_copy(tmp_path):
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE flags AS SELECT range AS id, range % 2 = 0 AS even, NULL::VARCHAR AS note FROM range(3);")
+    db_tool = DuckDBToCSV(db_path=None, duckdb_conn=conn, quiet=True)
+    exported = tmp_path / "flags.csv"
+    db_tool.export_table_to_csv("flags", str(exported))
+
+    streamed = io.StringIO()
+    db_tool.stream_table("flags", stream=streamed)
+
+    assert streamed.getvalue() == exported.read_text()
+    assert streamed.getvalue().splitlines()[1] == "0,true,"
+
+
+# Test for DuckDBFanout
+def test_fanout_scans_once_to_every_sink(tmp_path):
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE events AS SELECT range AS id FROM range(25);")
+    db_tool = DuckDBFanout(duckdb_conn=conn, batch_size=10, queue_size=1, quiet=True)
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    db_tool.add_csv_sink(str(first))
+    db_tool.add_csv_sink(str(second))
+
+    stats = db_tool.fanout_table("events")
+
+    assert [s["rows"] for s in stats.values()] == [25, 25]
+    assert first.read_text() == second.read_text()
+    assert first.read_text().splitlines()[:2] == ["id", "0"]
+
+
+def test_fanout_csv_sink_formats_values_like_copy(tmp_path):
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE flags AS SELECT range AS id, range % 2 = 0 AS even FROM range(3);")
+    db_tool = DuckDBFanout(duckdb_conn=conn, quiet=True)
+    output = tmp_path / "flags.csv"
+    db_tool.add_csv_sink(str(output))
+
+    db_tool.fanout_table("flags")
+
+    assert output.read_bytes() == b"id,even\n0,true\n1,false\n2,true\n"
+
+
+def test_fanout_parquet_sink_writes_after_complete_scan(tmp_path):
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE events AS SELECT range AS id, range % 2 = 0 AS even FROM range(25);")
+    db_tool = DuckDBFanout(duckdb_conn=conn, batch_size=10, queue_size=1, quiet=True)
+    output = tmp_path / "events.parquet"
+    db_tool.add_parquet_sink(str(output), compression="snappy", row_group_size=10)
+    db_tool.add_csv_sink(str(tmp_path / "events.csv"))
+
+    stats = db_tool.fanout_table("events")
+
+    assert [s["rows"] for s in stats.values()] == [25, 25]
+    assert conn.execute(f"SELECT count(*), sum(id), count(*) FILTER (even) FROM '{output}'").fetchone() == (25, 300, 13)
+    assert conn.execute(f"SELECT DISTINCT compression FROM parquet_metadata('{output}')").fetchone() == ("SNAPPY",)
+
+
+def test_fanout_isolates_failing_sink(tmp_path):
+    conn = duckdb.connect(database=':memory:')
+    conn.execute("CREATE TABLE events AS SELECT range AS id FROM range(25);")
+    db_tool = DuckDBFanout(duckdb_conn=conn, batch_size=10, queue_size=1, quiet=True)
+    db_tool.add_csv_sink(str(tmp_path / "a.csv"))
+    db_tool.add_sqlite_sink("target.db", "events")
+    failing = db_tool.sinks[1]
+    failing.open_cursor = MagicMock()
+    failing.cursor = MagicMock()
+    failing.cursor.executemany.side_effect = Exception("disk full")
+
+    with patch.object(failing, "open"):
+        stats = db_tool.fanout_table("events")
+
+    assert stats["csv:" + str(tmp_path / "a.csv")]["rows"] == 25
+    assert stats["sqlite:target.db"]["error"] == "disk full"
+
+
+def test_sqlite_attach_alias_handles_paths():
+    assert DuckDBToSQLite.attach_alias("exports/v1.2/app-data.db") == "sqlite_app_data"
+    assert DuckDBToSQLite.attach_alias("2024.sqlite") == "sqlite_2024"
+    assert DuckDBToSQLite.attach_alias("out/app.db", taken={"app", "sqlite_app"}) == "sqlite_app_2"
+
+
+def test_sqlite_attach_alias_avoids_the_duckdb_catalog(tmp_path):
+    conn = duckdb.connect(str(tmp_path / "app.duckdb"))
+    db_tool = DuckDBToSQLite(db_path=None, sqlite_db_path=str(tmp_path / "app.db"))
+    db_tool.duckdb_conn = conn
+    conn.execute("ATTACH ':memory:' AS sqlite_app;")
+
+    # Without the sqlite extension the file is attached as DuckDB; the alias logic is the same.
+    with patch.object(db_tool, "attach_options", return_value=""):
+        db_tool.attach_sqlite_database()
+
+    assert db_tool.schema == "sqlite_app_2"
+
+
+def test_export_schema_single_transaction(mock_duckdb_connection):
+    db_tool = DuckDBToSQLite(db_path=None, sqlite_db_path="out/app.db")
+    db_tool.duckdb_conn = mock_duckdb_connection
+
+    db_tool.export_schema("sales", tables=["orders", "customers"])
+
+    statements = [c.args[0] for c in mock_duckdb_connection.execute.call_args_list]
+    assert statements == [
+        "SELECT database_name FROM duckdb_databases();",
+        "ATTACH 'out/app.db' AS sqlite_app (TYPE SQLITE);",
+        "BEGIN TRANSACTION;",
+        "DROP TABLE IF EXISTS sqlite_app.orders;",
+        "CREATE TABLE sqlite_app.orders AS SELECT * FROM sales.orders;",
+        "DROP TABLE IF EXISTS sqlite_app.customers;",
+        "CREATE TABLE sqlite_app.customers AS SELECT * FROM sales.customers;",
+        "COMMIT;",
+    ]
+
+
+def test_build_sqlite_part_removes_leftover_part(tmp_path, mock_duckdb_connection):
+    part = tmp_path / "app.db.part-0"
+    part.write_bytes(b"left by an interrupted run")
+    db_tool = DuckDBToSQLite(db_path=None, sqlite_db_path=str(tmp_path / "app.db"))
+    db_tool.duckdb_conn = mock_duckdb_connection
+
+    db_tool.build_sqlite_part("main", "orders", str(part))
+
+    assert not part.exists()
+    assert mock_duckdb_connection.cursor.return_value.execute.call_count == 3
+
+
+def test_merge_sqlite_parts(tmp_path):
+    parts = {}
+    for index, table in enumerate(["orders", "customers"]):
+        part = str(tmp_path / f"part-{index}.db")
+        with sqlite3.connect(part) as conn:
+            conn.execute(f"CREATE TABLE {table} (id INTEGER, note TEXT);")
+            conn.execute(f"INSERT INTO {table} VALUES (1, 'a'), (2, 'b');")
+        parts[table] = part
+    target = str(tmp_path / "app.db")
+
+    DuckDBToSQLite.merge_sqlite_parts(target, parts)
+    # Exporting again over the same file replaces the tables.
+    DuckDBToSQLite.merge_sqlite_parts(target, parts)
+
+    with sqlite3.connect(target) as conn:
+        assert conn.execute("SELECT count(*) FROM orders;").fetchone() == (2,)
+        assert conn.execute("SELECT count(*) FROM customers;").fetchone() == (2,)
+
+
+def make_shard_source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "databases").mkdir()
+    conn = duckdb.connect(str(tmp_path / "databases" / "src.duckdb"))
+    conn.execute("CREATE TABLE events AS SELECT range AS id, range % 7 AS kind FROM range(1000)")
+    conn.close()
+
+
+@pytest.mark.parametrize("method", ["hash", "range"])
+def test_sharded_export_plan_work_combine(tmp_path, monkeypatch, method):
+    make_shard_source(tmp_path, monkeypatch)
+    coordinator = ShardedExport("src.duckdb", quiet=True)
+    coordinator.connect_to_duckdb()
+    coordinator.plan("events", ["id"], 4, "out", "csv", method)
+    coordinator.close_duckdb_conn()
+
+    # Two workers share the manifest; the second finds the first's shards done.
+    assert len(work_manifest("out/manifest.json", max_shards=3)) == 3
+    assert len(work_manifest("out/manifest.json")) == 1
+    assert work_manifest("out/manifest.json") == []
+
+    combiner = ShardedExport(quiet=True)
+    combiner.connect_to_duckdb()
+    assert combiner.combine("out/manifest.json", "out/events.csv") == 1000
+    combined = combiner.duckdb_conn.execute("SELECT count(*), count(DISTINCT id) FROM read_csv('out/events.csv')").fetchone()
+    assert combined == (1000, 1000)
+
+
+def test_sharded_export_takes_over_stale_claims(tmp_path, monkeypatch):
+    make_shard_source(tmp_path, monkeypatch)
+    coordinator = ShardedExport("src.duckdb", quiet=True)
+    coordinator.connect_to_duckdb()
+    coordinator.plan("events", ["id"], 2, "out", "parquet")
+
+    # A live claim is respected; once it stops being refreshed it is taken over.
+    claim = ShardedExport.marker(os.path.abspath("out"), 0, "claim")
+    with open(claim, "w") as f:
+        f.write("elsewhere:1")
+    assert work_manifest("out/manifest.json") == [1]
+    with pytest.raises(RuntimeError, match="not exported yet"):
+        coordinator.combine("out/manifest.json")
+    os.utime(claim, (0, 0))
+    assert work_manifest("out/manifest.json") == [0]
+
+    assert coordinator.combine("out/manifest.json", "out/events.parquet") == 1000
+    assert json.load(open("out/.claims/shard-0000.done"))["rows"] > 0
+
+
+def test_sharded_psql_export_does_not_reinsert_committed_shard(tmp_path, monkeypatch):
+    make_shard_source(tmp_path, monkeypatch)
+    target = tmp_path / "target.duckdb"
+    with duckdb.connect(str(target)) as conn:
+        conn.execute("CREATE TABLE events (id BIGINT, kind BIGINT);")
+    # A DuckDB file stands in for the PostgreSQL server.
+    monkeypatch.setattr(ShardedExport, "attach_postgresql",
+                        lambda self, conn_string: self.duckdb_conn.execute(f"ATTACH '{target}' AS postgres_db {self.attach_options('DUCKDB')};"))
+    coordinator = ShardedExport("src.duckdb", quiet=True)
+    coordinator.connect_to_duckdb()
+    manifest = coordinator.plan("events", ["id"], 2, "out", "psql")
+    coordinator.close_duckdb_conn()
+
+    # A worker commits shard 0 and is killed before it writes the done marker.
+    worker = ShardedExport("src.duckdb", quiet=True)
+    worker.connect_to_duckdb()
+    worker.attach_postgresql(None)
+    worker.export_shard(manifest, os.path.abspath("out"), manifest["shards"][0])
+    worker.close_duckdb_conn()
+
+    assert sorted(work_manifest("out/manifest.json")) == [0, 1]
+    assert ShardedExport(quiet=True).combine("out/manifest.json") == 1000
+    with duckdb.connect(str(target)) as conn:
+        assert conn.execute("SELECT count(*), count(DISTINCT id) FROM events;").fetchone() == (1000, 1000)
+        assert conn.execute("SELECT count(*) FROM mamaduck.shard_log;").fetchone() == (2,)
+
+
+def test_sharded_export_removes_partial_file_when_copy_fails(tmp_path, monkeypatch):
+    make_shard_source(tmp_path, monkeypatch)
+    coordinator = ShardedExport("src.duckdb", quiet=True)
+    coordinator.connect_to_duckdb()
+    manifest = coordinator.plan("events", ["id"], 1, "out", "csv")
+    coordinator.close_duckdb_conn()
+
+    def failing_copy(query):
+        # The COPY gets part of the way through writing before it fails.
+        open(query.split("TO '")[1].split("'")[0], "w").close()
+        raise duckdb.IOException("disk full")
+
+    worker = ShardedExport(duckdb_conn=MagicMock(), quiet=True)
+    worker.duckdb_conn.execute.side_effect = failing_copy
+    with pytest.raises(duckdb.IOException):
+        worker.export_shard(manifest, os.path.abspath("out"), manifest["shards"][0])
+
+    assert not [name for name in os.listdir("out") if name.endswith(".tmp")]
@@ -0,0 +1,52 @@
+import duckdb
+from unittest.mock import MagicMock
+
+from mamaduck.watch import SyncJob, SyncScheduler
+
+
+def make_scheduler():
+    return SyncScheduler(duckdb_conn=duckdb.connect(database=':memory:'), quiet=True)
+
+
+def test_interval_job_runs_when_due():
+    scheduler = make_scheduler()
+    action = MagicMock()
+    scheduler.add_job(SyncJob("nightly", action, interval=60))
+
+    scheduler.tick(now=0)
+    scheduler.tick(now=30)
+    scheduler.tick(now=61)
+
+    assert action.call_count == 2
+
+
+def test_overlapping_triggers_are_coalesced():
+    scheduler = make_scheduler()
+    action = MagicMock()
+    scheduler.add_job(SyncJob("crm", action, interval=3600))
+    scheduler.tick(now=0)
+
+    # Triggers arriving while a run is in flight collapse into a single rerun.
+    scheduler.trigger("crm")
+    scheduler.trigger("crm")
+    scheduler.tick(now=1)
+
+    assert action.call_count == 2
+
+
+def test_csv_drop_directory_reuses_connection(tmp_path):
+    scheduler = make_scheduler()
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    (drop / "orders.csv").write_text("id\n1\n2\n")
+    scheduler.load_config({"syncs": [{"type": "csv_dir", "path": str(drop)}]})
+
+    scheduler.tick(now=0)
+    scheduler.tick(now=1)  # nothing changed
+    (drop / "customers.csv").write_text("id\n7\n")
+    scheduler.tick(now=2)
+
+    conn = scheduler.duckdb_conn
+    assert scheduler.jobs[0].runs == 2
+    assert conn.execute("SELECT count(*) FROM orders;").fetchone() == (2,)
+    assert conn.execute("SELECT count(*) FROM customers;").fetchone() == (1,)